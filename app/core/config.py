@@ -141,6 +141,9 @@ MAX_STREAM_CHUNKS = int(os.getenv("MAX_STREAM_CHUNKS", "500"))  # Prevent runawa
 ENABLE_PARALLEL_TOOLS = os.getenv("ENABLE_PARALLEL_TOOLS", "true").lower() in {"1", "true", "yes"}
 TOOL_TIMEOUT = int(os.getenv("TOOL_TIMEOUT", "10"))  # 10 seconds max per tool
 
+# Build LLM clients and open their connections at startup instead of on the first request
+PREWARM_LLM_CLIENTS = os.getenv("PREWARM_LLM_CLIENTS", "false").lower() in {"1", "true", "yes"}
+
 # Model-specific optimizations
 FAST_MODEL_FOR_SIMPLE = os.getenv("FAST_MODEL_FOR_SIMPLE", "gpt-4o-mini")
 
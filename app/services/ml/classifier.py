@@ -1,7 +1,7 @@
 """Tool classifier for ML-based tool selection."""
 import logging
 import numpy as np
-from typing import Dict, List, Set, Optional
+from typing import Dict, List, Set, Optional, Tuple
 from pathlib import Path
 import joblib
 
@@ -27,6 +27,7 @@ class ToolClassifier:
         self.n_tools = len(tool_names)
         self.classifier = None
         self.feature_importance = None
+        self._active_estimators: Optional[List[Tuple[str, object]]] = None
         
         logger.info(f"Initialized ToolClassifier with {self.n_tools} tools")
     
@@ -56,6 +57,7 @@ class ToolClassifier:
         
         # Train
         self.classifier.fit(X, y)
+        self._active_estimators = None
         
         logger.info("Training complete!")
         
@@ -75,21 +77,13 @@ class ToolClassifier:
         if self.classifier is None:
             raise ValueError("Classifier not trained yet")
         
-        # Reshape for prediction
-        X = query_embedding.reshape(1, -1)
+        # Single contiguous float32 row shared by every estimator
+        X = np.ascontiguousarray(query_embedding, dtype=np.float32).reshape(1, -1)
         
-        # Get predictions from each estimator
-        tool_probs = {}
+        # Tools that never appeared in training data stay at 0
+        tool_probs = dict.fromkeys(self.tool_names, 0.0)
         
-        for i, tool_name in enumerate(self.tool_names):
-            estimator = self.classifier.estimators_[i]
-            
-            # Check if tool was trained (has more than one class)
-            if hasattr(estimator, 'classes_') and len(estimator.classes_) < 2:
-                # Tool never appeared in training data - set to 0
-                tool_probs[tool_name] = 0.0
-                continue
-            
+        for tool_name, estimator in self._get_active_estimators():
             try:
                 # Get probability for positive class (tool is relevant)
                 proba = estimator.predict_proba(X)[0]
@@ -102,6 +96,23 @@ class ToolClassifier:
         
         return tool_probs
     
+    def _get_active_estimators(self) -> List[Tuple[str, object]]:
+        """
+        Return (tool_name, estimator) pairs for tools that were actually trained.
+        
+        Computed once per fitted model so predict_proba does not re-inspect
+        every estimator's classes on each query.
+        """
+        if self._active_estimators is None:
+            active = []
+            for tool_name, estimator in zip(self.tool_names, self.classifier.estimators_):
+                # Check if tool was trained (has more than one class)
+                if hasattr(estimator, 'classes_') and len(estimator.classes_) < 2:
+                    continue
+                active.append((tool_name, estimator))
+            self._active_estimators = active
+        return self._active_estimators
+    
     def predict(self, query_embedding: np.ndarray, threshold: float = 0.5) -> Set[str]:
         """
         Predict relevant tools above threshold.
@@ -13,11 +13,14 @@ based on user queries. It handles:
 
 import logging
 import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple, Union
 from collections import defaultdict
 import threading
 
+import numpy as np
+
 from app.core.config import (
     ML_MODEL_PATH,
     ML_CONFIDENCE_THRESHOLD,
@@ -29,6 +32,29 @@ from app.services.ml.classifier import ToolClassifier
 
 logger = logging.getLogger(__name__)
 
+# Upper edges of the confidence histogram bins; searchsorted(side='right') maps
+# a score to its bin index without string keys or branches.
+_CONFIDENCE_EDGES = np.array([0.3, 0.5, 0.7])
+_CONFIDENCE_LABELS = ('0.0-0.3', '0.3-0.5', '0.5-0.7', '0.7-1.0')
+
+# Below this average confidence the ML prediction is discarded and the
+# OpenAI model picks from all tools instead
+LOW_CONFIDENCE_THRESHOLD = 0.5
+
+
+def _as_tool_set(tools: Union[List[str], FrozenSet[str], Set[str]]) -> FrozenSet[str]:
+    """Return ``tools`` as a frozenset, reusing the cached set for repeated tuples/lists."""
+    if isinstance(tools, frozenset):
+        return tools
+    if isinstance(tools, (set, dict)):
+        return frozenset(tools)
+    return _cached_tool_set(tuple(tools))
+
+
+@lru_cache(maxsize=32)
+def _cached_tool_set(tools: Tuple[str, ...]) -> FrozenSet[str]:
+    return frozenset(tools)
+
 
 class MLToolSelector:
     """
@@ -74,8 +100,9 @@ class MLToolSelector:
             'avg_confidence': 0.0,
             'avg_prediction_time_ms': 0.0,
             'tools_predicted': defaultdict(int),
-            'confidence_distribution': defaultdict(int),  # bins: 0-0.3, 0.3-0.5, 0.5-0.7, 0.7-1.0
         }
+        # Confidence histogram counts, one slot per _CONFIDENCE_LABELS entry
+        self._confidence_bins = np.zeros(len(_CONFIDENCE_LABELS), dtype=np.int64)
         self.stats_lock = threading.Lock()
         
         self._initialized = True
@@ -120,7 +147,7 @@ class MLToolSelector:
     def predict_tools(
         self,
         query: str,
-        available_tools: Optional[List[str]] = None,
+        available_tools: Optional[Union[List[str], FrozenSet[str]]] = None,
         return_probabilities: bool = False,
         use_hybrid: bool = True  # Deprecated parameter, kept for backward compatibility
     ) -> Tuple[List[str], Dict[str, float]]:
@@ -129,7 +156,7 @@ class MLToolSelector:
         
         Args:
             query: User query text
-            available_tools: Optional list of available tools to filter by
+            available_tools: Optional list (or frozenset) of available tools to filter by
             return_probabilities: Whether to return tool probabilities
             use_hybrid: Deprecated, kept for backward compatibility
             
@@ -138,7 +165,7 @@ class MLToolSelector:
             - selected_tools: List of tool names above confidence threshold
             - probabilities_dict: Dict of tool -> probability (empty if not requested)
         """
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         # Lazy load model if needed
         if not self.model_loaded:
@@ -147,76 +174,126 @@ class MLToolSelector:
                 return [], {}
         
         try:
-            # Step 1: Try ML classifier first
-            logger.debug(f"Embedding query: {query[:100]}...")
+            logger.debug("Embedding query: %s...", query[:100])
             query_embedding = self.embedder.embed(query)
+            return self._predict_from_embedding(
+                query_embedding, available_tools, return_probabilities, start_ns
+            )
             
-            logger.debug("Predicting tool probabilities with ML...")
-            tool_probs = self.classifier.predict_proba(query_embedding)
-            
-            # Filter by available tools if specified
-            if available_tools:
-                tool_probs = {
-                    tool: prob 
-                    for tool, prob in tool_probs.items() 
-                    if tool in available_tools
-                }
+        except Exception as e:
+            logger.error(f"ML prediction failed: {e}", exc_info=True)
+            return [], {}
+    
+    def predict_tools_from_embedding(
+        self,
+        query_embedding: np.ndarray,
+        available_tools: Optional[Union[List[str], FrozenSet[str]]] = None,
+        return_probabilities: bool = False
+    ) -> Tuple[List[str], Dict[str, float]]:
+        """
+        Predict relevant tools from a precomputed query embedding.
+        
+        Lets callers that already embedded the query (e.g. for RAG or caching)
+        reuse that vector instead of paying for a second embedding call.
+        
+        Args:
+            query_embedding: Query embedding vector (embedding_dim,)
+            available_tools: Optional list (or frozenset) of available tools to filter by
+            return_probabilities: Whether to return tool probabilities
             
-            # Filter by confidence threshold
-            filtered_tools = {
+        Returns:
+            Tuple of (selected_tools, probabilities_dict)
+        """
+        start_ns = time.perf_counter_ns()
+        
+        if not self.model_loaded:
+            if not self._load_model():
+                logger.warning("ML model not loaded, returning empty tool list")
+                return [], {}
+        
+        try:
+            return self._predict_from_embedding(
+                query_embedding, available_tools, return_probabilities, start_ns
+            )
+        except Exception as e:
+            logger.error(f"ML prediction failed: {e}", exc_info=True)
+            return [], {}
+    
+    def _predict_from_embedding(
+        self,
+        query_embedding: np.ndarray,
+        available_tools: Optional[Union[List[str], FrozenSet[str]]],
+        return_probabilities: bool,
+        start_ns: int
+    ) -> Tuple[List[str], Dict[str, float]]:
+        """Run the classifier, filtering and stats update for an embedded query."""
+        logger.debug("Predicting tool probabilities with ML...")
+        tool_probs: Dict[str, float] = self.classifier.predict_proba(query_embedding)
+        
+        # Filter by available tools if specified (set lookup keeps this O(T))
+        if available_tools:
+            available_set: FrozenSet[str] = _as_tool_set(available_tools)
+            tool_probs = {
                 tool: prob 
                 for tool, prob in tool_probs.items() 
-                if prob >= self.confidence_threshold
+                if tool in available_set
             }
-            
-            # Calculate average confidence from ALL predicted tools
-            avg_confidence = sum(tool_probs.values()) / len(tool_probs) if tool_probs else 0.0
-            
-            # If confidence is too low (< 0.5), return empty list and let OpenAI model decide
-            # This prevents forcing low-confidence predictions
-            LOW_CONFIDENCE_THRESHOLD = 0.5
-            if avg_confidence < LOW_CONFIDENCE_THRESHOLD:
-                logger.info(
+        
+        # Filter by confidence threshold
+        filtered_tools: Dict[str, float] = {
+            tool: prob 
+            for tool, prob in tool_probs.items() 
+            if prob >= self.confidence_threshold
+        }
+        
+        # Calculate average confidence from ALL predicted tools
+        avg_confidence: float = sum(tool_probs.values()) / len(tool_probs) if tool_probs else 0.0
+        
+        # If confidence is too low (< 0.5), return empty list and let OpenAI model decide
+        # This prevents forcing low-confidence predictions
+        if avg_confidence < LOW_CONFIDENCE_THRESHOLD:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
                     f"ML confidence too low ({avg_confidence:.2f} < {LOW_CONFIDENCE_THRESHOLD}), "
                     "returning empty list to let model decide with all tools"
                 )
-                # Update stats for low confidence fallback
-                prediction_time_ms = (time.time() - start_time) * 1000
-                self._update_stats([], {}, prediction_time_ms, avg_confidence, method='ml_low_confidence')
-                return [], {}
-            
-            # Sort by probability and limit to max_tools
-            sorted_tools = sorted(
-                filtered_tools.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:self.max_tools]
-            
-            selected_tools = [tool for tool, _ in sorted_tools]
-            probabilities = dict(sorted_tools)
-            
-            # Update statistics
-            prediction_time_ms = (time.time() - start_time) * 1000
-            self._update_stats(
-                selected_tools, 
-                probabilities, 
-                prediction_time_ms, 
-                avg_confidence,
-                method='ml'
-            )
-            
-            probabilities_out = probabilities if return_probabilities else {}
-            
+            # Update stats for low confidence fallback
+            prediction_time_ms = (time.perf_counter_ns() - start_ns) * 1e-6
+            self._update_stats([], {}, prediction_time_ms, avg_confidence, method='ml_low_confidence')
+            return [], {}
+        
+        # Sort tool names by probability and limit to max_tools
+        selected_tools: List[str] = sorted(
+            filtered_tools,
+            key=filtered_tools.__getitem__,
+            reverse=True
+        )[:self.max_tools]
+        
+        # Only materialize the probability mapping when the caller wants it
+        probabilities_out: Dict[str, float] = (
+            {tool: filtered_tools[tool] for tool in selected_tools}
+            if return_probabilities and selected_tools
+            else {}
+        )
+        
+        # Update statistics
+        prediction_time_ms = (time.perf_counter_ns() - start_ns) * 1e-6
+        self._update_stats(
+            selected_tools, 
+            probabilities_out, 
+            prediction_time_ms, 
+            avg_confidence,
+            method='ml'
+        )
+        
+        # Guarded so the f-string (tool list, floats) is not built when INFO is off
+        if logger.isEnabledFor(logging.INFO):
             logger.info(
                 f"ML predicted {len(selected_tools)} tools in {prediction_time_ms:.1f}ms "
                 f"(avg confidence: {avg_confidence:.2f}): {selected_tools}"
             )
-            
-            return selected_tools, probabilities_out
-            
-        except Exception as e:
-            logger.error(f"ML prediction failed: {e}", exc_info=True)
-            return [], {}
+        
+        return selected_tools, probabilities_out
     
     def should_use_ml(self) -> bool:
         """
@@ -240,7 +317,7 @@ class MLToolSelector:
         prediction_time_ms: float,
         avg_confidence: float,
         method: str = 'ml'
-    ):
+    ) -> None:
         """Update statistics tracking."""
         with self.stats_lock:
             n = self.stats['total_predictions']
@@ -265,39 +342,46 @@ class MLToolSelector:
                 self.stats['tools_predicted'][tool] += 1
             
             # Track confidence distribution
-            if avg_confidence < 0.3:
-                self.stats['confidence_distribution']['0.0-0.3'] += 1
-            elif avg_confidence < 0.5:
-                self.stats['confidence_distribution']['0.3-0.5'] += 1
-            elif avg_confidence < 0.7:
-                self.stats['confidence_distribution']['0.7-0.9'] += 1
-            else:
-                self.stats['confidence_distribution']['0.7-1.0'] += 1
+            self._confidence_bins[
+                np.searchsorted(_CONFIDENCE_EDGES, avg_confidence, side='right')
+            ] += 1
     
     def get_stats(self) -> Dict:
         """Get current statistics."""
+        # Snapshot the counters under the lock, then build the report outside
+        # it so monitoring reads don't stall concurrent predictions.
         with self.stats_lock:
-            total = self.stats['total_predictions']
-            return {
-                'total_predictions': total,
-                'ml_count': self.stats['ml_count'],
-                'fallback_count': self.stats['fallback_count'],
-                'ml_rate': self.stats['ml_count'] / total if total > 0 else 0.0,
-                'fallback_rate': self.stats['fallback_count'] / total if total > 0 else 0.0,
-                'avg_confidence': round(self.stats['avg_confidence'], 3),
-                'avg_prediction_time_ms': round(self.stats['avg_prediction_time_ms'], 2),
-                'tools_predicted': dict(self.stats['tools_predicted']),
-                'confidence_distribution': dict(self.stats['confidence_distribution']),
-                'model_loaded': self.model_loaded,
-                'ml_enabled': ML_TOOL_SELECTION_ENABLED,
-            }
+            stats = self.stats
+            total = stats['total_predictions']
+            ml_count = stats['ml_count']
+            fallback_count = stats['fallback_count']
+            avg_confidence = stats['avg_confidence']
+            avg_prediction_time_ms = stats['avg_prediction_time_ms']
+            tools_predicted = stats['tools_predicted'].copy()
+            confidence_bins = self._confidence_bins.copy()
+        
+        return {
+            'total_predictions': total,
+            'ml_count': ml_count,
+            'fallback_count': fallback_count,
+            'ml_rate': ml_count / total if total > 0 else 0.0,
+            'fallback_rate': fallback_count / total if total > 0 else 0.0,
+            'avg_confidence': round(avg_confidence, 3),
+            'avg_prediction_time_ms': round(avg_prediction_time_ms, 2),
+            'tools_predicted': dict(tools_predicted),
+            'confidence_distribution': dict(
+                zip(_CONFIDENCE_LABELS, confidence_bins.tolist())
+            ),
+            'model_loaded': self.model_loaded,
+            'ml_enabled': ML_TOOL_SELECTION_ENABLED,
+        }
     
-    def record_fallback(self):
+    def record_fallback(self) -> None:
         """Record that fallback to rule-based was used."""
         with self.stats_lock:
             self.stats['fallback_count'] += 1
     
-    def reset_stats(self):
+    def reset_stats(self) -> None:
         """Reset statistics (useful for testing/monitoring)."""
         with self.stats_lock:
             self.stats = {
@@ -307,8 +391,8 @@ class MLToolSelector:
                 'avg_confidence': 0.0,
                 'avg_prediction_time_ms': 0.0,
                 'tools_predicted': defaultdict(int),
-                'confidence_distribution': defaultdict(int),
             }
+            self._confidence_bins = np.zeros(len(_CONFIDENCE_LABELS), dtype=np.int64)
         logger.info("Statistics reset")
 
 
@@ -1,7 +1,14 @@
 """OpenAI/Azure OpenAI client service with enhanced model selection and performance optimizations."""
+import asyncio
 import logging
+import threading
+from functools import lru_cache
 from typing import Optional, Any, Dict
-from openai import AzureOpenAI, OpenAI
+import httpx
+from openai import (
+    AzureOpenAI, OpenAI, AsyncAzureOpenAI, AsyncOpenAI,
+    DefaultHttpxClient, DefaultAsyncHttpxClient,
+)
 from app.core.config import (
     AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_API_VERSION,
     OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_MODEL_DEFAULT,
@@ -11,48 +18,108 @@ from app.core.config import (
 
 logger = logging.getLogger(__name__)
 
+# HTTP/2 lets concurrent LLM calls multiplex over one TLS connection (needs h2)
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+    logger.debug("h2 not installed - LLM clients use HTTP/1.1 (pip install 'httpx[http2]')")
+
+# Shared HTTP connection pool for all sync LLM clients. httpx's default 5s
+# keepalive expiry drops idle connections between chat turns and forces a new
+# TLS handshake per call; keep them warm for a minute instead.
+_HTTP_LIMITS = httpx.Limits(
+    max_connections=1000,
+    max_keepalive_connections=100,
+    keepalive_expiry=60.0,
+)
+# Transport-level retries cover connect failures (DNS, refused, TLS reset)
+# without re-running the SDK request pipeline; the SDK's max_retries still
+# handles 429/5xx responses. Limits/HTTP2 live on the transport when one is given.
+_TRANSPORT_RETRIES = 2
+_DEFAULT_TIMEOUT = 40      # Optimized: reduced from 60 for faster responses
+# The SDK sends its client timeout with every request (overriding the pool's own),
+# so the short connect budget has to live here: a dead host fails in 5s, not 40s
+_CLIENT_TIMEOUT = httpx.Timeout(_DEFAULT_TIMEOUT, connect=5.0)
+_shared_http_client = DefaultHttpxClient(
+    transport=httpx.HTTPTransport(
+        retries=_TRANSPORT_RETRIES, limits=_HTTP_LIMITS, http2=HTTP2_AVAILABLE
+    ),
+    timeout=_CLIENT_TIMEOUT,
+)
+
+# Client construction constants shared by the Azure and OpenAI getters
+_DEFAULT_HEADERS = {
+    "User-Agent": "Azure-OpenAI-Stock-Tool/1.0",
+    "Connection": "keep-alive",  # Connection pooling
+}
+_DEFAULT_MAX_RETRIES = 2   # Reduced from 3 for faster failure
+
 # Global client state with improved connection pooling
 _azure_client: Optional[AzureOpenAI] = None
 _openai_client: Optional[OpenAI] = None
+# Provider resolved by get_provider(); clients live for the process, so it is stable
+_provider_cache: Optional[str] = None
+# get_available_models() results keyed by (azure available, openai available)
+_available_models_cache: Dict[tuple, Dict[str, Dict[str, Any]]] = {}
+
+# Async counterparts, one pool and client set per event loop: an httpx.AsyncClient
+# is bound to the loop it first ran on, and sync wrappers start a fresh loop per call.
+# Each entry maps "http"/"azure"/"openai" to that loop's pool and clients.
+_async_clients: Dict[asyncio.AbstractEventLoop, Dict[str, Any]] = {}
+
+# Guard lazy client construction so concurrent first requests build one client
+_azure_lock = threading.Lock()
+_openai_lock = threading.Lock()
+_async_lock = threading.Lock()
 
 def get_azure_client() -> Optional[AzureOpenAI]:
     """Get Azure OpenAI client if configured with optimized settings."""
     global _azure_client
-    if _azure_client is None and AZURE_OPENAI_API_KEY and AZURE_OPENAI_ENDPOINT:
+    if _azure_client is not None:
+        return _azure_client
+    if not (AZURE_OPENAI_API_KEY and AZURE_OPENAI_ENDPOINT):
+        return None
+    with _azure_lock:
+        if _azure_client is not None:
+            return _azure_client
         try:
+            endpoint = _normalize_azure_endpoint(AZURE_OPENAI_ENDPOINT)
             _azure_client = AzureOpenAI(
                 api_key=AZURE_OPENAI_API_KEY,
                 api_version=AZURE_OPENAI_API_VERSION,
-                azure_endpoint=_normalize_azure_endpoint(AZURE_OPENAI_ENDPOINT),
+                azure_endpoint=endpoint,
                 # Optimized performance settings
-                max_retries=2,  # Reduced from 3 for faster failure
-                timeout=40,     # Optimized: reduced from 60 for faster responses
-                default_headers={
-                    "User-Agent": "Azure-OpenAI-Stock-Tool/1.0",
-                    "Connection": "keep-alive"  # Connection pooling
-                },
-                # Connection pooling settings
-                http_client=None  # Use default httpx client with connection pooling
+                max_retries=_DEFAULT_MAX_RETRIES,
+                timeout=_CLIENT_TIMEOUT,
+                default_headers=_DEFAULT_HEADERS,
+                # Shared pooled client with connect retries
+                http_client=_shared_http_client
             )
-            logger.info("Azure OpenAI client initialized with optimizations at %s", _normalize_azure_endpoint(AZURE_OPENAI_ENDPOINT))
+            logger.info("Azure OpenAI client initialized with optimizations at %s", endpoint)
         except Exception as e:
             logger.error("Failed to initialize Azure OpenAI client: %s", e)
             _azure_client = None
-    return _azure_client
+        return _azure_client
 
 def get_openai_client() -> Optional[OpenAI]:
     """Get standard OpenAI client if configured with optimized settings."""
     global _openai_client
-    if _openai_client is None and OPENAI_API_KEY:
+    if _openai_client is not None:
+        return _openai_client
+    if not OPENAI_API_KEY:
+        return None
+    with _openai_lock:
+        if _openai_client is not None:
+            return _openai_client
         try:
             kwargs = {
                 "api_key": OPENAI_API_KEY,
-                "max_retries": 2,  # Reduced from 3
-                "timeout": 40,     # Optimized: reduced from 60 for faster responses
-                "default_headers": {
-                    "User-Agent": "Azure-OpenAI-Stock-Tool/1.0",
-                    "Connection": "keep-alive"
-                }
+                "max_retries": _DEFAULT_MAX_RETRIES,
+                "timeout": _CLIENT_TIMEOUT,
+                "default_headers": _DEFAULT_HEADERS,
+                "http_client": _shared_http_client,
             }
             if (OPENAI_BASE_URL or "").strip():
                 kwargs["base_url"] = OPENAI_BASE_URL.strip()
@@ -61,10 +128,158 @@ def get_openai_client() -> Optional[OpenAI]:
         except Exception as e:
             logger.error("Failed to initialize OpenAI client: %s", e)
             _openai_client = None
-    return _openai_client
+        return _openai_client
+
+def _loop_async_clients() -> Dict[str, Any]:
+    """Return the running loop's async client slots (caller holds _async_lock)."""
+    loop = asyncio.get_running_loop()
+    slots = _async_clients.get(loop)
+    if slots is None:
+        # Forget clients left behind by loops that have since been closed
+        for stale_loop in [l for l in _async_clients if l.is_closed()]:
+            del _async_clients[stale_loop]
+        slots = _async_clients[loop] = {}
+    return slots
+
+def _get_shared_async_http_client(slots: Dict[str, Any]) -> httpx.AsyncClient:
+    """Return the loop's pooled async httpx client (caller holds _async_lock)."""
+    http_client = slots.get("http")
+    if http_client is None or http_client.is_closed:
+        http_client = slots["http"] = DefaultAsyncHttpxClient(
+            transport=httpx.AsyncHTTPTransport(
+                retries=_TRANSPORT_RETRIES, limits=_HTTP_LIMITS, http2=HTTP2_AVAILABLE
+            ),
+            timeout=_CLIENT_TIMEOUT,
+        )
+    return http_client
+
+def get_async_azure_client() -> Optional[AsyncAzureOpenAI]:
+    """Get the running loop's awaitable Azure OpenAI client if configured."""
+    if not (AZURE_OPENAI_API_KEY and AZURE_OPENAI_ENDPOINT):
+        return None
+    with _async_lock:
+        slots = _loop_async_clients()
+        if slots.get("azure") is not None:
+            return slots["azure"]
+        try:
+            endpoint = _normalize_azure_endpoint(AZURE_OPENAI_ENDPOINT)
+            slots["azure"] = AsyncAzureOpenAI(
+                api_key=AZURE_OPENAI_API_KEY,
+                api_version=AZURE_OPENAI_API_VERSION,
+                azure_endpoint=endpoint,
+                max_retries=_DEFAULT_MAX_RETRIES,
+                timeout=_CLIENT_TIMEOUT,
+                default_headers=_DEFAULT_HEADERS,
+                http_client=_get_shared_async_http_client(slots),
+            )
+            logger.info("Async Azure OpenAI client initialized at %s", endpoint)
+        except Exception as e:
+            logger.error("Failed to initialize async Azure OpenAI client: %s", e)
+        return slots.get("azure")
+
+def get_async_openai_client() -> Optional[AsyncOpenAI]:
+    """Get the running loop's awaitable standard OpenAI client if configured."""
+    if not OPENAI_API_KEY:
+        return None
+    with _async_lock:
+        slots = _loop_async_clients()
+        if slots.get("openai") is not None:
+            return slots["openai"]
+        try:
+            kwargs = {
+                "api_key": OPENAI_API_KEY,
+                "max_retries": _DEFAULT_MAX_RETRIES,
+                "timeout": _CLIENT_TIMEOUT,
+                "default_headers": _DEFAULT_HEADERS,
+                "http_client": _get_shared_async_http_client(slots),
+            }
+            if (OPENAI_BASE_URL or "").strip():
+                kwargs["base_url"] = OPENAI_BASE_URL.strip()
+            slots["openai"] = AsyncOpenAI(**kwargs)
+            logger.info("Async OpenAI client initialized")
+        except Exception as e:
+            logger.error("Failed to initialize async OpenAI client: %s", e)
+        return slots.get("openai")
+
+async def close_async_clients() -> None:
+    """Close the running loop's async connection pool (call before that loop ends)."""
+    with _async_lock:
+        slots = _async_clients.pop(asyncio.get_running_loop(), None)
+    http_client = (slots or {}).get("http")
+    if http_client is not None and not http_client.is_closed:
+        await http_client.aclose()
+
+def prewarm_clients() -> None:
+    """Build configured clients and open a pooled connection so the first request skips TLS setup."""
+    for name, client in (("Azure OpenAI", get_azure_client()), ("OpenAI", get_openai_client())):
+        if client is None:
+            continue
+        try:
+            # Cheap authenticated call; establishes the TLS session in the shared pool
+            client.with_options(timeout=5, max_retries=0).models.list()
+            logger.info("%s client prewarmed", name)
+        except Exception as e:
+            logger.warning("%s client prewarm failed: %s", name, e)
+    logger.info("Pre-resolved %d/%d models", _build_resolution_table(), len(AVAILABLE_MODELS))
+
+def reset_clients() -> None:
+    """Drop cached clients and model resolutions so the next call rebuilds them."""
+    global _azure_client, _openai_client, _provider_cache
+    _provider_cache = None
+    with _azure_lock:
+        _azure_client = None
+    with _openai_lock:
+        _openai_client = None
+    with _async_lock:
+        _async_clients.clear()
+    _resolve_client_for_model.cache_clear()
+    _available_models_cache.clear()
 
 def get_client_for_model(model_key: str, timeout: Optional[int] = None) -> tuple[Any, str, Dict[str, Any]]:
     """Get the appropriate client and resolved model/deployment name with config for a given model key."""
+    client, resolved_name, config_items = _resolve_client_for_model(model_key)
+    # Fresh dict per call: callers are free to mutate their config
+    config = dict(config_items)
+    if timeout:
+        config["timeout"] = timeout
+    return client, resolved_name, config
+
+def get_async_client_for_model(model_key: str, timeout: Optional[int] = None) -> tuple[Any, str, Dict[str, Any]]:
+    """Async counterpart of get_client_for_model: returns an awaitable client, name and config.
+
+    Async clients belong to the running event loop, so this resolves on every call
+    instead of going through the memoized table (the per-loop getters are cheap).
+    """
+    client, resolved_name, config_items = _resolve_route(model_key, use_async=True)
+    config = dict(config_items)
+    if timeout:
+        config["timeout"] = timeout
+    return client, resolved_name, config
+
+def _build_resolution_table() -> int:
+    """Resolve every configured model up front so request-time dispatch is a cache hit.
+
+    Only sync clients are pre-resolved; async ones are bound to whichever event
+    loop later asks for them. Returns the number of models that resolved;
+    unresolvable ones are left to raise their usual error on first use.
+    """
+    resolved = 0
+    for model_key in AVAILABLE_MODELS:
+        try:
+            _resolve_client_for_model(model_key)
+        except RuntimeError as e:
+            logger.debug("Model %s not resolvable at startup: %s", model_key, e)
+        else:
+            resolved += 1
+    return resolved
+
+@lru_cache(maxsize=64)
+def _resolve_client_for_model(model_key: str) -> tuple[Any, str, tuple]:
+    """Resolve (sync client, model/deployment name, frozen default config items); memoized per model."""
+    return _resolve_route(model_key)
+
+def _resolve_route(model_key: str, use_async: bool = False) -> tuple[Any, str, tuple]:
+    """Resolve (client, model/deployment name, frozen default config items) for a model key."""
     model_config = AVAILABLE_MODELS.get(model_key)
 
     if not model_config:
@@ -76,46 +291,67 @@ def get_client_for_model(model_key: str, timeout: Optional[int] = None) -> tuple
 
     # Prepare optimized configuration
     config = {
-        "timeout": timeout or model_config.get("timeout", 40),  # Optimized: reduced from 60
+        "timeout": model_config.get("timeout", 40),  # Optimized: reduced from 60
         "max_completion_tokens": model_config.get("max_completion_tokens", 800),  # Optimized: reduced from 1500
         "temperature": model_config.get("temperature", 0.7)
     }
 
-    if provider == "azure":
-        client = get_azure_client()
-        if not client:
-            # Fallback to OpenAI if Azure not available
-            client = get_openai_client()
-            if client:
-                # Use OpenAI equivalent model
-                resolved_model = model_config.get("model", "gpt-4o-mini")
-                return client, resolved_model, config
-            else:
-                raise RuntimeError("No AI client available")
-
-        deployment = model_config.get("deployment")
-        if not deployment:
-            raise RuntimeError(f"Azure deployment not configured for model {model_key}")
-
-        return client, deployment, config
-
-    elif provider == "openai":
-        client = get_openai_client()
-        if not client:
-            # Fallback to Azure if available
-            client = get_azure_client()
-            if client:
-                # Try to find Azure equivalent
-                deployment = model_config.get("deployment") or DEFAULT_AZURE_DEPLOYMENT
-                if deployment:
-                    return client, deployment, config
-            raise RuntimeError("No OpenAI client available")
-
-        model_name = model_config.get("model", "gpt-4o-mini")
-        return client, model_name, config
-
-    else:
-        raise RuntimeError(f"Unknown provider: {provider}")
+    try:
+        primary_getter, primary_name, fallback_getter, fallback_name, unavailable_error = (
+            (_ASYNC_PROVIDER_HANDLERS if use_async else _PROVIDER_HANDLERS)[provider]
+        )
+    except KeyError:
+        raise RuntimeError(f"Unknown provider: {provider}") from None
+
+    client = primary_getter()
+    if client:
+        return client, primary_name(model_key, model_config), tuple(config.items())
+
+    # Primary provider not available: try the other one with its equivalent name
+    client = fallback_getter()
+    resolved_name = fallback_name(model_key, model_config) if client else None
+    if not resolved_name:
+        raise RuntimeError(unavailable_error)
+    return client, resolved_name, tuple(config.items())
+
+def _azure_deployment_name(model_key: str, model_config: Dict[str, Any]) -> str:
+    deployment = model_config.get("deployment")
+    if not deployment:
+        raise RuntimeError(f"Azure deployment not configured for model {model_key}")
+    return deployment
+
+def _openai_model_name(model_key: str, model_config: Dict[str, Any]) -> str:
+    return model_config.get("model", "gpt-4o-mini")
+
+def _azure_fallback_deployment_name(model_key: str, model_config: Dict[str, Any]) -> Optional[str]:
+    return model_config.get("deployment") or DEFAULT_AZURE_DEPLOYMENT
+
+# provider -> (client getter, name resolver, fallback getter, fallback name resolver,
+#              error raised when neither client is usable)
+_PROVIDER_HANDLERS = {
+    "azure": (
+        get_azure_client, _azure_deployment_name,
+        get_openai_client, _openai_model_name,
+        "No AI client available",
+    ),
+    "openai": (
+        get_openai_client, _openai_model_name,
+        get_azure_client, _azure_fallback_deployment_name,
+        "No OpenAI client available",
+    ),
+}
+_ASYNC_PROVIDER_HANDLERS = {
+    "azure": (
+        get_async_azure_client, _azure_deployment_name,
+        get_async_openai_client, _openai_model_name,
+        "No AI client available",
+    ),
+    "openai": (
+        get_async_openai_client, _openai_model_name,
+        get_async_azure_client, _azure_fallback_deployment_name,
+        "No OpenAI client available",
+    ),
+}
 
 def get_client():
     """Get the default client (for backward compatibility)."""
@@ -124,35 +360,52 @@ def get_client():
 
 def get_provider() -> Optional[str]:
     """Get the current provider type."""
+    global _provider_cache
+    if _provider_cache is not None:
+        return _provider_cache
     if get_azure_client():
-        return "azure"
+        _provider_cache = "azure"
     elif get_openai_client():
-        return "openai"
-    return None
+        _provider_cache = "openai"
+    return _provider_cache
 
+@lru_cache(maxsize=256)
 def resolve_deployment(name: Optional[str]) -> str:
-    """Resolve deployment name for Azure (legacy function)."""
-    n = _clean_env(name).lower()
-    if not n:
+    """Resolve deployment name for Azure (legacy function); pure given the static MODEL_ALIASES."""
+    cleaned = _clean_env(name)
+    if not cleaned:
         return DEFAULT_AZURE_DEPLOYMENT
-    return MODEL_ALIASES.get(n, _clean_env(name))
+    return MODEL_ALIASES.get(cleaned.lower(), cleaned)
 
 def resolve_model(name: Optional[str]) -> str:
-    """Legacy function - resolve model/deployment name."""
+    """Legacy function - resolve model/deployment name.
+
+    Shares get_client_for_model's memoized resolution, so the provider fallback
+    follows which clients actually built (not merely which are configured) and
+    repeat calls never construct anything.
+    """
     if not name:
         return DEFAULT_MODEL
 
-    # Try to find in available models
-    if name in AVAILABLE_MODELS:
-        _, resolved, _ = get_client_for_model(name)
-        return resolved
-
-    # Fallback to old behavior
-    _, resolved, _ = get_client_for_model(DEFAULT_MODEL)
-    return resolved
+    model_key = name if name in AVAILABLE_MODELS else DEFAULT_MODEL
+    return _resolve_client_for_model(model_key)[1]
 
 def get_available_models() -> Dict[str, Dict[str, Any]]:
     """Get list of available models with their configurations."""
+    # Resolve provider clients once rather than per model
+    has_azure = get_azure_client() is not None
+    has_openai = get_openai_client() is not None
+
+    # AVAILABLE_MODELS is static, so the result only changes with provider availability
+    cache_key = (has_azure, has_openai)
+    cached = _available_models_cache.get(cache_key)
+    if cached is None:
+        cached = _build_available_models(has_azure, has_openai)
+        _available_models_cache[cache_key] = cached
+    # Copy the mapping and each (flat) per-model dict so callers can annotate the result freely
+    return {model_key: dict(info) for model_key, info in cached.items()}
+
+def _build_available_models(has_azure: bool, has_openai: bool) -> Dict[str, Dict[str, Any]]:
     available = {}
 
     for model_key, config in AVAILABLE_MODELS.items():
@@ -160,9 +413,9 @@ def get_available_models() -> Dict[str, Dict[str, Any]]:
         is_available = False
 
         if provider == "azure":
-            is_available = bool(get_azure_client() and config.get("deployment"))
+            is_available = bool(has_azure and config.get("deployment"))
         elif provider == "openai":
-            is_available = bool(get_openai_client())
+            is_available = has_openai
 
         if is_available or config.get("deployment"):  # Include if deployment exists
             available[model_key] = {
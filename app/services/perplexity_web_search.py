@@ -2,34 +2,79 @@
 import asyncio
 import logging
 import time
+import copy
 import random
+import threading
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
-from collections import OrderedDict
+from collections import Counter, OrderedDict
 import aiohttp
 import json
 import re
 import os
 import hashlib
-from contextlib import suppress
+import heapq
+import math
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import attrgetter, mul
+from types import MappingProxyType
 from urllib.parse import quote_plus, urlparse, urlunparse, parse_qsl, urlencode
 from bs4 import BeautifulSoup
 import html2text
-from dataclasses import dataclass, field
+try:
+    # selectolax parses with the C lexbor engine, far faster than BeautifulSoup's tree builder
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+try:
+    # trafilatura extracts article bodies on lxml, much faster than html2text's pure-Python rendering
+    import trafilatura
+    TRAFILATURA_AVAILABLE = True
+except ImportError:
+    TRAFILATURA_AVAILABLE = False
+from dataclasses import dataclass, field, replace
 from openai import AsyncOpenAI, AsyncAzureOpenAI
-from app.services.openai_client import get_client, get_client_for_model
+from app.services.openai_client import (
+    get_client, get_client_for_model, get_async_client_for_model, get_async_azure_client,
+    close_async_clients
+)
 from ddgs import DDGS
 # Import get_openai_client from the module or using the local function
 # Enhanced ranking imports
-from rank_bm25 import BM25Okapi
 try:
-    from sklearn.metrics.pairwise import cosine_similarity
+    # orjson decodes Brave's multi-KB JSON payloads several times faster than stdlib json
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+try:
+    # xxh3 hashes short cache keys several times faster than hashlib digests
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+try:
+    # msgpack + zstd shrink search-cache payloads several-fold and decode faster than JSON
+    import msgpack
+    import zstandard
+    MSGPACK_ZSTD_AVAILABLE = True
+except ImportError:
+    MSGPACK_ZSTD_AVAILABLE = False
+try:
+    # aiodns resolves hostnames on the event loop instead of aiohttp's default thread-pool resolver
+    import aiodns  # noqa: F401
+    AIODNS_AVAILABLE = True
+except ImportError:
+    AIODNS_AVAILABLE = False
+try:
     import numpy as np
-    SKLEARN_AVAILABLE = True
+    NUMPY_AVAILABLE = True
 except ImportError:
-    # Fallback cosine similarity implementation
-    SKLEARN_AVAILABLE = False
-    import math
+    # Fallback cosine similarity implementation (pure Python, see _unit_embedding)
+    NUMPY_AVAILABLE = False
 from app.core.config import (
     AZURE_OPENAI_DEPLOYMENT_OSS_120B, 
     AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT,
@@ -46,6 +91,17 @@ from app.core.config import (
 
 logger = logging.getLogger(__name__)
 
+# JSON codec for cache payloads, API bodies and model output; orjson.JSONDecodeError
+# subclasses json.JSONDecodeError, so callers catch the stdlib exception either way
+if ORJSON_AVAILABLE:
+    _json_loads = orjson.loads
+    _json_dumps_bytes = orjson.dumps
+else:
+    _json_loads = json.loads
+
+    def _json_dumps_bytes(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode()
+
 # Enhanced LRU Cache with TTL implementation
 class LRUCacheWithTTL:
     """LRU Cache with TTL support for better memory management."""
@@ -53,60 +109,42 @@ class LRUCacheWithTTL:
     def __init__(self, max_size: int = 100, ttl_seconds: int = 3600):
         self.max_size = max_size
         self.ttl_seconds = ttl_seconds
-        self._cache = OrderedDict()
-        self._timestamps = {}
+        self.ttl_ns = ttl_seconds * 1_000_000_000
+        # key -> (value, expires_at_ns); one map keeps get/put to a single lookup
+        self._cache: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
     
     def get(self, key: str) -> Optional[Any]:
         """Get item from cache if it exists and is not expired."""
-        if key not in self._cache:
+        entry = self._cache.get(key)
+        if entry is None:
             return None
         
-        # Check TTL
-        if self._is_expired(key):
-            self._remove(key)
+        value, expires_at = entry
+        if time.monotonic_ns() >= expires_at:
+            del self._cache[key]
             return None
         
         # Move to end (most recently used)
         self._cache.move_to_end(key)
-        return self._cache[key]
+        return value
     
     def put(self, key: str, value: Any) -> None:
         """Put item in cache, evicting LRU items if necessary."""
-        current_time = datetime.now().timestamp()
-        
-        if key in self._cache:
-            # Update existing item
-            self._cache[key] = value
-            self._timestamps[key] = current_time
-            self._cache.move_to_end(key)
-        else:
-            # Add new item
-            if len(self._cache) >= self.max_size:
-                # Evict LRU item
-                oldest_key = next(iter(self._cache))
-                self._remove(oldest_key)
-            
-            self._cache[key] = value
-            self._timestamps[key] = current_time
-    
-    def _is_expired(self, key: str) -> bool:
-        """Check if cache entry is expired."""
-        if key not in self._timestamps:
-            return True
-        
-        timestamp = self._timestamps[key]
-        return (datetime.now().timestamp() - timestamp) > self.ttl_seconds
-    
-    def _remove(self, key: str) -> None:
-        """Remove item from cache."""
-        self._cache.pop(key, None)
-        self._timestamps.pop(key, None)
+        cache = self._cache
+        if key in cache:
+            cache.move_to_end(key)
+        elif len(cache) >= self.max_size:
+            # Evict LRU item
+            cache.popitem(last=False)
+        
+        cache[key] = (value, time.monotonic_ns() + self.ttl_ns)
     
     def clear_expired(self) -> int:
         """Clear all expired entries and return count of removed items."""
-        expired_keys = [key for key in self._cache if self._is_expired(key)]
+        now = time.monotonic_ns()
+        expired_keys = [key for key, (_, expires_at) in self._cache.items() if now >= expires_at]
         for key in expired_keys:
-            self._remove(key)
+            del self._cache[key]
         return len(expired_keys)
     
     def size(self) -> int:
@@ -116,13 +154,222 @@ class LRUCacheWithTTL:
     def clear(self) -> None:
         """Clear all cache entries."""
         self._cache.clear()
-        self._timestamps.clear()
 
-# Performance optimizations: Enhanced in-memory caches with TTL
-_embeddings_cache = LRUCacheWithTTL(max_size=200, ttl_seconds=3600)  # 1 hour TTL
-_search_cache = LRUCacheWithTTL(max_size=100, ttl_seconds=1800)      # 30 min TTL
+
+class ClockCacheWithTTL:
+    """CLOCK (second-chance) cache with TTL support.
+    
+    Same interface as LRUCacheWithTTL, but a hit only sets a reference bit
+    instead of reordering entries. Eviction sweeps a circular hand, clearing
+    bits until it finds an unreferenced slot. Reads take no lock: each slot
+    holds an immutable (key, value, expires_at_ns) tuple that is checked
+    against the requested key, so a concurrent eviction can never hand back
+    another key's value.
+    """
+    
+    def __init__(self, max_size: int = 100, ttl_seconds: int = 3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.ttl_ns = ttl_seconds * 1_000_000_000
+        self._index: Dict[str, int] = {}
+        self._entries: List[Optional[Tuple[str, Any, int]]] = [None] * max_size
+        self._referenced = bytearray(max_size)
+        self._free_slots = list(range(max_size - 1, -1, -1))
+        self._hand = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get item from cache if it exists and is not expired."""
+        slot = self._index.get(key)
+        if slot is None:
+            return None
+        entry = self._entries[slot]
+        if entry is None or entry[0] != key:
+            return None
+        if time.monotonic_ns() >= entry[2]:
+            with self._lock:
+                self._discard(slot, key)
+            return None
+        self._referenced[slot] = 1
+        return entry[1]
+    
+    def put(self, key: str, value: Any) -> None:
+        """Put item in cache, evicting an unreferenced entry if necessary."""
+        with self._lock:
+            slot = self._index.get(key)
+            if slot is None:
+                slot = self._claim_slot()
+                self._index[key] = slot
+                self._referenced[slot] = 0
+            else:
+                self._referenced[slot] = 1
+            self._entries[slot] = (key, value, time.monotonic_ns() + self.ttl_ns)
+    
+    def _claim_slot(self) -> int:
+        """Return a free slot, advancing the clock hand to evict when full (lock held)."""
+        if self._free_slots:
+            return self._free_slots.pop()
+        while True:
+            slot = self._hand
+            self._hand = (slot + 1) % self.max_size
+            if self._referenced[slot]:
+                self._referenced[slot] = 0  # Second chance
+                continue
+            evicted = self._entries[slot]
+            if evicted is not None:
+                del self._index[evicted[0]]
+            return slot
+    
+    def _discard(self, slot: int, key: str) -> None:
+        """Free a slot if it still holds the given key (lock held)."""
+        entry = self._entries[slot]
+        if entry is not None and entry[0] == key:
+            self._entries[slot] = None
+            self._referenced[slot] = 0
+            del self._index[key]
+            self._free_slots.append(slot)
+    
+    def clear_expired(self) -> int:
+        """Clear all expired entries and return count of removed items."""
+        now = time.monotonic_ns()
+        removed = 0
+        with self._lock:
+            for slot, entry in enumerate(self._entries):
+                if entry is not None and now >= entry[2]:
+                    self._discard(slot, entry[0])
+                    removed += 1
+        return removed
+    
+    def size(self) -> int:
+        """Get current cache size."""
+        return len(self._index)
+    
+    def clear(self) -> None:
+        """Clear all cache entries."""
+        with self._lock:
+            self._index.clear()
+            self._entries = [None] * self.max_size
+            self._referenced = bytearray(self.max_size)
+            self._free_slots = list(range(self.max_size - 1, -1, -1))
+            self._hand = 0
+
+
+class SemanticResponseCache:
+    """Nearest-neighbour cache keyed by unit-normalized query embeddings.
+    
+    Paraphrased queries ("AAPL earnings today" / "AAPL latest earnings") map to
+    nearby embeddings, so a lookup returns the stored value whose query vector
+    has the highest cosine similarity, provided it clears ``threshold`` and was
+    stored under the same bucket. Lookups are one matrix-vector product over
+    the stored vectors, which beats an ANN index at this size. Writers swap in
+    a new immutable snapshot under a lock; readers never lock.
+    """
+    
+    def __init__(self, max_size: int = 100, ttl_seconds: int = 1800, threshold: float = 0.93):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.ttl_ns = ttl_seconds * 1_000_000_000
+        self.threshold = threshold
+        # (matrix of stored vectors, per-row (bucket, value, expires_at_ns))
+        self._snapshot: Tuple[Any, Tuple[Tuple[str, Any, int], ...]] = (None, ())
+        self._lock = threading.Lock()
+    
+    def get(self, bucket: str, vector: Any) -> Optional[Any]:
+        """Return the closest live value in ``bucket``, or None if nothing is similar enough."""
+        matrix, entries = self._snapshot
+        if not entries or matrix.shape[1] != vector.shape[0]:
+            return None
+        similarities = matrix @ vector.astype(np.float32)
+        now = time.monotonic_ns()
+        best_value, best_similarity = None, self.threshold
+        for similarity, (entry_bucket, value, expires_at) in zip(similarities.tolist(), entries):
+            if similarity >= best_similarity and entry_bucket == bucket and now < expires_at:
+                best_value, best_similarity = value, similarity
+        return best_value
+    
+    def put(self, bucket: str, vector: Any, value: Any) -> None:
+        """Store a value, dropping expired entries and then the oldest ones if full."""
+        row = vector.astype(np.float32)
+        with self._lock:
+            matrix, entries = self._snapshot
+            now = time.monotonic_ns()
+            if entries and matrix.shape[1] == row.shape[0]:
+                keep = [i for i, entry in enumerate(entries) if now < entry[2]]
+                if len(keep) >= self.max_size:
+                    keep = keep[len(keep) - self.max_size + 1:]
+            else:
+                keep = []  # Empty, or the embedding model changed dimensions
+            rows = [matrix[keep], row[None, :]] if keep else [row[None, :]]
+            self._snapshot = (
+                np.vstack(rows),
+                tuple(entries[i] for i in keep) + ((bucket, value, now + self.ttl_ns),),
+            )
+    
+    def clear_expired(self) -> int:
+        """Clear all expired entries and return count of removed items."""
+        with self._lock:
+            matrix, entries = self._snapshot
+            now = time.monotonic_ns()
+            keep = [i for i, entry in enumerate(entries) if now < entry[2]]
+            if len(keep) != len(entries):
+                self._snapshot = (matrix[keep], tuple(entries[i] for i in keep)) if keep else (None, ())
+            return len(entries) - len(keep)
+    
+    def size(self) -> int:
+        """Get current cache size."""
+        return len(self._snapshot[1])
+    
+    def clear(self) -> None:
+        """Clear all cache entries."""
+        with self._lock:
+            self._snapshot = (None, ())
+
+
+# High hit-rate caches use CLOCK so concurrent hits never reorder shared state
+_embeddings_cache = ClockCacheWithTTL(max_size=200, ttl_seconds=3600)  # 1 hour TTL
+_search_cache = ClockCacheWithTTL(max_size=100, ttl_seconds=1800)      # 30 min TTL
 _content_cache = LRUCacheWithTTL(max_size=150, ttl_seconds=7200)     # 2 hour TTL
 _query_enhancement_cache = LRUCacheWithTTL(max_size=300, ttl_seconds=1800)  # 30 min TTL for synthesized queries
+_semantic_response_cache = SemanticResponseCache(max_size=100, ttl_seconds=1800, threshold=0.93)
+# BM25 tokens per text, keyed by the text itself so a hash collision can never hand
+# back another document's tokens; insertion-ordered dict evicted FIFO (hits are far
+# more common than inserts)
+_PREPROCESS_CACHE_SIZE = 1024
+_preprocess_cache: Dict[str, List[str]] = {}
+# BM25 scoring runs in worker threads; evict+insert must not interleave
+_preprocess_cache_lock = threading.Lock()
+
+# Numbers and (lowercased) words that paraphrases must share to reuse a response;
+# embeddings alone barely separate "tsla 2023 earnings" from "Ford 2024 earnings"
+_SEMANTIC_CACHE_GUARD_RE = re.compile(r'\d[\w.]*|[^\W\d_]\w*')
+# Words a paraphrase may add, drop or swap without changing what is asked; every
+# other word (tickers, company names, numbers, in any case) must match exactly
+_SEMANTIC_CACHE_GENERIC_WORDS = frozenset({
+    'a', 'an', 'the', 'and', 'or', 'of', 'for', 'in', 'on', 'at', 'to', 'with', 'by', 'about',
+    'is', 'are', 'was', 'were', 'be', 'do', 'does', 'did', 'what', 'how', 'why', 'when',
+    'where', 'which', 'who', 'me', 'tell', 'show', 'give', 'latest', 'recent', 'current',
+    'today', 'now', 'new', 'news', 'update', 'updates', 'stock', 'stocks', 'share', 'shares',
+    'price', 'prices', 'earnings', 'results', 'report', 'outlook', 'forecast', 'analysis',
+    'performance', 'market', 'company', 'quarterly', 'annual'
+})
+
+
+def _semantic_cache_bucket(query: str, max_results: int, synthesize_answer: bool) -> str:
+    """Bucket semantic-cache entries by request shape and the query's guard tokens."""
+    guard_terms = ",".join(sorted(
+        set(_SEMANTIC_CACHE_GUARD_RE.findall(query.lower())) - _SEMANTIC_CACHE_GENERIC_WORDS
+    ))
+    return f"{max_results}|{int(synthesize_answer)}|{guard_terms}"
+
+
+if XXHASH_AVAILABLE:
+    def _hash_key_bytes(data: bytes) -> str:
+        """Hash cache-key bytes (non-cryptographic, in-memory use only)."""
+        return xxhash.xxh3_128_hexdigest(data)
+else:
+    def _hash_key_bytes(data: bytes) -> str:
+        """Hash cache-key bytes (non-cryptographic, in-memory use only)."""
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
 
 
 def _build_search_cache_key(
@@ -131,58 +378,80 @@ def _build_search_cache_key(
     include_recent: bool,
     time_limit: Optional[str]
 ) -> str:
-    """Build a deterministic cache key for search results."""
-    payload = json.dumps(
-        {
-            "query": query,
-            "max_results": max_results,
-            "include_recent": include_recent,
-            "time_limit": time_limit or "",
-        },
-        ensure_ascii=False,
-        sort_keys=True,
-    )
-    return _get_cache_key(f"search::{payload}")
+    """Build a deterministic cache key for search results.
 
+    The query goes last so a ``|`` inside it cannot collide with the fixed fields.
+    """
+    key_bytes = f"search::{max_results}|{int(include_recent)}|{time_limit or ''}|{query}".encode()
+    return _hash_key_bytes(key_bytes)
 
-def _serialize_search_results(results: List["SearchResult"]) -> List[Dict[str, Any]]:
-    """Serialize search results for cache storage (exclude heavy fields)."""
-    serialized: List[Dict[str, Any]] = []
-    for item in results:
-        serialized.append(
-            {
-                "title": item.title,
-                "url": item.url,
-                "snippet": item.snippet,
-                "relevance_score": item.relevance_score,
-                "timestamp": item.timestamp,
-                "source": item.source,
-                "citation_id": item.citation_id,
-            }
-        )
-    return serialized
+
+def _serialize_search_results(results: List["SearchResult"]) -> List[Tuple[Any, ...]]:
+    """Serialize search results for cache storage (exclude heavy fields).
+
+    Entries are positional tuples:
+    (title, url, snippet, relevance_score, timestamp, source, citation_id).
+    """
+    return [
+        (r.title, r.url, r.snippet, r.relevance_score, r.timestamp, r.source, r.citation_id)
+        for r in results
+    ]
 
 
-def _deserialize_search_results(data: Optional[List[Dict[str, Any]]]) -> List["SearchResult"]:
+def _deserialize_search_results(data: Optional[List[Tuple[Any, ...]]]) -> List["SearchResult"]:
     """Deserialize cached search results back into SearchResult objects."""
     if not data:
         return []
 
-    results: List[SearchResult] = []
-    for entry in data:
-        results.append(
-            SearchResult(
-                title=entry.get("title", ""),
-                url=entry.get("url", ""),
-                snippet=entry.get("snippet", ""),
-                relevance_score=entry.get("relevance_score", 0.0),
-                timestamp=entry.get("timestamp", ""),
-                source=entry.get("source", ""),
-                citation_id=entry.get("citation_id", 0),
-            )
-        )
-
-    return results
+    return [
+        _apply_ranking_signals(SearchResult(
+            title=title,
+            url=url,
+            snippet=snippet,
+            relevance_score=relevance_score,
+            timestamp=timestamp,
+            source=source,
+            citation_id=citation_id,
+            url_normalized=True,  # Only deduplicated (normalized) results are cached
+        ))
+        for title, url, snippet, relevance_score, timestamp, source, citation_id in data
+    ]
+
+
+# Leading format byte of packed _search_cache payloads; add a new value to migrate formats
+_SEARCH_PAYLOAD_MSGPACK_ZSTD = b'\x01'
+_SEARCH_PAYLOAD_JSON_ZLIB = b'\x02'
+
+if MSGPACK_ZSTD_AVAILABLE:
+    class _ZstdContexts(threading.local):
+        """Reusable zstd contexts; they are not thread safe, so each thread gets its own pair."""
+
+        def __init__(self):
+            self.compressor = zstandard.ZstdCompressor(level=3)
+            self.decompressor = zstandard.ZstdDecompressor()
+
+    _zstd_contexts = _ZstdContexts()
+
+
+def _pack_search_payload(results: List[Tuple[Any, ...]], enhanced_query: str) -> bytes:
+    """Pack serialized search results and the executed query into a versioned compressed blob."""
+    body = [results, enhanced_query]
+    if MSGPACK_ZSTD_AVAILABLE:
+        packed = msgpack.packb(body, use_bin_type=True)
+        return _SEARCH_PAYLOAD_MSGPACK_ZSTD + _zstd_contexts.compressor.compress(packed)
+    return _SEARCH_PAYLOAD_JSON_ZLIB + zlib.compress(_json_dumps_bytes(body), 1)
+
+
+def _unpack_search_payload(payload: bytes) -> Tuple[List[Tuple[Any, ...]], Optional[str]]:
+    """Inverse of _pack_search_payload; an unknown format byte unpacks to no results."""
+    payload_format, blob = payload[:1], payload[1:]
+    if payload_format == _SEARCH_PAYLOAD_MSGPACK_ZSTD and MSGPACK_ZSTD_AVAILABLE:
+        results, enhanced_query = msgpack.unpackb(_zstd_contexts.decompressor.decompress(blob), raw=False)
+    elif payload_format == _SEARCH_PAYLOAD_JSON_ZLIB:
+        results, enhanced_query = _json_loads(zlib.decompress(blob))
+    else:
+        return [], None
+    return results, enhanced_query
 
 # Domain priors for enhanced ranking precision
 DOMAIN_PRIORS = {
@@ -220,16 +489,101 @@ DOMAIN_PRIORS = {
     }
 }
 
+# Flattened view of DOMAIN_PRIORS: domain -> highest multiplier across categories
+_FLAT_DOMAIN_PRIORS: Dict[str, float] = {}
+for _category_priors in DOMAIN_PRIORS.values():
+    for _domain, _boost in _category_priors.items():
+        _FLAT_DOMAIN_PRIORS[_domain] = max(_boost, _FLAT_DOMAIN_PRIORS.get(_domain, _boost))
+del _category_priors, _domain, _boost
+
+
+def _host_suffixes(host: str):
+    """Yield a host and each parent domain: ``a.b.com``, ``b.com``, ``com``."""
+    label_start = 0
+    while label_start != -1:
+        yield host[label_start:]
+        label_start = host.find('.', label_start)
+        if label_start != -1:
+            label_start += 1
+
+
+@lru_cache(maxsize=4096)
+def _domain_prior_boost(host: str) -> float:
+    """Return the DOMAIN_PRIORS boost for a host, matching it and its parent domains.
+
+    ``news.bbc.com`` is looked up as ``news.bbc.com`` then ``bbc.com``; the
+    boost never drops below 1.0.
+    """
+    boost = 1.0
+    for suffix in _host_suffixes(host):
+        prior = _FLAT_DOMAIN_PRIORS.get(suffix)
+        if prior is not None and prior > boost:
+            boost = prior
+    return boost
+
+
+
+@lru_cache(maxsize=1024)
+def _recency_boost(timestamp: str) -> float:
+    """Year-match recency boost; results from one response share a timestamp string."""
+    if not timestamp:
+        return 1.0
+    if '2024' in timestamp or '2025' in timestamp:
+        return 1.1  # Recent content gets small boost
+    if '2023' in timestamp:
+        return 1.05  # Slightly older content
+    if '2022' in timestamp or '2021' in timestamp or '2020' in timestamp:
+        return 1.0   # Neutral for 2020-2022
+    return 0.95  # Slight penalty for older content
+
+
+def _snippet_title_boost(title: str, snippet: str) -> float:
+    """Boost results whose title and snippet share words (up to 20%) for citation precision."""
+    if not (title and snippet):
+        return 1.0
+    title_words = set(title.lower().split()) - _TITLE_MATCH_STOP_WORDS
+    snippet_words = set(snippet.lower().split()) - _TITLE_MATCH_STOP_WORDS
+    if not (title_words and snippet_words):
+        return 1.0
+    match_ratio = len(title_words & snippet_words) / len(title_words | snippet_words)
+    return 1.0 + (match_ratio * 0.2)
+
+
+def _apply_ranking_signals(result: "SearchResult") -> "SearchResult":
+    """Store domain/recency/snippet-title boosts on a result when it is built.
+
+    The inputs (url, timestamp, title, snippet) are fixed at ingestion, so
+    ranking only reads the stored floats instead of re-parsing strings.
+    """
+    url = result.url
+    result.domain_boost = _domain_prior_boost(_fast_netloc(url)) if url else 1.0
+    result.recency_boost = _recency_boost(result.timestamp)
+    result.snippet_title_boost = _snippet_title_boost(result.title, result.snippet)
+    result.signals_ready = True
+    return result
+
 # Malicious domains denylist for security
-MALICIOUS_DOMAINS = {
+MALICIOUS_DOMAINS = frozenset({
     'malware.com', 'phishing.net', 'spam.org', 'virus.co',
     'badsite.ru', 'malicious.tk', 'trojan.ml', 'scam.site'
-}
+})
+
+
+@lru_cache(maxsize=4096)
+def _is_malicious_host(host: str) -> bool:
+    """Check a host and its parent domains against MALICIOUS_DOMAINS (one set probe per label)."""
+    return any(suffix in MALICIOUS_DOMAINS for suffix in _host_suffixes(host))
 
 # Configuration constants for Brave Search (high-quality source)
 MIN_SEARCH_RESULTS_THRESHOLD = 3  # Minimum results before DDGS fallback
+# DDGS is launched alongside Brave but waits this long first, so the common
+# fast-Brave case cancels it before it issues a request
+DDGS_HEDGE_DELAY_SECONDS = 0.5
 BRAVE_API_BASE_URL = "https://api.search.brave.com/res/v1/web/search"
 BRAVE_QUALITY_BONUS = 0.2  # Quality bonus for Brave results
+# Citations ranked this high on a prior-boosted domain skip NLI verification
+NLI_TRUSTED_MIN_COMBINED_SCORE = 0.9
+NLI_TRUSTED_MIN_DOMAIN_BOOST = 1.2
 
 # Enhanced domain quality assessment with regional and topic-specific scoring
 TRUSTED_FINANCIAL_DOMAINS = {
@@ -298,13 +652,559 @@ UNTRUSTED_DOMAINS = {
     }
 }
 
+# Flattened domain tiers, built once for O(1) membership checks in scoring and filtering
+_TIER1 = frozenset(TRUSTED_FINANCIAL_DOMAINS.get('tier1', ()))
+_TIER2 = frozenset(TRUSTED_FINANCIAL_DOMAINS.get('tier2', ()))
+_TIER3 = frozenset(TRUSTED_FINANCIAL_DOMAINS.get('tier3', ()))
+_ACADEMIC = frozenset(TRUSTED_FINANCIAL_DOMAINS.get('academic', ()))
+_ALL_TRUSTED = frozenset(d for tier in TRUSTED_FINANCIAL_DOMAINS.values() for d in tier)
+_UNTRUSTED_SOCIAL = frozenset(UNTRUSTED_DOMAINS.get('social', ()))
+_UNTRUSTED_CLICKBAIT = frozenset(UNTRUSTED_DOMAINS.get('clickbait', ()))
+_UNTRUSTED_FARMS = frozenset(UNTRUSTED_DOMAINS.get('farms', ()))
+_ALL_UNTRUSTED = frozenset(d for category in UNTRUSTED_DOMAINS.values() for d in category)
+
 # Financial search verticals for enhanced relevance
 FINANCIAL_SEARCH_VERTICALS = {
-    'news': ['earnings', 'financial results', 'market news', 'stock news'],
-    'web': ['analysis', 'forecast', 'prediction', 'outlook', 'research'],
-    'videos': ['earnings call', 'investor presentation', 'conference']
+    'news': ('earnings', 'financial results', 'market news', 'stock news'),
+    'web': ('analysis', 'forecast', 'prediction', 'outlook', 'research'),
+    'videos': ('earnings call', 'investor presentation', 'conference')
 }
 
+# Brave request parameters accepted without triggering 422 validation errors
+BRAVE_VALID_COUNTRIES = frozenset({'US', 'GB', 'CA', 'AU', 'DE', 'FR', 'IT', 'ES', 'JP', 'KR', 'CN', 'ALL'})
+BRAVE_VALID_LANGUAGES = frozenset({'en', 'ja', 'zh', 'ko', 'de', 'fr', 'es', 'it'})
+# DDGS-style time limits mapped to Brave freshness filters
+BRAVE_FRESHNESS_BY_TIME_LIMIT = MappingProxyType({'d': 'pd', 'w': 'pw', 'm': 'pm', 'y': 'py'})
+
+# Hot-path regexes used while parsing search results
+_MULTI_SLASH_RE = re.compile(r'/+')
+# Text cleanup patterns used per result/page
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+# ASCII record separator: whitespace to _NON_WORD_RE and str.split, so it
+# survives cleanup of a joined batch and marks document boundaries
+_DOC_SEPARATOR = '\x1e'
+_WHITESPACE_RUN_RE = re.compile(r'\s+')
+_SPACE_RUN_RE = re.compile(r' +')
+_EXCESS_NEWLINES_RE = re.compile(r'\n\n\n+')
+_CITATION_REF_RE = re.compile(r'\[(\d+)\]')
+_CITATION_MARKER_RE = re.compile(r'\s*\[(\d+)\]\s*')
+# Outermost {...} span in NLI model output that wraps its JSON verdict in prose
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+_JP_TOKEN_RE = re.compile(r'[\u3040-\u30FF\u4E00-\u9FFF]{2,}')
+# Any hiragana, katakana or kanji character
+_JA_SCRIPT_CHAR_RE = re.compile(r'[\u3040-\u30FF\u4E00-\u9FAF]')
+# Query rewriting cleanup (LLM output labels, Japanese request phrasing)
+_LLM_LIST_NUMBER_RE = re.compile(r"^\d+[\).\-]\s*")
+_LLM_QUERY_LABEL_RE = re.compile(
+    r"^(?:optimized|enhanced|refined|rewritten|revised)\s+query\s*[:：\-]\s*", re.IGNORECASE
+)
+_JA_QUERY_ENDINGS = (
+    'してください', 'をお願いします', 'を教えてください', 'について教えて',
+    'を検索してください', 'を調べてください', 'の情報を', 'について',
+    'ください', 'をお願い', 'を教えて', 'を検索', 'を調べ'
+)
+_JA_PARTICLE_RES = tuple(
+    re.compile(rf'{particle}(?=\S)')
+    for particle in ('と', 'の', 'を', 'に', 'で', 'から', 'まで', 'が', 'は', 'も', 'へ')
+)
+_JA_TRAILING_PERIOD_RE = re.compile(r'。$')
+# Characters that need urlparse's handling (fragments, params, IPv6 hosts, stray whitespace)
+_URL_NEEDS_PARSE_RE = re.compile(r'[#;\[\]\t\r\n]')
+# Query strings whose pairs survive a parse_qsl/urlencode round trip byte-for-byte
+_PLAIN_QUERY_RE = re.compile(r'[\w.~+-]+=[\w.~+-]*(?:&[\w.~+-]+=[\w.~+-]*)*', re.ASCII)
+# Query keys stripped from result URLs (any utm_* key is stripped as well)
+_TRACKING_QUERY_KEYS = frozenset({'fbclid', 'gclid', 'msclkid', 'ref', 'ref_src', 'referrer', 'source', 'code'})
+
+
+def _alternation_re(terms, whole_words: bool = False) -> "re.Pattern[str]":
+    """Compile terms into one case-insensitive alternation (optionally whole words only)."""
+    pattern = '|'.join(map(re.escape, terms))
+    if whole_words:
+        pattern = rf'\b(?:{pattern})\b'
+    return re.compile(pattern, re.IGNORECASE)
+
+
+# Query classification terms (substring matches)
+_TIME_SENSITIVE_RE = _alternation_re((
+    'latest', 'recent', 'current', 'today', 'now', 'breaking',
+    'earnings', 'results', 'report', 'news', 'update', 'forecast',
+    '2025', '2024', 'this year', 'this quarter', 'q1', 'q2', 'q3', 'q4'
+))
+_FINANCIAL_RE = _alternation_re((
+    'stock', 'share', 'market', 'financial', 'investment', 'analysis',
+    'earnings', 'revenue', 'profit', 'nasdaq', 'nyse', 'trading', 'price',
+    'forecast', 'prediction', 'valuation', 'dividend', 'portfolio'
+))
+# Words ignored when matching query terms against result content
+_STOP_WORDS = frozenset({'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were'})
+_TITLE_MATCH_STOP_WORDS = _STOP_WORDS | {'a', 'an'}
+# Result relevance filter vocabulary (_is_result_relevant), matched as substrings
+_FINANCIAL_TERMS = (
+    'stock', 'share', 'market', 'financial', 'investment', 'analysis',
+    'earnings', 'revenue', 'profit', 'nasdaq', 'nyse', 'trading', 'price'
+)
+_FINANCIAL_QUERY_MARKERS = _FINANCIAL_TERMS + (
+    'msft', 'tsla', 'aapl', 'googl', 'amzn', 'nvda', 'meta',
+    'microsoft', 'tesla', 'apple', 'google', 'amazon', 'nvidia'
+)
+_FINANCIAL_CONTENT_MARKERS = _FINANCIAL_QUERY_MARKERS + ('chart', 'quote', 'news', 'company', 'business')
+_CLEARLY_IRRELEVANT_PATTERNS = (
+    'recipe', 'cooking', 'food', 'restaurant menu',
+    'movie plot', 'film review', 'celebrity gossip',
+    'game score', 'sports match', 'weather forecast'
+)
+# Content quality/spam indicators for Brave scoring (EN + JA), matched on lowercased text.
+# The lookahead reports every indicator occurrence, including ones overlapping another match.
+_QUALITY_INDICATORS = (
+    # English
+    'analysis', 'report', 'research', 'study', 'data', 'statistics', 'investor relations', 'ir',
+    # Japanese (common finance/corporate terms)
+    '戦略', '経営', '決算', '短信', '発表', '統合報告書', '有価証券報告書', '顧客', '基盤', '成長', 'IR', '投資家', '方針'
+)
+# Each distinct indicator found adds its bonus once per listing ('ir' and 'IR' both apply)
+_QUALITY_INDICATOR_WEIGHTS = Counter(term.lower() for term in _QUALITY_INDICATORS)
+_QUALITY_INDICATOR_RE = re.compile(
+    '(?=(' + '|'.join(map(re.escape, _QUALITY_INDICATOR_WEIGHTS)) + '))'
+)
+_SCORE_SPAM_RE = re.compile(
+    '(?=(' + '|'.join(map(re.escape, ('click here', 'buy now', 'free trial', 'limited time'))) + '))'
+)
+_SPAM_PATTERN_RE = _alternation_re((
+    'click here', 'buy now', 'free trial', 'limited time offer',
+    'act now', 'call now', 'order today', '100% free',
+    'no credit card', 'risk free', 'money back guarantee',
+    'amazing results', 'miracle cure', 'secret revealed'
+))
+# Latin-script language hints for _detect_language (whole words only)
+_DE_HINT_RE = _alternation_re(('der', 'die', 'das', 'und', 'ich', 'ist', 'mit', 'nicht', 'sie', 'auch', 'auf'), whole_words=True)
+_FR_HINT_RE = _alternation_re(('le', 'la', 'les', 'et', 'un', 'une', 'est', 'sont', 'dans', 'pour', 'avec'), whole_words=True)
+_ES_HINT_RE = _alternation_re(('el', 'la', 'los', 'las', 'y', 'un', 'una', 'es', 'son', 'está', 'están'), whole_words=True)
+_IT_HINT_RE = _alternation_re(('il', 'la', 'i', 'le', 'di', 'che', 'è', 'sono', 'per', 'con', 'da'), whole_words=True)
+# English finance vocabulary that vetoes a French/Spanish/Italian guess
+_EN_FINANCE_HINT_RE = _alternation_re(('stock', 'price', 'company', 'market', 'analysis', 'financial'), whole_words=True)
+
+# Common Japanese kanji that do not count towards a Chinese classification
+_JP_COMMON_KANJI = frozenset('\u4E00\u4E01\u4E03\u4E07\u4E08\u4E09\u4E0A\u4E0B\u4E0D\u4E0E\u4E10')
+
+
+# Texts longer than this are bucketed with NumPy instead of a Python loop
+_SCRIPT_VECTORIZE_MIN_CHARS = 128
+if NUMPY_AVAILABLE:
+    # Half-open code point ranges [bound_i, bound_i+1); searchsorted(side='right') maps a
+    # code point to its range index, _SCRIPT_LABELS maps the index to a script bucket:
+    # 0 other, 1 kana, 2 kanji, 3 hangul, 4 arabic, 5 cyrillic, 6 thai
+    _SCRIPT_BOUNDS = np.array(
+        [0x0400, 0x0500, 0x0600, 0x0700, 0x0E00, 0x0E80, 0x1100, 0x1200,
+         0x3040, 0x3100, 0x4E00, 0x9FB0, 0xAC00, 0xD7B0],
+        dtype=np.uint32,
+    )
+    _SCRIPT_LABELS = np.array([0, 5, 0, 4, 0, 6, 0, 3, 0, 1, 0, 2, 0, 3, 0], dtype=np.intp)
+
+
+def _count_script_chars_numpy(text: str) -> Tuple[int, int, int, int, int, int]:
+    """Vectorized ``_count_script_chars``: bucket every code point in one C pass."""
+    codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    buckets = _SCRIPT_LABELS[np.searchsorted(_SCRIPT_BOUNDS, codes, side='right')]
+    kana, kanji, ko, ar, cy, th = (int(c) for c in np.bincount(buckets, minlength=7)[1:])
+    common_kanji = sum(map(text.count, _JP_COMMON_KANJI)) if kanji else 0
+    return kana + kanji, kanji - common_kanji, ko, ar, cy, th
+
+
+def _count_script_chars(text: str) -> Tuple[int, int, int, int, int, int]:
+    """Count (japanese, chinese, korean, arabic, cyrillic, thai) characters in one pass.
+
+    Kanji count towards both Japanese and Chinese, except the common Japanese
+    ones in ``_JP_COMMON_KANJI`` which only count as Japanese.
+    """
+    if NUMPY_AVAILABLE and len(text) > _SCRIPT_VECTORIZE_MIN_CHARS:
+        return _count_script_chars_numpy(text)
+    ja = zh = ko = ar = cy = th = 0
+    for ch in text:
+        o = ord(ch)
+        if o < 0x0400:
+            continue
+        if 0x3040 <= o <= 0x30FF:  # Hiragana and Katakana
+            ja += 1
+        elif 0x4E00 <= o <= 0x9FAF:  # CJK Unified Ideographs
+            ja += 1
+            if ch not in _JP_COMMON_KANJI:
+                zh += 1
+        elif 0xAC00 <= o <= 0xD7AF or 0x1100 <= o <= 0x11FF:  # Hangul syllables and Jamo
+            ko += 1
+        elif 0x0600 <= o <= 0x06FF:
+            ar += 1
+        elif 0x0400 <= o <= 0x04FF:
+            cy += 1
+        elif 0x0E00 <= o <= 0x0E7F:
+            th += 1
+    return ja, zh, ko, ar, cy, th
+
+
+def _detect_language_uncached(text: str) -> str:
+    """Improved language detection with better thresholds and more language support."""
+    if not text:
+        return 'en'
+
+    if not text.isascii():
+        # Non-ASCII text: decide by script density first
+        text_len = len(text)
+        japanese_chars, chinese_chars, korean_chars, arabic_chars, cyrillic_chars, thai_chars = (
+            _count_script_chars(text)
+        )
+
+        # Calculate ratios with better thresholds
+        japanese_ratio = japanese_chars / text_len
+        chinese_ratio = chinese_chars / text_len
+        korean_ratio = korean_chars / text_len
+        arabic_ratio = arabic_chars / text_len
+        cyrillic_ratio = cyrillic_chars / text_len
+        thai_ratio = thai_chars / text_len
+
+        # Use higher thresholds to avoid false positives
+        # A text needs at least 5% of characters from a script to be considered that language
+        min_threshold = 0.05
+
+        # Prioritize detection based on character density
+        if japanese_ratio > min_threshold and japanese_ratio >= chinese_ratio:
+            return 'ja'
+        elif korean_ratio > min_threshold:
+            return 'ko'
+        elif chinese_ratio > min_threshold and chinese_ratio > japanese_ratio:
+            return 'zh'
+        elif arabic_ratio > min_threshold:
+            return 'ar'
+        elif cyrillic_ratio > min_threshold:
+            return 'ru'
+        elif thai_ratio > min_threshold:
+            return 'th'
+
+    # Fallback: check for common language indicators in Latin script (whole words only)
+    if _DE_HINT_RE.search(text):
+        return 'de'
+    elif _FR_HINT_RE.search(text):
+        # Avoid false positive from English "analysis" containing "al"
+        if not _EN_FINANCE_HINT_RE.search(text):
+            return 'fr'
+    elif _ES_HINT_RE.search(text):
+        # Avoid false positive from English words containing Spanish words
+        if not _EN_FINANCE_HINT_RE.search(text):
+            return 'es'
+    elif _IT_HINT_RE.search(text):
+        if not _EN_FINANCE_HINT_RE.search(text):
+            return 'it'
+
+    # Default to English
+    return 'en'
+
+
+# Texts up to this length go through the detection cache
+_LANGUAGE_CACHE_MAX_CHARS = 256
+_detect_language_cached = lru_cache(maxsize=2048)(_detect_language_uncached)
+
+
+@lru_cache(maxsize=256)
+def _relevance_query_profile(query: str) -> Tuple[Tuple[str, ...], bool]:
+    """Query-side inputs of _is_result_relevant, computed once per query rather than per result.
+    
+    Returns the query words long enough to count as a basic match and whether
+    the query looks financial.
+    """
+    query_lower = query.lower()
+    query_words = tuple(word for word in set(query_lower.split()) if len(word) > 2)
+    is_financial_query = any(marker in query_lower for marker in _FINANCIAL_QUERY_MARKERS)
+    return query_words, is_financial_query
+
+
+@lru_cache(maxsize=2048)
+def _optimal_ddgs_region(query: str) -> str:
+    """Determine optimal DDGS region based on query characteristics (memoized per query)."""
+    # Check if query contains Japanese characters
+    has_japanese = _JA_SCRIPT_CHAR_RE.search(query) is not None
+    
+    # Check for explicit region indicators
+    query_lower = query.lower()
+    
+    if has_japanese or 'japan' in query_lower or 'japanese' in query_lower or '日本' in query:
+        return 'jp-jp'  # Japan
+    elif 'china' in query_lower or 'chinese' in query_lower or '中国' in query:
+        return 'cn-zh'  # China
+    elif 'korea' in query_lower or 'korean' in query_lower or '韓国' in query:
+        return 'kr-kr'  # Korea
+    elif 'europe' in query_lower or 'european' in query_lower:
+        return 'eu-en'  # Europe
+    elif 'usa' in query_lower or 'america' in query_lower or 'us ' in query_lower:
+        return 'us-en'  # United States
+    
+    # Default to configured region or Japan (your primary market)
+    return DDGS_REGION or 'jp-jp'
+
+
+def _fast_split_url(url: str) -> Optional[Tuple[str, str, str, str]]:
+    """Split ``scheme://netloc/path?query`` with ``str.find``.
+
+    Returns ``(scheme, netloc, path, query)`` matching ``urlparse`` for the
+    common URL shape, or ``None`` when the URL needs the full parser.
+    """
+    if not url.isascii() or _URL_NEEDS_PARSE_RE.search(url):
+        return None
+    scheme_end = url.find('://')
+    if scheme_end == -1:
+        return None
+    netloc_start = scheme_end + 3
+    query_start = url.find('?', netloc_start)
+    path_end = len(url) if query_start == -1 else query_start
+    path_start = url.find('/', netloc_start, path_end)
+    if path_start == -1:
+        path_start = path_end
+    query = '' if query_start == -1 else url[query_start + 1:]
+    return url[:scheme_end], url[netloc_start:path_start], url[path_start:path_end], query
+
+
+def _strip_tracking_params(query: str) -> str:
+    """Drop blank and tracking (utm_*, fbclid, ...) parameters from a query string."""
+    if not query:
+        return ''
+    if _PLAIN_QUERY_RE.fullmatch(query):
+        # Plain pairs: filter the raw ``k=v`` parts without decoding/re-encoding them
+        kept = []
+        for part in query.split('&'):
+            key, _, value = part.partition('=')
+            lk = key.lower()
+            if not value or lk.startswith('utm_') or lk in _TRACKING_QUERY_KEYS:
+                continue
+            kept.append(part)
+        return '&'.join(kept)
+    query_items = [
+        (k, v) for k, v in parse_qsl(query, keep_blank_values=False)
+        if not k.lower().startswith('utm_') and k.lower() not in _TRACKING_QUERY_KEYS
+    ]
+    return urlencode(query_items, doseq=True) if query_items else ''
+
+
+def _fast_netloc(url: str) -> str:
+    """Return the lowercased netloc of an absolute URL using string search only."""
+    start = url.find('://')
+    if start == -1:
+        return urlparse(url).netloc.lower()
+    start += 3
+    end = len(url)
+    for sep in '/?#':
+        sep_index = url.find(sep, start, end)
+        if sep_index != -1:
+            end = sep_index
+    return url[start:end].lower()
+
+
+@lru_cache(maxsize=4096)
+def _normalize_url_cached(url: str) -> str:
+    """Normalize URLs for consistent citation & deduplication.
+    - Ensure scheme (default https)
+    - Collapse multiple slashes in path
+    - Remove default ports (:80, :443)
+    - Strip tracking query params (utm_*, fbclid, gclid, msclkid, ref, ref_src, referrer, source, code)
+    - Remove trailing slash (except root)
+    - Lowercase hostname
+    """
+    if not url:
+        return ""
+    url = url.strip()
+    if url.startswith('//'):
+        url = 'https:' + url
+    if not url.lower().startswith(('http://', 'https://')):
+        url = 'https://' + url  # assume https for bare domains
+    try:
+        parts = _fast_split_url(url)
+        if parts is None:
+            parsed = urlparse(url)
+            parts = (parsed.scheme, parsed.netloc, parsed.path, parsed.query)
+        raw_scheme, raw_netloc, path, query = parts
+        scheme = raw_scheme.lower() if raw_scheme else 'https'
+        # Prefer https when original was http (heuristic): upgrade unless localhost or internal
+        if scheme == 'http' and not raw_netloc.startswith(('localhost', '127.0.0.1')):
+            scheme = 'https'
+        netloc = raw_netloc.lower()
+        # Remove default ports
+        if netloc.endswith(':80'):
+            netloc = netloc[:-3]
+        elif netloc.endswith(':443'):
+            netloc = netloc[:-4]
+        # Collapse duplicate slashes in path
+        path = path or '/'
+        if '//' in path:
+            path = _MULTI_SLASH_RE.sub('/', path)
+        if path != '/' and path.endswith('/'):
+            path = path[:-1]
+        # Clean query params (tracking keys and utm_*)
+        query = _strip_tracking_params(query)
+        return ''.join((scheme, '://', netloc, path, '?' if query else '', query))
+    except Exception:
+        return url  # fallback to original
+
+
+@lru_cache(maxsize=4096)
+def _normalize_result_url_cached(url: str) -> str:
+    """Normalize a result URL for deduplication; unlike _normalize_url_cached the scheme is kept."""
+    normalized = url.strip()
+    if normalized.startswith("//"):
+        normalized = "https:" + normalized
+    if not normalized.lower().startswith(("http://", "https://")):
+        normalized = "https://" + normalized
+    try:
+        parts = _fast_split_url(normalized)
+        if parts is None:
+            parsed = urlparse(normalized)
+            parts = (parsed.scheme, parsed.netloc, parsed.path, parsed.query)
+        raw_scheme, raw_netloc, path, query = parts
+        scheme = raw_scheme.lower() if raw_scheme else "https"
+        netloc = raw_netloc.lower()
+        if netloc.endswith(":80"):
+            netloc = netloc[:-3]
+        elif netloc.endswith(":443"):
+            netloc = netloc[:-4]
+        path = path or "/"
+        if "//" in path:
+            path = _MULTI_SLASH_RE.sub("/", path)
+        if path != "/" and path.endswith("/"):
+            path = path[:-1]
+        if path[0] != "/":
+            path = "/" + path
+        # Most result URLs carry no query string; skip parse_qsl/urlencode for them
+        query_str = _strip_tracking_params(query) if query else ""
+        # Same string urlunparse builds for an http(s) URL, without its per-call argument coercion
+        return "".join((scheme, "://", netloc, path, "?" if query_str else "", query_str))
+    except Exception:
+        return normalized
+
+
+# Brave (country, search language) locales, highest priority first
+_LOCALE_PRIORITY = (
+    ('JP', 'ja'), ('CN', 'zh'), ('KR', 'ko'), ('DE', 'de'), ('FR', 'fr'),
+    ('ES', 'es'), ('IT', 'it'),
+    ('GB', 'en'),  # Use UK for European financial markets
+    ('US', 'en'),
+)
+_LOCALE_RANK = MappingProxyType({locale: rank for rank, locale in enumerate(_LOCALE_PRIORITY)})
+# Detected query language -> locale
+_LANG_TO_LOCALE = MappingProxyType({lang: (country, lang) for country, lang in _LOCALE_PRIORITY if lang != 'en'})
+# Hint words (matched as substrings of the lowercased query) -> locale
+_LOCALE_HINTS = MappingProxyType({
+    'japan': ('JP', 'ja'), '日本': ('JP', 'ja'),
+    'china': ('CN', 'zh'), '中国': ('CN', 'zh'),
+    'korea': ('KR', 'ko'), '韓国': ('KR', 'ko'),
+    'germany': ('DE', 'de'), 'deutsch': ('DE', 'de'), 'deutschland': ('DE', 'de'),
+    'france': ('FR', 'fr'), 'français': ('FR', 'fr'), 'french': ('FR', 'fr'),
+    'spain': ('ES', 'es'), 'español': ('ES', 'es'), 'spanish': ('ES', 'es'),
+    'italy': ('IT', 'it'), 'italian': ('IT', 'it'), 'italiano': ('IT', 'it'),
+    'europe': ('GB', 'en'), 'eu': ('GB', 'en'), 'european': ('GB', 'en'),
+    'nasdaq': ('US', 'en'), 'nyse': ('US', 'en'), 'usa': ('US', 'en'), 'america': ('US', 'en'),
+})
+# Lookahead so hints nested inside other hints (e.g. 'eu' in 'deutsch') are all reported
+_LOCALE_HINT_RE = re.compile('(?=(' + '|'.join(map(re.escape, _LOCALE_HINTS)) + '))')
+
+# Page elements stripped before locating the main content block
+_UNWANTED_HTML_TAGS = (
+    'script', 'style', 'nav', 'footer', 'header', 'aside', 'ads',
+    'noscript', 'iframe', 'embed', 'object', 'form', 'input',
+    'button', 'select', 'textarea', 'label', 'fieldset',
+)
+_UNWANTED_HTML_CLASSES = (
+    '.advertisement', '.ad', '.ads', '.sidebar', '.menu',
+    '.navigation', '.navbar', '.breadcrumb', '.pagination',
+    '.social', '.share', '.comment', '.related', '.popular',
+)
+# Main-content selectors with their base scores
+_CONTENT_SELECTORS = (
+    ('main', 10),
+    ('article', 9),
+    ('[role="main"]', 8),
+    ('.main-content', 7),
+    ('.content', 6),
+    ('#content', 6),
+    ('.entry-content', 5),
+    ('.post-content', 5),
+    ('.article-content', 5),
+    ('.text-content', 4),
+    ('.body-content', 4),
+)
+
+# Content fetches stream at most this much HTML; article text sits well inside it,
+# and huge pages (inline scripts, comment threads) stop downloading at the cap
+_CONTENT_FETCH_MAX_BYTES = 512 * 1024
+_CONTENT_FETCH_CHUNK_BYTES = 64 * 1024
+
+# Keep-alive connection pools shared by every Brave and content-fetch session,
+# one per event loop (aiohttp connectors are bound to the loop that created them)
+_shared_connectors: Dict[asyncio.AbstractEventLoop, aiohttp.TCPConnector] = {}
+
+
+def _get_shared_connector() -> aiohttp.TCPConnector:
+    """Return the running loop's shared TCPConnector, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    connector = _shared_connectors.get(loop)
+    if connector is None or connector.closed:
+        # Forget pools left behind by loops that have since been closed
+        for stale_loop in [l for l in _shared_connectors if l.is_closed()]:
+            del _shared_connectors[stale_loop]
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=10,
+            ttl_dns_cache=300,
+            use_dns_cache=True,
+            # Below common server idle timeouts, so pooled sockets are rarely reused after the peer closed them
+            keepalive_timeout=30,
+            enable_cleanup_closed=True,
+            resolver=aiohttp.AsyncResolver() if AIODNS_AVAILABLE else None
+        )
+        _shared_connectors[loop] = connector
+    return connector
+
+
+async def close_shared_connector() -> None:
+    """Close the running loop's shared TCPConnector, if one was created."""
+    connector = _shared_connectors.pop(asyncio.get_running_loop(), None)
+    if connector is not None and not connector.closed:
+        await connector.close()
+
+
+# Blocking DDGS calls run on their own small pool so they never queue behind
+# (or starve) other work on the loop's default executor
+_DDGS_MAX_WORKERS = 4
+_ddgs_executor: Optional[ThreadPoolExecutor] = None
+_ddgs_executor_lock = threading.Lock()
+
+
+def _get_ddgs_executor() -> ThreadPoolExecutor:
+    """Return the shared DDGS thread pool, creating it on first use."""
+    global _ddgs_executor
+    with _ddgs_executor_lock:
+        if _ddgs_executor is None:
+            _ddgs_executor = ThreadPoolExecutor(max_workers=_DDGS_MAX_WORKERS, thread_name_prefix="ddgs")
+        return _ddgs_executor
+
+
+def shutdown_ddgs_executor() -> None:
+    """Shut down the DDGS thread pool without waiting for in-flight searches."""
+    global _ddgs_executor
+    with _ddgs_executor_lock:
+        executor, _ddgs_executor = _ddgs_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+@dataclass(frozen=True, slots=True)
+class _QueryCtx:
+    """Per-query values shared by every result scored or filtered for that query."""
+    query: str
+    lower: str
+    words: frozenset
+    is_non_ascii: bool
+
+    @classmethod
+    def from_query(cls, query: str) -> "_QueryCtx":
+        lower = query.lower()
+        return cls(query=query, lower=lower, words=frozenset(lower.split()), is_non_ascii=not query.isascii())
+
+
 class BraveSearchClient:
     """High-quality Brave Search API client for enhanced search results with proper lifecycle management."""
     
@@ -327,9 +1227,25 @@ class BraveSearchClient:
         # Rate limiting for Brave free tier (1 query/second)
         self._last_request_time = 0.0
         self._min_request_interval = 1.0  # 1 second between requests
-        self._rate_lock = asyncio.Lock()  # Add lock for thread-safe rate limiting
+        self._rate_lock = asyncio.Lock()  # Guards slot reservation only
         self._closed = False
     
+    async def _wait_for_request_slot(self) -> None:
+        """Reserve the next free request slot, then sleep until it starts.
+
+        Only the timestamp check/advance happens under ``_rate_lock``; the
+        sleep runs outside it, so concurrent callers each claim consecutive
+        slots instead of queueing behind one another's waits.
+        """
+        async with self._rate_lock:
+            now = time.monotonic()
+            sleep_time = max(0.0, self._last_request_time + self._min_request_interval - now)
+            self._last_request_time = now + sleep_time
+
+        if sleep_time > 0:
+            logger.debug(f"Brave rate limiting: waiting {sleep_time:.2f}s")
+            await asyncio.sleep(sleep_time)
+
     async def __aenter__(self):
         """Async context manager entry."""
         return self
@@ -354,21 +1270,19 @@ class BraveSearchClient:
             return None
             
         if self._session is None or self._session.closed:
-            connector = aiohttp.TCPConnector(
-                limit=5, 
-                limit_per_host=3,
-                ttl_dns_cache=300,
-                use_dns_cache=True,
-                force_close=True,
-                enable_cleanup_closed=True
-            )
             self._session = aiohttp.ClientSession(
                 timeout=self.timeout,
                 headers=self.headers,
-                connector=connector
+                connector=_get_shared_connector(),
+                connector_owner=False
             )
         return self._session
     
+    @staticmethod
+    async def _read_json(response: aiohttp.ClientResponse) -> Any:
+        """Read and decode a JSON response body."""
+        return _json_loads(await response.read())
+    
     async def search(
         self, 
         query: str, 
@@ -396,22 +1310,8 @@ class BraveSearchClient:
         if not session:
             return []
         
-        # Validate and sanitize parameters to avoid 422 errors
-        valid_countries = {'US', 'GB', 'CA', 'AU', 'DE', 'FR', 'IT', 'ES', 'JP', 'KR', 'CN', 'ALL'}
-        valid_freshness = {'pd', 'pw', 'pm', 'py'}
-        valid_languages = {'en', 'ja', 'zh', 'ko', 'de', 'fr', 'es', 'it'}
         try:
-            # Thread-safe rate limiting
-            async with self._rate_lock:
-                current_time = time.time()
-                time_since_last_request = current_time - self._last_request_time
-                
-                if time_since_last_request < self._min_request_interval:
-                    sleep_time = self._min_request_interval - time_since_last_request
-                    logger.debug(f"Brave rate limiting: waiting {sleep_time:.2f}s")
-                    await asyncio.sleep(sleep_time)
-                
-                self._last_request_time = time.time()
+            await self._wait_for_request_slot()
             
             # Determine optimal locale (country + language) for the query
             try:
@@ -427,30 +1327,19 @@ class BraveSearchClient:
                 'safesearch': 'moderate'
             }
 
-            # Add country parameter if specified and valid
-            if locale_country and locale_country != "ALL" and locale_country in valid_countries:
+            # Add country parameter if specified and valid (avoids 422 errors)
+            if locale_country and locale_country != "ALL" and locale_country in BRAVE_VALID_COUNTRIES:
                 params['country'] = locale_country
 
             # Add language hints for Brave to improve non-English results
-            if locale_lang and locale_lang in valid_languages:
-                # Normalize and map UI language to region-specific where useful
-                ui_lang_map = {
-                    'ja': 'ja-JP',
-                    'zh': 'zh-CN',
-                    'ko': 'ko-KR',
-                    'en': 'en-US',
-                    'de': 'de-DE',
-                    'fr': 'fr-FR',
-                    'es': 'es-ES',
-                    'it': 'it-IT'
-                }
+            if locale_lang and locale_lang in BRAVE_VALID_LANGUAGES:
                 # search_lang expects ISO 639-1; ensure 'ja' for Japanese
                 search_lang = 'ja' if locale_lang in ('ja', 'jp') else locale_lang
                 params['search_lang'] = search_lang
                 # Avoid sending ui_lang to reduce validation errors; rely on Accept-Language header instead
 
             # If the query is clearly Japanese, force JP/JA parameters (ensure 'ja' not 'jp')
-            if any(ord(c) > 127 for c in query):
+            if not query.isascii():
                 params['country'] = 'JP'
                 # Brave expects ISO 639-1 language code; use 'ja' for Japanese
                 params['search_lang'] = 'ja'
@@ -462,187 +1351,65 @@ class BraveSearchClient:
             
             logger.debug(f"Brave Search query: '{query}' with params: {params}")
             
-            async with session.get(self.base_url, params=params) as response:
-                logger.debug(f"Brave Search response: {response.status}")
-                
-                if response.status == 200:
-                    try:
-                        data = await response.json()
-                        # Quick diagnostic: log available top-level keys and results count
-                        if isinstance(data, dict):
-                            web_info = data.get('web')
-                            results_count = len(web_info.get('results', [])) if isinstance(web_info, dict) and isinstance(web_info.get('results'), list) else 0
-                            logger.debug(f"Brave payload keys: {list(data.keys())}; web.results: {results_count}")
-                        
-                        # Schema validation: Check for required fields
-                        if not isinstance(data, dict):
-                            logger.warning("Brave API returned non-dict response")
-                            return []
-                        
-                        web_data = data.get('web')
-                        if not isinstance(web_data, dict):
-                            logger.warning("Brave API response missing 'web' field")
-                            return []
-                        
-                        results_data = web_data.get('results')
-                        if not isinstance(results_data, list):
-                            logger.warning("Brave API response missing 'web.results' list")
-                            return []
-                        
-                        raw_results = self._parse_brave_results(data, query)
-                        
-                        # If Brave returned 200 but zero results, try a fallback query without locale hints
-                        if not raw_results:
-                            logger.info("Brave 200 OK but 0 results; retrying without locale/language hints")
-                            minimal_params = {
-                                'q': query,
-                                'count': min(count, 10),
-                                'safesearch': 'moderate'
-                            }
-                            # Gentle backoff before retrying
-                            await asyncio.sleep(self._min_request_interval + 0.2)
-                            async with session.get(self.base_url, params=minimal_params) as retry_response:
-                                if retry_response.status == 200:
-                                    try:
-                                        data2 = await retry_response.json()
-                                        raw_results = self._parse_brave_results(data2, query)
-                                    except Exception as e:
-                                        logger.debug(f"Fallback parse after 0-results failed: {e}")
-                                        raw_results = []
-                        
-                        # Apply post-retrieval quality filtering and reranking
-                        quality_results = self._apply_quality_filtering(raw_results, query)
-                        reranked_results = self._rerank_by_quality(quality_results, query)
-                        
-                        logger.info(f"Brave Search: {len(raw_results)} raw → {len(quality_results)} filtered → {len(reranked_results)} final")
-                        return reranked_results
-                        
-                    except json.JSONDecodeError as e:
-                        logger.warning(f"Brave Search API JSON decode error: {e}")
-                        return []
-                    except Exception as e:
-                        logger.warning(f"Brave Search API response parsing error: {e}")
-                        return []
-                
-                elif response.status == 422:
-                    # Handle parameter validation errors by retrying with relaxed params
-                    logger.warning("Brave Search API parameter validation error (422), retrying with relaxed params")
-                    
-                    # Retry with minimal parameters
-                    minimal_params = {
-                        'q': query,
-                        'count': min(count, 10),  # Reduce count
-                        'safesearch': 'moderate'
-                    }
-                    # Respect rate limiting before retry
-                    await asyncio.sleep(self._min_request_interval + 0.2)
-                    async with session.get(self.base_url, params=minimal_params) as retry_response:
-                        if retry_response.status == 200:
-                            try:
-                                data = await retry_response.json()
-                                raw_results = self._parse_brave_results(data, query)
-                                quality_results = self._apply_quality_filtering(raw_results, query)
-                                reranked_results = self._rerank_by_quality(quality_results, query)
-                                logger.info(f"Brave Search retry: {len(reranked_results)} results")
-                                return reranked_results
-                            except Exception as e:
-                                logger.warning(f"Brave Search retry also failed: {e}")
-                                return []
-                        elif retry_response.status == 429:
-                            # Wait and make one final retry attempt
-                            logger.warning("Brave Search retry hit rate limit (429); backing off and retrying once")
-                            await asyncio.sleep(self._min_request_interval + 0.8)
-                            async with session.get(self.base_url, params=minimal_params) as retry2:
-                                if retry2.status == 200:
-                                    try:
-                                        data = await retry2.json()
-                                        raw_results = self._parse_brave_results(data, query)
-                                        quality_results = self._apply_quality_filtering(raw_results, query)
-                                        reranked_results = self._rerank_by_quality(quality_results, query)
-                                        logger.info(f"Brave Search second retry: {len(reranked_results)} results")
-                                        return reranked_results
-                                    except Exception as e:
-                                        logger.warning(f"Brave Search second retry parse failed: {e}")
-                                else:
-                                    logger.warning(f"Brave Search second retry failed with status: {retry2.status}")
-                        else:
-                            logger.warning(f"Brave Search retry failed with status: {retry_response.status}")
-                            return []
-                
-                elif response.status == 401:
-                    logger.warning("Brave Search API unauthorized (401) - check API key")
-                    return []
-                elif response.status == 403:
-                    logger.warning("Brave Search API forbidden (403) - subscription token or plan issue")
-                    return []
-                elif response.status == 429:
-                    logger.warning("Brave Search API rate limit exceeded; waiting before one retry")
+            # Relaxed parameters for retries after validation errors or empty results
+            minimal_params = {
+                'q': query,
+                'count': min(count, 10),
+                'safesearch': 'moderate'
+            }
+            
+            status, raw_results = await self._fetch_results(session, params, query)
+            
+            if status == 200 and raw_results == []:
+                # Brave returned 200 but zero results; retry without locale/language hints
+                logger.info("Brave 200 OK but 0 results; retrying without locale/language hints")
+                await asyncio.sleep(self._min_request_interval + 0.2)
+                status, raw_results = await self._fetch_results(session, minimal_params, query)
+            elif status == 422:
+                # Handle parameter validation errors by retrying with relaxed params
+                logger.warning("Brave Search API parameter validation error (422), retrying with relaxed params")
+                await asyncio.sleep(self._min_request_interval + 0.2)
+                status, raw_results = await self._fetch_results(session, minimal_params, query)
+                if status == 429:
+                    logger.warning("Brave Search retry hit rate limit (429); backing off and retrying once")
                     await asyncio.sleep(self._min_request_interval + 0.8)
+                    status, raw_results = await self._fetch_results(session, minimal_params, query)
+            elif status == 429:
+                logger.warning("Brave Search API rate limit exceeded; waiting before one retry")
+                await asyncio.sleep(self._min_request_interval + 0.8)
+                status, raw_results = await self._fetch_results(session, params, query)
+            elif status >= 500:
+                # Handle server errors with exponential backoff with jitter (max 2 retries)
+                logger.warning(f"Brave Search API server error: {status}, implementing retry...")
+                for retry_attempt in range(2):
+                    retry_delay = (2 ** retry_attempt) + random.uniform(0, 1)
+                    logger.debug(f"Retrying Brave Search in {retry_delay:.2f}s (attempt {retry_attempt + 1}/2)")
+                    await asyncio.sleep(retry_delay)
                     try:
-                        async with session.get(self.base_url, params=params) as retry_response:
-                            if retry_response.status == 200:
-                                try:
-                                    data = await retry_response.json()
-                                    raw_results = self._parse_brave_results(data, query)
-                                    quality_results = self._apply_quality_filtering(raw_results, query)
-                                    reranked_results = self._rerank_by_quality(quality_results, query)
-                                    logger.info(f"Brave Search post-429 retry: {len(reranked_results)} results")
-                                    return reranked_results
-                                except Exception as e:
-                                    logger.warning(f"Brave Search post-429 parse failed: {e}")
-                            else:
-                                logger.warning(f"Brave Search post-429 retry failed with status: {retry_response.status}")
+                        status, raw_results = await self._fetch_results(session, params, query)
+                    except asyncio.TimeoutError:
+                        logger.debug(f"Retry attempt {retry_attempt + 1} timed out")
+                        continue
                     except Exception as e:
-                        logger.debug(f"Brave Search post-429 retry error: {e}")
-                    return []
-                elif response.status >= 500:
-                    # Handle server errors with retry logic
-                    logger.warning(f"Brave Search API server error: {response.status}, implementing retry...")
-                    
-                    # Implement exponential backoff with jitter
-                    for retry_attempt in range(2):  # Max 2 retries for 5xx errors
-                        retry_delay = (2 ** retry_attempt) + random.uniform(0, 1)  # Exponential backoff + jitter
-                        logger.debug(f"Retrying Brave Search in {retry_delay:.2f}s (attempt {retry_attempt + 1}/2)")
-                        await asyncio.sleep(retry_delay)
-                        
-                        # Retry with same parameters
-                        try:
-                            async with session.get(self.base_url, params=params) as retry_response:
-                                if retry_response.status == 200:
-                                    try:
-                                        data = await retry_response.json()
-                                        if self._validate_response_schema(data):
-                                            raw_results = self._parse_brave_results(data, query)
-                                            quality_results = self._apply_quality_filtering(raw_results, query)
-                                            reranked_results = self._rerank_by_quality(quality_results, query)
-                                            logger.info(f"Brave Search retry succeeded: {len(reranked_results)} results")
-                                            return reranked_results
-                                    except Exception as e:
-                                        logger.warning(f"Brave Search retry parsing failed: {e}")
-                                        continue
-                                elif retry_response.status >= 500:
-                                    logger.debug(f"Retry attempt {retry_attempt + 1} still failed with {retry_response.status}")
-                                    continue
-                                else:
-                                    logger.debug(f"Retry failed with different error: {retry_response.status}")
-                                    break
-                        except asyncio.TimeoutError:
-                            logger.debug(f"Retry attempt {retry_attempt + 1} timed out")
-                            continue
-                        except Exception as e:
-                            logger.debug(f"Retry attempt {retry_attempt + 1} failed: {e}")
-                            continue
-                    
-                    logger.warning("All Brave Search retry attempts failed")
-                    return []
-                else:
-                    # Try to get error details from response body
-                    try:
-                        error_text = await response.text()
-                        logger.warning(f"Brave Search API error {response.status}: {error_text[:200]}")
-                    except:
-                        logger.warning(f"Brave Search API error: {response.status}")
-                    return []
+                        logger.debug(f"Retry attempt {retry_attempt + 1} failed: {e}")
+                        continue
+                    if raw_results is not None or (status != 200 and status < 500):
+                        break
+            elif status == 401:
+                logger.warning("Brave Search API unauthorized (401) - check API key")
+            elif status == 403:
+                logger.warning("Brave Search API forbidden (403) - subscription token or plan issue")
+            
+            if not raw_results:
+                if raw_results is None and status != 200:
+                    logger.warning(f"Brave Search failed with status: {status}")
+                return []
+            
+            # Apply post-retrieval quality filtering and reranking
+            reranked_results = self._filter_and_rerank(raw_results, query)
+            
+            logger.info(f"Brave Search: {len(raw_results)} raw → {len(reranked_results)} filtered and reranked")
+            return reranked_results
                     
         except asyncio.TimeoutError:
             logger.warning("Brave Search API timeout")
@@ -651,6 +1418,43 @@ class BraveSearchClient:
             logger.debug(f"Brave Search API error: {e}")
             return []
     
+    async def _fetch_results(
+        self,
+        session: aiohttp.ClientSession,
+        params: Dict[str, Any],
+        query: str
+    ) -> Tuple[int, Optional[List[Dict[str, Any]]]]:
+        """Issue one Brave request and parse it.
+        
+        Returns the HTTP status and the parsed raw results, or None when the
+        request failed or the payload could not be used.
+        """
+        async with session.get(self.base_url, params=params) as response:
+            status = response.status
+            logger.debug(f"Brave Search response: {status}")
+            
+            if status != 200:
+                if status not in (401, 403, 422, 429) and status < 500:
+                    # Try to get error details from response body
+                    try:
+                        error_text = await response.text()
+                        logger.warning(f"Brave Search API error {status}: {error_text[:200]}")
+                    except Exception:
+                        logger.warning(f"Brave Search API error: {status}")
+                return status, None
+            
+            try:
+                data = await self._read_json(response)
+                if not self._validate_response_schema(data):
+                    logger.warning("Brave API response missing 'web.results' or 'news.results' list")
+                    return status, None
+                return status, self._parse_brave_results(data, query)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Brave Search API JSON decode error: {e}")
+            except Exception as e:
+                logger.warning(f"Brave Search API response parsing error: {e}")
+            return status, None
+    
     def _validate_response_schema(self, data: Dict[str, Any]) -> bool:
         """Validate Brave Search API response schema."""
         if not isinstance(data, dict):
@@ -668,73 +1472,31 @@ class BraveSearchClient:
     def _parse_brave_results(self, data: Dict[str, Any], query: str) -> List[Dict[str, Any]]:
         """Parse Brave Search API response into standardized format with enhanced quality scoring."""
         results: List[Dict[str, Any]] = []
+        qctx = _QueryCtx.from_query(query)
+        # Every result in one response shares the same retrieval timestamp
+        timestamp = datetime.now().isoformat()
 
-        def _normalize_url(url: str) -> str:
-            """Normalize URLs for consistent citation & deduplication.
-            - Ensure scheme (default https)
-            - Collapse multiple slashes in path
-            - Remove default ports (:80, :443)
-            - Strip tracking query params (utm_*, fbclid, gclid, msclkid, ref, ref_src, referrer, source, code)
-            - Remove trailing slash (except root)
-            - Lowercase hostname
-            """
-            if not url:
-                return ""
-            url = url.strip()
-            if url.startswith('//'):
-                url = 'https:' + url
-            if not url.lower().startswith(('http://', 'https://')):
-                url = 'https://' + url  # assume https for bare domains
-            try:
-                parsed = urlparse(url)
-                scheme = parsed.scheme.lower() if parsed.scheme else 'https'
-                # Prefer https when original was http (heuristic): upgrade unless localhost or internal
-                if scheme == 'http' and not parsed.netloc.startswith(('localhost', '127.0.0.1')):
-                    scheme = 'https'
-                netloc = parsed.netloc.lower()
-                # Remove default ports
-                if netloc.endswith(':80'):
-                    netloc = netloc[:-3]
-                elif netloc.endswith(':443'):
-                    netloc = netloc[:-4]
-                # Collapse duplicate slashes in path
-                path = re.sub(r'/+', '/', parsed.path or '/')
-                if path != '/' and path.endswith('/'):
-                    path = path[:-1]
-                # Clean query params
-                tracking_keys = {'fbclid','gclid','msclkid','ref','ref_src','referrer','source','code'}
-                # Any key starting with utm_ also removed
-                query_items = []
-                for k, v in parse_qsl(parsed.query, keep_blank_values=False):
-                    lk = k.lower()
-                    if lk.startswith('utm_') or lk in tracking_keys:
-                        continue
-                    query_items.append((k, v))
-                query = urlencode(query_items, doseq=True)
-                normalized = urlunparse((scheme, netloc, path, '', query, ''))
-                return normalized
-            except Exception:
-                return url  # fallback to original
-        
         # Helper to parse a list of result entries
         def parse_entries(entries: List[Dict[str, Any]]):
             for result in entries:
                 title = (result.get('title') or '').strip()
                 raw_url = (result.get('url') or result.get('link') or result.get('resolved_url') or '').strip()
-                url = _normalize_url(raw_url)
+                url = _normalize_url_cached(raw_url)
                 description = (result.get('description') or result.get('snippet') or '').strip()
                 if not title or not url:
                     continue
-                quality_score = self._calculate_brave_quality_score(result, query, title, description)
+                # Parse the domain once; scoring, filtering and reranking all read '_domain'
+                domain = _fast_netloc(url)
+                quality_score = self._calculate_brave_quality_score(result, qctx, title, description, domain)
                 results.append({
                     'title': title,
                     'url': url,
+                    '_domain': domain,
                     'snippet': description,
                     'relevance_score': quality_score,
                     'source': 'brave_search',
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': timestamp,
                     'search_engine': 'Brave',
-                    'raw_data': result
                 })
         
         # Extract web results
@@ -777,111 +1539,69 @@ class BraveSearchClient:
         
         return enhanced_query
     
-    def _get_optimal_locale(self, query: str, default_country: str) -> tuple[str, str]:
-        """Determine optimal country and language based on query content with improved detection."""
+    @staticmethod
+    @lru_cache(maxsize=2048)
+    def _get_optimal_locale(query: str, default_country: str) -> tuple[str, str]:
+        """Determine optimal country and language based on query content with improved detection.
+        
+        Memoized: the result depends only on the query text and default country.
+        """
         # Use improved language detection
-        detected_lang = self._detect_language(query)
+        detected_lang = BraveSearchClient._detect_language(query)
         
-        query_lower = query.lower()
-        
-        # Language-specific optimizations with better validation
-        if detected_lang == 'ja' or 'japan' in query_lower or '日本' in query:
-            return 'JP', 'ja'
-        elif detected_lang == 'zh' or 'china' in query_lower or '中国' in query:
-            return 'CN', 'zh'
-        elif detected_lang == 'ko' or 'korea' in query_lower or '韓国' in query:
-            return 'KR', 'ko'
-        elif detected_lang == 'de' or any(term in query_lower for term in ['germany', 'deutsch', 'deutschland']):
-            return 'DE', 'de'
-        elif detected_lang == 'fr' or any(term in query_lower for term in ['france', 'français', 'french']):
-            return 'FR', 'fr'
-        elif detected_lang == 'es' or any(term in query_lower for term in ['spain', 'español', 'spanish']):
-            return 'ES', 'es'
-        elif detected_lang == 'it' or any(term in query_lower for term in ['italy', 'italian', 'italiano']):
-            return 'IT', 'it'
-        elif any(term in query_lower for term in ['europe', 'eu', 'european']):
-            return 'GB', 'en'  # Use UK for European financial markets
-        elif any(term in query_lower for term in ['nasdaq', 'nyse', 'usa', 'america']):
-            return 'US', 'en'
+        # Language and hint-word signals; when several match, the higher-priority locale wins
+        ranks = [_LOCALE_RANK[_LOCALE_HINTS[hint]] for hint in _LOCALE_HINT_RE.findall(query.lower())]
+        detected_locale = _LANG_TO_LOCALE.get(detected_lang)
+        if detected_locale is not None:
+            ranks.append(_LOCALE_RANK[detected_locale])
+        if ranks:
+            return _LOCALE_PRIORITY[min(ranks)]
         
         # Default based on input or fallback with validation
         if default_country and default_country != "ALL":
-            # Map detected language to appropriate country if default_country is generic
-            if detected_lang == 'ja':
-                return 'JP', 'ja'
-            elif detected_lang == 'zh':
-                return 'CN', 'zh'
-            elif detected_lang == 'ko':
-                return 'KR', 'ko'
-            elif detected_lang == 'de':
-                return 'DE', 'de'
-            elif detected_lang == 'fr':
-                return 'FR', 'fr'
-            elif detected_lang == 'es':
-                return 'ES', 'es'
-            elif detected_lang == 'it':
-                return 'IT', 'it'
-            else:
-                return default_country, 'en'
+            return default_country, 'en'
         
         # Final fallback to US for financial queries
         return 'US', 'en'
     
     def _is_time_sensitive_query(self, query: str) -> bool:
         """Check if query requires recent/time-sensitive results."""
-        time_sensitive_terms = [
-            'latest', 'recent', 'current', 'today', 'now', 'breaking',
-            'earnings', 'results', 'report', 'news', 'update', 'forecast',
-            '2025', '2024', 'this year', 'this quarter', 'q1', 'q2', 'q3', 'q4'
-        ]
-        query_lower = query.lower()
-        return any(term in query_lower for term in time_sensitive_terms)
+        return _TIME_SENSITIVE_RE.search(query) is not None
     
     def _is_financial_query(self, query: str) -> bool:
         """Check if query is finance/business related."""
-        financial_terms = [
-            'stock', 'share', 'market', 'financial', 'investment', 'analysis',
-            'earnings', 'revenue', 'profit', 'nasdaq', 'nyse', 'trading', 'price',
-            'forecast', 'prediction', 'valuation', 'dividend', 'portfolio'
-        ]
-        query_lower = query.lower()
-        return any(term in query_lower for term in financial_terms)
+        return _FINANCIAL_RE.search(query) is not None
     
-    def _calculate_brave_quality_score(self, raw_result: Dict, query: str, title: str, description: str) -> float:
+    def _calculate_brave_quality_score(
+        self, raw_result: Dict, qctx: _QueryCtx, title: str, description: str, domain: Optional[str] = None
+    ) -> float:
         """Calculate enhanced quality score for Brave results with improved tiered domain scoring."""
         base_score = 0.4  # Reduced base score to allow more spread
         
         # Factor 1: Enhanced domain quality with tiers
-        domain = urlparse(raw_result.get('url', '')).netloc.lower()
+        if domain is None:
+            domain = urlparse(raw_result.get('url', '')).netloc.lower()
         domain_bonus = 0.0
         
         # Check tiered trusted domains
-        all_trusted_domains = set()
-        for tier, domains in TRUSTED_FINANCIAL_DOMAINS.items():
-            all_trusted_domains.update(domains)
-        
-        all_untrusted_domains = set()
-        for category, domains in UNTRUSTED_DOMAINS.items():
-            all_untrusted_domains.update(domains)
-        
-        if domain in TRUSTED_FINANCIAL_DOMAINS.get('tier1', set()):
+        if domain in _TIER1:
             domain_bonus = 0.25  # Highest boost for tier 1 sources
-        elif domain in TRUSTED_FINANCIAL_DOMAINS.get('tier2', set()):
+        elif domain in _TIER2:
             domain_bonus = 0.20  # High boost for tier 2 sources
-        elif domain in TRUSTED_FINANCIAL_DOMAINS.get('tier3', set()):
+        elif domain in _TIER3:
             domain_bonus = 0.15  # Good boost for tier 3 sources
-        elif domain in TRUSTED_FINANCIAL_DOMAINS.get('academic', set()):
+        elif domain in _ACADEMIC:
             domain_bonus = 0.18  # Academic sources boost
         elif domain in TRUSTED_JP_FINANCIAL_DOMAINS or domain.endswith('.co.jp'):
             # Boost reputable Japanese corporate/financial sites
             domain_bonus = max(domain_bonus, 0.15)
-        elif domain in all_untrusted_domains:
+        elif domain in _ALL_UNTRUSTED:
             # Differentiate penalties by category
-            if domain in UNTRUSTED_DOMAINS.get('social', set()):
+            if domain in _UNTRUSTED_SOCIAL:
                 domain_bonus = -0.3  # Moderate penalty for social media
-            elif domain in UNTRUSTED_DOMAINS.get('clickbait', set()):
+            elif domain in _UNTRUSTED_CLICKBAIT:
                 domain_bonus = -0.5  # Heavy penalty for clickbait
-            elif domain in UNTRUSTED_DOMAINS.get('farms', set()):
+            elif domain in _UNTRUSTED_FARMS:
                 domain_bonus = -0.4  # Heavy penalty for content farms
             else:
                 domain_bonus = -0.3  # Default penalty
@@ -893,7 +1613,7 @@ class BraveSearchClient:
             domain_bonus = 0.10  # Moderate boost for organizations
         
         # Factor 2: Query relevance (unchanged)
-        query_lower = query.lower()
+        query_lower = qctx.lower
         title_lower = title.lower()
         desc_lower = description.lower()
         
@@ -904,7 +1624,7 @@ class BraveSearchClient:
             relevance_bonus += 0.05
         
         # Check for exact keyword matches
-        query_words = set(query_lower.split())
+        query_words = qctx.words
         title_words = set(title_lower.split())
         desc_words = set(desc_lower.split())
         
@@ -913,35 +1633,18 @@ class BraveSearchClient:
         
         relevance_bonus += title_overlap * 0.1 + desc_overlap * 0.05
         
-        # Factor 3: Content quality indicators (EN + JA)
-        quality_indicators = [
-            # English
-            'analysis', 'report', 'research', 'study', 'data', 'statistics', 'investor relations', 'ir',
-            # Japanese (common finance/corporate terms)
-            '戦略', '経営', '決算', '短信', '発表', '統合報告書', '有価証券報告書', '顧客', '基盤', '成長', 'IR', '投資家', '方針'
-        ]
-        spam_indicators = ['click here', 'buy now', 'free trial', 'limited time']
-        
+        # Factor 3: Content quality indicators (EN + JA), one regex scan each
         content_text = (title + ' ' + description).lower()
-        quality_bonus = 0.0
-        # Case-insensitive match for English indicators; simple inclusion for Japanese
-        for indicator in quality_indicators:
-            try:
-                if indicator.lower() in content_text:
-                    quality_bonus += 0.02
-            except Exception:
-                # For non-ascii, fallback to simple containment check without lowercasing
-                if indicator in (title + ' ' + description):
-                    quality_bonus += 0.02
-        spam_penalty = sum(-0.05 for indicator in spam_indicators if indicator in content_text)
+        quality_bonus = 0.02 * sum(_QUALITY_INDICATOR_WEIGHTS[m] for m in set(_QUALITY_INDICATOR_RE.findall(content_text)))
+        spam_penalty = -0.05 * len(set(_SCORE_SPAM_RE.findall(content_text)))
         
         # Factor 4: Length and completeness (longer descriptions often indicate quality)
         length_bonus = min(len(description) / 200, 0.05)  # Up to 0.05 bonus for good descriptions
         
         # Factor 5: Language match
         language_bonus = 0.0
-        if any(ord(c) > 127 for c in query):  # Non-ASCII query (e.g., Japanese)
-            if any(ord(c) > 127 for c in title + description):  # Non-ASCII content
+        if qctx.is_non_ascii:  # Non-ASCII query (e.g., Japanese)
+            if not title.isascii() or not description.isascii():  # Non-ASCII content
                 language_bonus = 0.12  # Slightly higher for better separation
         
         # Calculate final score with improved scaling
@@ -954,27 +1657,27 @@ class BraveSearchClient:
         # Ensure score is within bounds
         return max(0.0, min(1.0, final_score))
     
-    def _apply_quality_filtering(self, results: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
-        """Apply post-retrieval quality filtering with improved domain checking."""
-        filtered_results = []
+    def _filter_and_rerank(self, results: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
+        """Apply post-retrieval quality filtering and rerank the survivors in a single pass.
         
-        # Flatten untrusted domains for easier checking
-        all_untrusted_domains = set()
-        for category, domains in UNTRUSTED_DOMAINS.items():
-            all_untrusted_domains.update(domains)
+        Each result's domain, title and snippet are read once; results that pass
+        every filter are scored for reranking straight away.
+        """
+        scored: List[Tuple[float, Dict[str, Any]]] = []
         
-        is_japanese_query = any(ord(c) > 127 for c in query)
+        is_japanese_query = not query.isascii()
+        # Relevance tokens depend only on the query: derive them once for the whole batch
+        query_tokens = self._content_relevance_tokens(query)
         
         for result in results:
-            url = result.get('url', '')
-            domain = urlparse(url).netloc.lower()
+            domain = result.get('_domain') or urlparse(result.get('url', '')).netloc.lower()
             title = result.get('title', '')
             snippet = result.get('snippet', '')
             
             # Filter 1: Remove untrusted domains (with category-based exceptions)
-            if domain in all_untrusted_domains:
+            if domain in _ALL_UNTRUSTED:
                 # Allow some social media if it's official corporate accounts for financial queries
-                if (domain in UNTRUSTED_DOMAINS.get('social', set()) and 
+                if (domain in _UNTRUSTED_SOCIAL and 
                     self._is_likely_official_account(title, snippet)):
                     pass  # Allow official accounts
                 else:
@@ -984,7 +1687,7 @@ class BraveSearchClient:
             # Filter 2: Remove obviously irrelevant results
             # For Japanese queries, be permissive to avoid dropping useful JP corporate/IR pages
             if not is_japanese_query:
-                if not self._is_content_relevant(query, title, snippet):
+                if not self._is_content_relevant_fast(query_tokens, is_japanese_query, title, snippet):
                     logger.debug(f"Filtered irrelevant content: {title[:50]}...")
                     continue
             
@@ -999,9 +1702,18 @@ class BraveSearchClient:
                 logger.debug(f"Filtered low-quality result: {result.get('relevance_score', 0):.2f}")
                 continue
             
-            filtered_results.append(result)
+            scored.append((self._rerank_score(result.get('relevance_score', 0.5), domain), result))
         
-        return filtered_results
+        # Sort by quality score (descending; stable for ties)
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        
+        # Log quality distribution for monitoring
+        if scored:
+            scores = [score for score, _ in scored]
+            avg_score = sum(scores) / len(scores)
+            logger.info(f"Brave reranking: avg quality {avg_score:.3f}, range {scores[-1]:.3f}-{scores[0]:.3f}")
+        
+        return [result for _, result in scored]
     
     def _is_likely_official_account(self, title: str, snippet: str) -> bool:
         """Check if social media content is likely from an official corporate account."""
@@ -1016,199 +1728,89 @@ class BraveSearchClient:
         
         return any(indicator in content for indicator in official_indicators)
     
-    def _rerank_by_quality(self, results: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
-        """Rerank results by comprehensive quality score with improved domain assessment."""
-        def quality_score(result: Dict[str, Any]) -> float:
-            base_score = result.get('relevance_score', 0.5)
-            url = result.get('url', '')
-            domain = urlparse(url).netloc.lower()
-            
-            # Enhanced quality multipliers based on domain tiers
-            multiplier = 1.0
-            
-            # Tiered trusted domain bonuses
-            if domain in TRUSTED_FINANCIAL_DOMAINS.get('tier1', set()):
-                multiplier *= 1.4  # Highest boost for premium sources
-            elif domain in TRUSTED_FINANCIAL_DOMAINS.get('tier2', set()):
-                multiplier *= 1.3  # High boost for major financial news
-            elif domain in TRUSTED_FINANCIAL_DOMAINS.get('tier3', set()):
-                multiplier *= 1.2  # Good boost for specialized sources
-            elif domain in TRUSTED_FINANCIAL_DOMAINS.get('academic', set()):
-                multiplier *= 1.25 # Academic sources get good boost
-            
-            # Official sources boost
-            if domain.endswith('.gov'):
-                multiplier *= 1.3  # Government sources are highly trusted
-            elif domain.endswith('.edu'):
-                multiplier *= 1.2  # Educational sources are reliable
-            elif domain.endswith(('.org', '.int')):
-                multiplier *= 1.1  # Organizations get modest boost
-            
-            # Penalty for potentially unreliable sources
-            all_untrusted_domains = set()
-            for category, domains in UNTRUSTED_DOMAINS.items():
-                all_untrusted_domains.update(domains)
-                
-            if domain in all_untrusted_domains:
-                multiplier *= 0.7  # Penalty for untrusted domains
-            
-            return base_score * multiplier
-        
-        # Sort by quality score (descending)
-        reranked = sorted(results, key=quality_score, reverse=True)
-        
-        # Log quality distribution for monitoring
-        if reranked:
-            scores = [quality_score(r) for r in reranked]
-            avg_score = sum(scores) / len(scores)
-            logger.info(f"Brave reranking: avg quality {avg_score:.3f}, range {min(scores):.3f}-{max(scores):.3f}")
-        
-        return reranked
+    @staticmethod
+    def _rerank_score(base_score: float, domain: str) -> float:
+        """Comprehensive quality score used for reranking, with improved domain assessment."""
+        # Enhanced quality multipliers based on domain tiers
+        multiplier = 1.0
+
+        # Tiered trusted domain bonuses
+        if domain in _TIER1:
+            multiplier *= 1.4  # Highest boost for premium sources
+        elif domain in _TIER2:
+            multiplier *= 1.3  # High boost for major financial news
+        elif domain in _TIER3:
+            multiplier *= 1.2  # Good boost for specialized sources
+        elif domain in _ACADEMIC:
+            multiplier *= 1.25 # Academic sources get good boost
+
+        # Official sources boost
+        if domain.endswith('.gov'):
+            multiplier *= 1.3  # Government sources are highly trusted
+        elif domain.endswith('.edu'):
+            multiplier *= 1.2  # Educational sources are reliable
+        elif domain.endswith(('.org', '.int')):
+            multiplier *= 1.1  # Organizations get modest boost
+
+        # Penalty for potentially unreliable sources
+        if domain in _ALL_UNTRUSTED:
+            multiplier *= 0.7  # Penalty for untrusted domains
+
+        return base_score * multiplier
     
     def _is_content_relevant(self, query: str, title: str, snippet: str) -> bool:
         """Enhanced relevance checking for content quality."""
-        query_lower = query.lower()
-        content_lower = (title + ' ' + snippet).lower()
-        
+        return self._is_content_relevant_fast(
+            self._content_relevance_tokens(query), not query.isascii(), title, snippet
+        )
+    
+    @staticmethod
+    def _content_relevance_tokens(query: str) -> List[str]:
+        """Extract the query tokens that _is_content_relevant_fast looks for in results."""
         # If query contains non-ASCII (e.g., Japanese), use more permissive matching
-        if any(ord(c) > 127 for c in query):
+        if not query.isascii():
             # Split on whitespace to get keyword-like segments (common in JP queries)
             segments = [seg.strip() for seg in query.split() if len(seg.strip()) >= 2]
             # Additionally, extract Kanji/Kana sequences of length >= 2
-            try:
-                jp_tokens = __import__('re').findall(r'[\u3040-\u30FF\u4E00-\u9FFF]{2,}', query)
-            except Exception:
-                jp_tokens = []
-            tokens = list({*segments, *jp_tokens})
-            if not tokens:
-                return False
-            matches = sum(1 for t in tokens if t in content_lower)
-            # For Japanese, 1 match among a few tokens is often sufficient
-            if len(tokens) <= 3:
-                return matches >= 1
-            match_ratio = matches / max(1, len(tokens))
-            return match_ratio >= 0.2  # Lower threshold for JP
+            jp_tokens = _JP_TOKEN_RE.findall(query)
+            return list({*segments, *jp_tokens})
         
         # English/Latin scripts: Extract meaningful words (exclude stop words)
-        stop_words = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were'}
-        query_words = [word for word in query_lower.split() if word not in stop_words and len(word) > 2]
-        
-        if not query_words:
+        return [word for word in query.lower().split() if word not in _STOP_WORDS and len(word) > 2]
+    
+    @staticmethod
+    def _is_content_relevant_fast(query_tokens: List[str], is_non_ascii: bool, title: str, snippet: str) -> bool:
+        """Check precomputed query tokens against a result's title and snippet."""
+        if not query_tokens:
             return False
+        content_lower = (title + ' ' + snippet).lower()
+        matches = sum(1 for token in query_tokens if token in content_lower)
         
-        # Check for word overlap
-        matches = sum(1 for word in query_words if word in content_lower)
-        match_ratio = matches / len(query_words)
+        if is_non_ascii:
+            # For Japanese, 1 match among a few tokens is often sufficient
+            if len(query_tokens) <= 3:
+                return matches >= 1
+            return matches / len(query_tokens) >= 0.2  # Lower threshold for JP
         
-        return match_ratio >= 0.25  # Slightly more lenient (was 0.3)
+        return matches / len(query_tokens) >= 0.25  # Slightly more lenient (was 0.3)
     
     def _has_spam_indicators(self, title: str, snippet: str) -> bool:
         """Check for spam/low-quality content indicators."""
         content = (title + ' ' + snippet).lower()
-        
-        spam_patterns = [
-            'click here', 'buy now', 'free trial', 'limited time offer',
-            'act now', 'call now', 'order today', '100% free',
-            'no credit card', 'risk free', 'money back guarantee',
-            'amazing results', 'miracle cure', 'secret revealed'
-        ]
-        
-        return any(pattern in content for pattern in spam_patterns)
+        return _SPAM_PATTERN_RE.search(content) is not None
     
-    def _detect_language(self, text: str) -> str:
-        """Improved language detection with better thresholds and more language support."""
-        if not text:
-            return 'en'
+    @staticmethod
+    def _detect_language(text: str) -> str:
+        """Improved language detection with better thresholds and more language support.
         
-        text_len = len(text)
-        if text_len == 0:
+        Memoized for query-sized inputs; longer texts are scored directly so
+        the cache keys stay small.
+        """
+        if not text:
             return 'en'
-        
-        # Count different character sets
-        japanese_chars = sum(1 for char in text if 
-                           '\u3040' <= char <= '\u309F' or  # Hiragana
-                           '\u30A0' <= char <= '\u30FF' or  # Katakana
-                           '\u4E00' <= char <= '\u9FAF')    # Kanji
-        
-        # Chinese specific characters (not in Japanese)
-        chinese_chars = sum(1 for char in text if 
-                          '\u4E00' <= char <= '\u9FAF' and  # CJK Unified Ideographs
-                          char not in '\u4E00\u4E01\u4E03\u4E07\u4E08\u4E09\u4E0A\u4E0B\u4E0D\u4E0E\u4E10')  # Common JP kanji
-        
-        # Korean characters
-        korean_chars = sum(1 for char in text if 
-                         '\uAC00' <= char <= '\uD7AF' or  # Hangul syllables
-                         '\u1100' <= char <= '\u11FF')    # Hangul Jamo
-        
-        # Arabic characters
-        arabic_chars = sum(1 for char in text if '\u0600' <= char <= '\u06FF')
-        
-        # Cyrillic characters
-        cyrillic_chars = sum(1 for char in text if '\u0400' <= char <= '\u04FF')
-        
-        # Thai characters
-        thai_chars = sum(1 for char in text if '\u0E00' <= char <= '\u0E7F')
-        
-        # Calculate ratios with better thresholds
-        japanese_ratio = japanese_chars / text_len
-        chinese_ratio = chinese_chars / text_len
-        korean_ratio = korean_chars / text_len
-        arabic_ratio = arabic_chars / text_len
-        cyrillic_ratio = cyrillic_chars / text_len
-        thai_ratio = thai_chars / text_len
-        
-        # Use higher thresholds to avoid false positives
-        # A text needs at least 5% of characters from a script to be considered that language
-        min_threshold = 0.05
-        
-        # Prioritize detection based on character density
-        if japanese_ratio > min_threshold and japanese_ratio >= chinese_ratio:
-            return 'ja'
-        elif korean_ratio > min_threshold:
-            return 'ko'
-        elif chinese_ratio > min_threshold and chinese_ratio > japanese_ratio:
-            return 'zh'
-        elif arabic_ratio > min_threshold:
-            return 'ar'
-        elif cyrillic_ratio > min_threshold:
-            return 'ru'
-        elif thai_ratio > min_threshold:
-            return 'th'
-        
-        # Fallback: check for common language indicators in Latin script
-        # Use word boundaries to avoid false matches
-        import re
-        text_lower = text.lower()
-        
-        # Helper function to check for whole words only
-        def has_whole_words(text_to_check, words):
-            """Check if text contains any of the words as whole words (with word boundaries)."""
-            for word in words:
-                # Use word boundaries to match whole words only
-                if re.search(r'\b' + re.escape(word) + r'\b', text_to_check):
-                    return True
-            return False
-        
-        # German indicators (whole words only)
-        if has_whole_words(text_lower, ['der', 'die', 'das', 'und', 'ich', 'ist', 'mit', 'nicht', 'sie', 'auch', 'auf']):
-            return 'de'
-        # French indicators (whole words only)
-        elif has_whole_words(text_lower, ['le', 'la', 'les', 'et', 'un', 'une', 'est', 'sont', 'dans', 'pour', 'avec']):
-            # Avoid false positive from English "analysis" containing "al"
-            if not has_whole_words(text_lower, ['stock', 'price', 'company', 'market', 'analysis', 'financial']):
-                return 'fr'
-        # Spanish indicators (whole words only)
-        elif has_whole_words(text_lower, ['el', 'la', 'los', 'las', 'y', 'un', 'una', 'es', 'son', 'está', 'están']):
-            # Avoid false positive from English words containing Spanish words
-            if not has_whole_words(text_lower, ['stock', 'price', 'company', 'market', 'analysis', 'financial']):
-                return 'es'
-        # Italian indicators (whole words only)
-        elif has_whole_words(text_lower, ['il', 'la', 'i', 'le', 'di', 'che', 'è', 'sono', 'per', 'con', 'da']):
-            if not has_whole_words(text_lower, ['stock', 'price', 'company', 'market', 'analysis', 'financial']):
-                return 'it'
-        
-        # Default to English
-        return 'en'
+        if len(text) <= _LANGUAGE_CACHE_MAX_CHARS:
+            return _detect_language_cached(text)
+        return _detect_language_uncached(text)
     
     async def close(self):
         """Explicitly close HTTP session and mark client as closed."""
@@ -1226,38 +1828,31 @@ class BraveSearchClient:
         if not results:
             return
         
-        # Domain distribution analysis
-        domain_counts = {}
-        quality_by_domain = {}
-        
-        for result in results:
-            url = result.get('url', '')
-            domain = urlparse(url).netloc.lower()
-            score = result.get('relevance_score', 0)
-            
-            domain_counts[domain] = domain_counts.get(domain, 0) + 1
-            if domain not in quality_by_domain:
-                quality_by_domain[domain] = []
-            quality_by_domain[domain].append(score)
+        # Domain distribution analysis (single pass: counts and score sums per domain)
+        result_domains = [
+            result.get('_domain') or urlparse(result.get('url', '')).netloc.lower() for result in results
+        ]
+        domain_counts = Counter(result_domains)
+        score_sums: Counter = Counter()
+        for result, domain in zip(results, result_domains):
+            score_sums[domain] += result.get('relevance_score', 0)
         
         # Calculate average quality by domain
-        domain_quality = {}
-        for domain, scores in quality_by_domain.items():
-            domain_quality[domain] = sum(scores) / len(scores)
+        domain_quality = {domain: score_sums[domain] / count for domain, count in domain_counts.items()}
         
         # Log metrics for monitoring
         total_results = len(results)
-        avg_quality = sum(r.get('relevance_score', 0) for r in results) / total_results
-        trusted_count = sum(1 for r in results if urlparse(r.get('url', '')).netloc.lower() in TRUSTED_FINANCIAL_DOMAINS)
+        avg_quality = sum(score_sums.values()) / total_results
+        trusted_count = sum(1 for domain in result_domains if domain in _ALL_TRUSTED)
         
         logger.info(f"Brave Quality Metrics - Query: '{query[:50]}{'...' if len(query) > 50 else ''}'")
         logger.info(f"  Total results: {total_results}, Avg quality: {avg_quality:.3f}")
         logger.info(f"  Trusted domains: {trusted_count}/{total_results} ({trusted_count/total_results*100:.1f}%)")
-        logger.info(f"  Domain distribution: {dict(list(domain_counts.items())[:5])}")  # Top 5 domains
+        logger.info(f"  Domain distribution: {dict(domain_counts.most_common(5))}")  # Top 5 domains
         
         # Log low-quality domains for potential addition to denylist
         low_quality_domains = [domain for domain, quality in domain_quality.items() 
-                              if quality < 0.6 and domain not in UNTRUSTED_DOMAINS]
+                              if quality < 0.6 and domain not in _ALL_UNTRUSTED]
         if low_quality_domains:
             logger.warning(f"Low-quality domains detected: {low_quality_domains}")
         
@@ -1269,9 +1864,105 @@ class BraveSearchClient:
             'low_quality_domains': low_quality_domains
         }
 
+def _unit_embedding(embedding: List[float]) -> Any:
+    """Normalize an embedding to unit length so cosine similarity is a dot product.
+    
+    Vectors are kept as float16 to halve their footprint in _embeddings_cache;
+    promote to float32 before doing arithmetic on them. Without NumPy the
+    normalized vector is a list of floats.
+    """
+    if not NUMPY_AVAILABLE:
+        norm = math.sqrt(sum(map(mul, embedding, embedding)))
+        return [value / norm for value in embedding] if norm else list(embedding)
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    if norm:
+        vector = vector / norm
+    return vector.astype(np.float16)
+
+def _quantize_embedding(vector: Any) -> Tuple[Any, float]:
+    """Quantize a unit embedding to symmetric int8 codes plus one float scale.
+    
+    Document embeddings are cached this way (a quarter of float32, half of
+    float16); ``codes.astype(np.float32) @ query * scale`` recovers the cosine
+    similarity to within ~1e-3.
+    """
+    vector = np.asarray(vector, dtype=np.float32)
+    peak = float(np.abs(vector).max()) if vector.size else 0.0
+    if not peak:
+        return np.zeros(vector.shape, dtype=np.int8), 0.0
+    scale = peak / 127.0
+    return np.rint(vector / scale).astype(np.int8), scale
+
+def _min_max_or_half(scores: List[float]) -> List[float]:
+    """Min-max scale scores to [0, 1]; a constant score list maps to 0.5."""
+    low, high = min(scores), max(scores)
+    if high <= low:
+        return [0.5] * len(scores)
+    span = high - low
+    return [(score - low) / span for score in scores]
+
+class _OkapiBM25Index:
+    """Okapi BM25 over a tokenized corpus stored as per-term posting arrays.
+
+    Scoring matches rank_bm25's BM25Okapi (k1=1.5, b=0.75, IDF floored at
+    epsilon * average IDF), but each query term is one vectorized update over
+    the documents that contain it instead of a pass over every document.
+    """
+    
+    def __init__(self, documents: List[List[str]], k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1 = k1
+        self.corpus_size = len(documents)
+        
+        doc_ids_by_term: Dict[str, List[int]] = {}
+        tfs_by_term: Dict[str, List[int]] = {}
+        for doc_id, document in enumerate(documents):
+            for term, tf in Counter(document).items():
+                doc_ids_by_term.setdefault(term, []).append(doc_id)
+                tfs_by_term.setdefault(term, []).append(tf)
+        
+        doc_len = np.fromiter(map(len, documents), dtype=np.float64, count=self.corpus_size)
+        avgdl = doc_len.sum() / self.corpus_size
+        # Per-document length normalization, k1 * (1 - b + b * |d| / avgdl)
+        self._length_norm = k1 * (1 - b + b * doc_len / avgdl)
+        
+        terms = list(doc_ids_by_term)
+        doc_freq = np.fromiter((len(doc_ids_by_term[t]) for t in terms), dtype=np.float64, count=len(terms))
+        idf = np.log(self.corpus_size - doc_freq + 0.5) - np.log(doc_freq + 0.5)
+        if idf.size:
+            idf[idf < 0] = epsilon * idf.mean()
+        
+        self._postings: Dict[str, Tuple["np.ndarray", "np.ndarray", float]] = {
+            term: (
+                np.asarray(doc_ids_by_term[term], dtype=np.int32),
+                np.asarray(tfs_by_term[term], dtype=np.float64),
+                float(term_idf),
+            )
+            for term, term_idf in zip(terms, idf.tolist())
+        }
+    
+    def get_scores(self, query_tokens: List[str]) -> "np.ndarray":
+        """Return the BM25 score of every document for the query tokens."""
+        scores = np.zeros(self.corpus_size)
+        k1_plus_1 = self.k1 + 1
+        # A term repeated in the query contributes once per occurrence; weight a
+        # single update by its count instead of re-scoring the same postings
+        for term, query_tf in Counter(query_tokens).items():
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            doc_ids, tf, idf = posting
+            scores[doc_ids] += (query_tf * idf * k1_plus_1) * tf / (tf + self._length_norm[doc_ids])
+        return scores
+
+
+def _score_bm25(documents: List[List[str]], query_tokens: List[str]) -> Any:
+    """Score every tokenized document against the query tokens with Okapi BM25."""
+    return _OkapiBM25Index(documents).get_scores(query_tokens)
+
 def _get_cache_key(text: str) -> str:
-    """Generate cache key from text."""
-    return hashlib.md5(text.encode()).hexdigest()
+    """Generate cache key from text (non-cryptographic, in-memory use only)."""
+    return _hash_key_bytes(text.encode())
 
 def _is_cache_valid(timestamp: float) -> bool:
     """Check if cache entry is still valid - legacy function for compatibility."""
@@ -1295,7 +1986,17 @@ def get_openai_client() -> AsyncOpenAI:
     
     return _openai_client
 
-@dataclass
+# Dedicated embeddings clients, one per event loop: their httpx pools cannot cross loops,
+# and the sync wrapper runs each search in its own loop (sometimes in a worker thread)
+_embeddings_clients: Dict[asyncio.AbstractEventLoop, Any] = {}
+
+async def close_embeddings_client() -> None:
+    """Close the running loop's embeddings client, if one was built."""
+    client = _embeddings_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+@dataclass(slots=True)
 class SearchResult:
     """Enhanced search result with content extraction and advanced ranking."""
     title: str
@@ -1311,19 +2012,26 @@ class SearchResult:
     bm25_score: float = 0.0
     semantic_score: float = 0.0
     combined_score: float = 0.0
-    embedding_vector: Optional[List[float]] = None
+    embedding_vector: Optional[Any] = None  # int8 codes when numpy is available, else List[float]
+    embedding_scale: float = 0.0  # Multiplier that dequantizes embedding_vector
+    url_normalized: bool = False  # url already passed through _normalize_result_url
     original_position: Optional[int] = None  # Track original search ranking
     # New ranking signal fields
     domain_boost: float = 1.0
     recency_boost: float = 1.0
     snippet_title_boost: float = 1.0
+    signals_ready: bool = False  # boosts above filled in by _apply_ranking_signals
     # NLI verification metadata
     nli_status: str = "unknown"
     nli_confidence: float = 0.0
     nli_reason: str = ""
     nli_last_claim: str = ""
 
-@dataclass  
+
+# Sort key for ranking; _calculate_combined_scores always stores a float
+_COMBINED_SCORE_KEY = attrgetter('combined_score')
+
+@dataclass(slots=True)
 class PerplexityResponse:
     """Perplexity-style response with synthesized answer and citations."""
     query: str
@@ -1338,10 +2046,36 @@ class PerplexityResponse:
     verification_notes: List[str] = field(default_factory=list)
     verification_details: Dict[str, Any] = field(default_factory=dict)
 
+class _StageTimer:
+    """Context manager measuring one pipeline stage; ``seconds`` is set on exit."""
+    __slots__ = ("_service", "_stage", "_query", "_start_ns", "seconds")
+    
+    def __init__(self, service: "PerplexityWebSearchService", stage: str, query: str):
+        self._service = service
+        self._stage = stage
+        self._query = query
+        self._start_ns = 0
+        self.seconds = 0.0
+    
+    def __enter__(self) -> "_StageTimer":
+        self._start_ns = time.perf_counter_ns()
+        return self
+    
+    def __exit__(self, *exc_info) -> bool:
+        self.seconds = (time.perf_counter_ns() - self._start_ns) / 1e9
+        self._service._log_stage_timing(self._stage, self.seconds, self._query)
+        return False
+
 class PerplexityWebSearchService:
     """Enhanced web search service with Perplexity-like answer synthesis and proper lifecycle management."""
     
-    def __init__(self):
+    def __init__(self, persistent: bool = True):
+        """Create the service.
+        
+        A persistent service (the default, as used by get_perplexity_service) keeps its
+        session and NLI client open across queries until close(); pass persistent=False
+        for a one-off instance that releases them after every perplexity_search call.
+        """
         self.max_content_length = 8000  # Max chars per source
         self.max_synthesis_sources = 8  # Max sources for synthesis
         self.timeout = aiohttp.ClientTimeout(total=15, connect=5)
@@ -1355,12 +2089,17 @@ class PerplexityWebSearchService:
         }
         self._session = None  # Reusable session
         self._closed = False
+        self._persistent = persistent
         # NLI verification resources
         self._nli_client = None
         self._nli_model = None
         self._nli_provider = None
         self._nli_lock = asyncio.Lock()
     
+    def _stage(self, stage: str, query: str) -> "_StageTimer":
+        """Time a block with perf_counter_ns and log it via _log_stage_timing on exit."""
+        return _StageTimer(self, stage, query)
+    
     def _log_stage_timing(self, stage: str, duration: float, query: str) -> None:
         """Utility to log stage timing with consistent formatting."""
         try:
@@ -1417,18 +2156,11 @@ class PerplexityWebSearchService:
             raise RuntimeError("Service is closed")
             
         if self._session is None or self._session.closed:
-            connector = aiohttp.TCPConnector(
-                limit=10,  # Total connection pool size
-                limit_per_host=5,  # Connections per host
-                ttl_dns_cache=300,
-                use_dns_cache=True,
-                force_close=True,  # Force close connections after use
-                enable_cleanup_closed=True  # Enable cleanup of closed connections
-            )
             self._session = aiohttp.ClientSession(
                 timeout=self.timeout, 
                 headers=self.headers,
-                connector=connector
+                connector=_get_shared_connector(),
+                connector_owner=False  # Pooled keep-alive connections outlive the session
             )
         return self._session
 
@@ -1461,50 +2193,26 @@ class PerplexityWebSearchService:
         """Normalize URLs for deduplication and consistent citation mapping."""
         if not url:
             return ""
-        normalized = url.strip()
-        if normalized.startswith("//"):
-            normalized = "https:" + normalized
-        if not normalized.lower().startswith(("http://", "https://")):
-            normalized = "https://" + normalized
-        try:
-            parsed = urlparse(normalized)
-            scheme = parsed.scheme.lower() if parsed.scheme else "https"
-            netloc = parsed.netloc.lower()
-            if netloc.endswith(":80"):
-                netloc = netloc[:-3]
-            elif netloc.endswith(":443"):
-                netloc = netloc[:-4]
-            path = re.sub(r"/+", "/", parsed.path or "/")
-            if path != "/" and path.endswith("/"):
-                path = path[:-1]
-            tracking_keys = {"fbclid", "gclid", "msclkid", "ref", "ref_src", "referrer", "source", "code"}
-            query_items: List[Tuple[str, str]] = []
-            for key, value in parse_qsl(parsed.query, keep_blank_values=False):
-                lower_key = key.lower()
-                if lower_key.startswith("utm_") or lower_key in tracking_keys:
-                    continue
-                query_items.append((key, value))
-            query_str = urlencode(query_items, doseq=True)
-            return urlunparse((scheme, netloc, path, "", query_str, ""))
-        except Exception:
-            return normalized
+        return _normalize_result_url_cached(url)
 
     def _deduplicate_results(self, results: List[SearchResult]) -> List[SearchResult]:
-        """Remove duplicate results based on normalized URL while preserving order."""
-        seen_keys: set[str] = set()
-        deduplicated: List[SearchResult] = []
+        """Remove duplicate and denylisted results based on normalized URL while preserving order."""
+        # First result per key wins; dict insertion order keeps the input ranking
+        unique: Dict[Any, SearchResult] = {}
         for result in results:
             if not isinstance(result, SearchResult):
                 continue
-            normalized_url = self._normalize_result_url(result.url)
-            result.url = normalized_url
-            dedup_key = normalized_url or (result.title.strip().lower() if result.title else "")
-            if dedup_key and dedup_key in seen_keys:
+            if not result.url_normalized:
+                result.url = self._normalize_result_url(result.url)
+                result.url_normalized = True
+            normalized_url = result.url
+            if normalized_url and _is_malicious_host(urlparse(normalized_url).hostname or ""):
+                logger.debug(f"Dropped result from denylisted domain: {normalized_url}")
                 continue
-            if dedup_key:
-                seen_keys.add(dedup_key)
-            deduplicated.append(result)
-        return deduplicated
+            dedup_key = normalized_url or (result.title.strip().lower() if result.title else "")
+            # Results with neither URL nor title cannot collide with anything
+            unique.setdefault(dedup_key or id(result), result)
+        return list(unique.values())
         
     async def perplexity_search(
         self,
@@ -1527,43 +2235,52 @@ class PerplexityWebSearchService:
         Returns:
             PerplexityResponse with synthesized answer and citations
         """
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
         synthesized_query = query
         
         try:
+            # Step 0: Reuse the response of a recent paraphrase of this query.
+            # Time-bounded searches skip it so freshness requests always re-search.
+            semantic_bucket = None
+            query_embedding = None
+            if NUMPY_AVAILABLE and not time_limit and not include_recent:
+                query_embedding = await self._get_query_embedding(query)
+                if query_embedding is not None:
+                    semantic_bucket = _semantic_cache_bucket(query, max_results, synthesize_answer)
+                    cached_response = _semantic_response_cache.get(semantic_bucket, query_embedding)
+                    if cached_response is not None:
+                        logger.info(f"Semantic cache hit for '{query}' (stored for '{cached_response.query}')")
+                        # Callers own (and may annotate) what they get back, never the cached objects
+                        return replace(
+                            copy.deepcopy(cached_response),
+                            query=query,
+                            total_time=(time.perf_counter_ns() - start_ns) / 1e9
+                        )
+            
             # Step 1: Enhanced web search with content extraction
-            search_start = datetime.now()
-            stage_start = time.perf_counter()
-            try:
+            with self._stage("enhanced_web_search", query) as search_stage:
                 search_results, synthesized_query = await self._enhanced_web_search(query, max_results, include_recent, time_limit)
-            finally:
-                self._log_stage_timing("enhanced_web_search", time.perf_counter() - stage_start, query)
-            search_time = (datetime.now() - search_start).total_seconds()
+            search_time = search_stage.seconds
             
             # Step 2: Content extraction and enhancement
-            content_stage_start = time.perf_counter()
-            try:
+            with self._stage("extract_and_enhance_content", query):
                 enhanced_results = await self._extract_and_enhance_content(search_results)
-            finally:
-                self._log_stage_timing("extract_and_enhance_content", time.perf_counter() - content_stage_start, query)
             
             # Step 3: Enhanced ranking with BM25 and semantic similarity
             if enhanced_results:
-                # Calculate BM25 scores
-                enhanced_results = self._calculate_bm25_scores(query, enhanced_results)
-                
-                # Calculate semantic similarity scores using Azure embeddings
-                semantic_stage_start = time.perf_counter()
-                try:
-                    enhanced_results = await self._calculate_semantic_scores(query, enhanced_results)
-                finally:
-                    self._log_stage_timing("calculate_semantic_scores", time.perf_counter() - semantic_stage_start, query)
+                # BM25 (CPU-bound, writes bm25_score) runs in a worker thread while semantic
+                # scoring (waits on Azure embeddings, writes semantic_score) runs on the loop
+                with self._stage("bm25_and_semantic_scores", query):
+                    _, enhanced_results = await asyncio.gather(
+                        asyncio.to_thread(self._calculate_bm25_scores, query, enhanced_results),
+                        self._calculate_semantic_scores(query, enhanced_results)
+                    )
                 
                 # Combine all ranking signals
                 enhanced_results = self._calculate_combined_scores(enhanced_results)
 
-                # Re-sort by combined score (descending)
-                enhanced_results.sort(key=lambda x: (x.combined_score or 0.0), reverse=True)
+                # Re-sort by combined score (descending); every candidate is kept, so a full sort
+                enhanced_results.sort(key=_COMBINED_SCORE_KEY, reverse=True)
 
                 # Remove duplicate URLs while preserving ranking order
                 deduped_results = self._deduplicate_results(enhanced_results)
@@ -1578,11 +2295,12 @@ class PerplexityWebSearchService:
                 if not enhanced_results:
                     logger.warning("No unique search results remained after deduplication")
                 elif not any((r.combined_score or 0.0) > 0 for r in enhanced_results):
-                    logger.warning("Combined ranking produced all zero scores; retaining original ordering for citation IDs")
-                else:
-                    # Reassign citation IDs sequentially according to new ranking so synthesis & citations align with quality order
-                    for idx, r in enumerate(enhanced_results):
-                        r.citation_id = idx + 1
+                    logger.warning("Combined ranking produced all zero scores; citation IDs follow retrieval order")
+
+                # The only citation ID assignment: search results arrive with citation_id=0 and are
+                # numbered once here, after final ranking, so synthesis & citations align with quality order
+                for idx, r in enumerate(enhanced_results, 1):
+                    r.citation_id = idx
 
                 # Debug log top ranked sources with component scores
                 try:
@@ -1601,11 +2319,8 @@ class PerplexityWebSearchService:
                     logger.debug(f"Failed logging top ranked sources: {dbg_err}")
             
             # Step 4: Generate ranked citation summary for downstream models
-            summary_stage_start = time.perf_counter()
-            try:
+            with self._stage("summarize_citations", query):
                 answer = self._summarize_ranked_citations(enhanced_results)
-            finally:
-                self._log_stage_timing("summarize_citations", time.perf_counter() - summary_stage_start, query)
 
             answer = self._merge_adjacent_citations(answer)
 
@@ -1616,12 +2331,12 @@ class PerplexityWebSearchService:
             # Step 5: Build citations with verification metadata
             citations = self._build_citations(enhanced_results)
             
-            total_time = (datetime.now() - start_time).total_seconds()
+            total_time = (time.perf_counter_ns() - start_ns) / 1e9
             
             # Calculate confidence based on content quality and relevance
             confidence_score = self._calculate_confidence(enhanced_results, answer)
             
-            return PerplexityResponse(
+            response = PerplexityResponse(
                 query=query,
                 synthesized_query=synthesized_query,
                 answer=answer,
@@ -1634,13 +2349,17 @@ class PerplexityWebSearchService:
                 verification_notes=verification_notes,
                 verification_details=verification_details
             )
+            if semantic_bucket is not None and enhanced_results:
+                _semantic_response_cache.put(semantic_bucket, query_embedding, copy.deepcopy(response))
+            return response
         
         finally:
-            # Always cleanup session resources
-            try:
-                await self._close_session()
-            except Exception as cleanup_error:
-                logger.debug(f"Session cleanup error: {cleanup_error}")
+            # Short-lived instances release their session; persistent ones keep it for the next query
+            if not self._persistent:
+                try:
+                    await self._close_session()
+                except Exception as cleanup_error:
+                    logger.debug(f"Session cleanup error: {cleanup_error}")
     
     async def _enhanced_web_search(
         self,
@@ -1653,13 +2372,16 @@ class PerplexityWebSearchService:
 
         Returns both the enhanced list of `SearchResult` objects and the synthesized query
         that was ultimately executed so downstream consumers can surface it to users.
+        Citation IDs are left unassigned; perplexity_search numbers results after ranking.
         """
         cache_key = _build_search_cache_key(query, max_results, include_recent, time_limit)
         cached_payload = _search_cache.get(cache_key)
         cached_enhanced_query: Optional[str] = None
         if cached_payload:
             payload_results: Optional[List[Dict[str, Any]]] = None
-            if isinstance(cached_payload, dict):
+            if isinstance(cached_payload, bytes):
+                payload_results, cached_enhanced_query = _unpack_search_payload(cached_payload)
+            elif isinstance(cached_payload, dict):
                 payload_results = cached_payload.get("results")
                 cached_enhanced_query = cached_payload.get("enhanced_query")
             elif isinstance(cached_payload, list):
@@ -1667,8 +2389,6 @@ class PerplexityWebSearchService:
 
             cached_results = _deserialize_search_results(payload_results)
             if cached_results:
-                for idx, item in enumerate(cached_results):
-                    item.citation_id = idx + 1
                 logger.debug(
                     "Enhanced web search cache hit for query '%s' (results=%d)",
                     query[:80],
@@ -1684,13 +2404,10 @@ class PerplexityWebSearchService:
             async with BraveSearchClient() as brave_client:
                 # OPTIMIZATION: Skip LLM query enhancement for speed (saves 8-20s per search)
                 # Use rule-based enhancement instead which is instant
-                enhance_stage_start = time.perf_counter()
-                try:
+                with self._stage("enhance_search_query", query):
                     # Skip expensive LLM enhancement, use fast rule-based enhancement
                     enhanced_query = self._fallback_enhance_query(query, include_recent)
                     logger.debug(f"Using fast rule-based query enhancement: '{query}' -> '{enhanced_query}'")
-                finally:
-                    self._log_stage_timing("enhance_search_query", time.perf_counter() - enhance_stage_start, query)
                 
                 # Strategy: Try Brave first for high-quality results, then supplement with DDGS
                 brave_results: List[SearchResult] = []
@@ -1698,16 +2415,18 @@ class PerplexityWebSearchService:
                 
                 brave_freshness = None
                 if time_limit:
-                    freshness_map = {'d': 'pd', 'w': 'pw', 'm': 'pm', 'y': 'py'}
-                    brave_freshness = freshness_map.get(time_limit)
+                    brave_freshness = BRAVE_FRESHNESS_BY_TIME_LIMIT.get(time_limit)
                 elif include_recent:
                     brave_freshness = 'pw'  # Past week for recent content
                 
                 brave_raw: List[Dict[str, Any]] = []
-                brave_task: Optional[asyncio.Task] = None
+                ddgs_raw: List[Dict[str, Any]] = []
                 ddgs_task: Optional[asyncio.Task] = None
+                ddgs_count = max(max_results, MIN_SEARCH_RESULTS_THRESHOLD)
                 
                 if brave_client.is_available:
+                    # Hedged race: Brave starts now, DDGS after a short delay; the first
+                    # engine to return enough results wins and the other is cancelled
                     brave_task = asyncio.create_task(
                         brave_client.search(
                             query=enhanced_query,
@@ -1715,30 +2434,22 @@ class PerplexityWebSearchService:
                             freshness=brave_freshness
                         )
                     )
-                    try:
-                        done, _ = await asyncio.wait({brave_task}, timeout=0.65)
-                        if done:
-                            brave_raw = done.pop().result()
-                        else:
-                            ddgs_task = asyncio.create_task(
-                                self._direct_ddgs_search(
-                                    enhanced_query,
-                                    max(max_results, MIN_SEARCH_RESULTS_THRESHOLD),
-                                    time_limit
-                                )
-                            )
-                            brave_raw = await brave_task
-                    except Exception as brave_error:
-                        logger.warning(f"Brave Search failed: {brave_error}")
-                        brave_raw = []
+                    ddgs_task = asyncio.create_task(
+                        self._hedged_ddgs_search(enhanced_query, ddgs_count, time_limit, DDGS_HEDGE_DELAY_SECONDS)
+                    )
+                    done, _ = await asyncio.wait({brave_task, ddgs_task}, return_when=asyncio.FIRST_COMPLETED)
+                    if brave_task not in done:
+                        ddgs_raw = self._search_task_results(ddgs_task, "DDGS search")
+                        ddgs_task = None
+                        if len(ddgs_raw) >= MIN_SEARCH_RESULTS_THRESHOLD:
+                            logger.debug("DDGS answered before Brave; cancelling Brave request")
+                            brave_task.cancel()
+                        await asyncio.wait({brave_task})
+                    brave_raw = self._search_task_results(brave_task, "Brave Search")
                 else:
                     logger.debug("Brave Search unavailable; using DDGS fallback only")
                     ddgs_task = asyncio.create_task(
-                        self._direct_ddgs_search(
-                            enhanced_query,
-                            max(max_results, MIN_SEARCH_RESULTS_THRESHOLD),
-                            time_limit
-                        )
+                        self._direct_ddgs_search(enhanced_query, ddgs_count, time_limit)
                     )
 
                 if brave_raw:
@@ -1746,7 +2457,7 @@ class PerplexityWebSearchService:
                         brave_client.log_quality_metrics(brave_raw, enhanced_query)
                     except Exception as metric_error:
                         logger.debug(f"Brave quality metrics logging failed: {metric_error}")
-                    for idx, result in enumerate(brave_raw):
+                    for result in brave_raw:
                         normalized_url = self._normalize_result_url(result.get('url', ''))
                         search_result = SearchResult(
                             title=result.get('title', ''),
@@ -1756,40 +2467,24 @@ class PerplexityWebSearchService:
                             relevance_score=result.get('relevance_score', 0.8),
                             timestamp=result.get('timestamp', datetime.now().isoformat()),
                             source='brave_search',
-                            citation_id=idx + 1
+                            url_normalized=True
                         )
-                        brave_results.append(search_result)
+                        brave_results.append(_apply_ranking_signals(search_result))
                     logger.info(f"Brave Search (enhanced quality): {len(brave_results)} results")
 
                 # Step 2: Supplement with DDGS if needed (fallback strategy)
                 remaining_needed = max_results - len(brave_results)
                 need_ddgs = remaining_needed > 0 or len(brave_results) < MIN_SEARCH_RESULTS_THRESHOLD
-                ddgs_raw: List[Dict[str, Any]] = []
-                if need_ddgs:
-                    if ddgs_task is None:
-                        ddgs_task = asyncio.create_task(
-                            self._direct_ddgs_search(
-                                enhanced_query,
-                                max(remaining_needed, MIN_SEARCH_RESULTS_THRESHOLD),
-                                time_limit
-                            )
-                        )
-                    try:
-                        ddgs_raw = await ddgs_task
-                    except asyncio.CancelledError:
-                        ddgs_raw = []
-                    except Exception as e:
-                        logger.warning(f"DDGS search failed: {e}")
-                        ddgs_raw = []
-                else:
-                    if ddgs_task:
+                if ddgs_task is not None:
+                    if need_ddgs:
+                        await asyncio.wait({ddgs_task})
+                        ddgs_raw = self._search_task_results(ddgs_task, "DDGS search")
+                    else:
                         ddgs_task.cancel()
-                        with suppress(asyncio.CancelledError):
-                            await ddgs_task
+                        await asyncio.wait({ddgs_task})
 
                 if ddgs_raw:
-                    start_citation_id = len(brave_results) + 1
-                    for idx, result in enumerate(ddgs_raw):
+                    for result in ddgs_raw:
                         normalized_url = self._normalize_result_url(result.get('url', ''))
                         search_result = SearchResult(
                             title=result.get('title', ''),
@@ -1799,9 +2494,9 @@ class PerplexityWebSearchService:
                             relevance_score=result.get('relevance_score', 0.6),  # Lower base score than Brave
                             timestamp=datetime.now().isoformat(),
                             source='ddgs_search',
-                            citation_id=start_citation_id + idx
+                            url_normalized=True
                         )
-                        ddgs_results.append(search_result)
+                        ddgs_results.append(_apply_ranking_signals(search_result))
                     logger.info(f"DDGS Search (supplemental): {len(ddgs_results)} results")
             
             # Step 3: Combine and prioritize results (Brave first, then DDGS)
@@ -1821,19 +2516,12 @@ class PerplexityWebSearchService:
             # Limit to requested number of results
             final_results = deduplicated_results[:max_results]
             
-            # Update citation IDs for final ordering
-            for idx, result in enumerate(final_results):
-                result.citation_id = idx + 1
-            
             logger.info(f"Enhanced search completed: {len(final_results)} total results "
                        f"({len(brave_results)} from Brave, {len(ddgs_results)} from DDGS)")
 
             _search_cache.put(
                 cache_key,
-                {
-                    "results": _serialize_search_results(final_results),
-                    "enhanced_query": enhanced_query
-                }
+                _pack_search_payload(_serialize_search_results(final_results), enhanced_query)
             )
             return final_results, enhanced_query
                 
@@ -1843,7 +2531,7 @@ class PerplexityWebSearchService:
             try:
                 raw_results = await self._direct_ddgs_search(enhanced_query, max_results, time_limit)
                 
-                for idx, result in enumerate(raw_results):
+                for result in raw_results:
                     normalized_url = self._normalize_result_url(result.get('url', ''))
                     search_result = SearchResult(
                         title=result.get('title', ''),
@@ -1853,64 +2541,48 @@ class PerplexityWebSearchService:
                         relevance_score=result.get('relevance_score', 0.5),
                         timestamp=datetime.now().isoformat(),
                         source='ddgs_fallback',
-                        citation_id=idx + 1
+                        url_normalized=True
                     )
-                    search_results.append(search_result)
+                    search_results.append(_apply_ranking_signals(search_result))
             except Exception as fallback_error:
                 logger.error(f"Fallback search also failed: {fallback_error}")
                 search_results = []
 
         if search_results:
             search_results = self._deduplicate_results(search_results)
-            for idx, result in enumerate(search_results):
-                result.citation_id = idx + 1
             _search_cache.put(
                 cache_key,
-                {
-                    "results": _serialize_search_results(search_results),
-                    "enhanced_query": enhanced_query
-                }
+                _pack_search_payload(_serialize_search_results(search_results), enhanced_query)
             )
         
         return search_results, enhanced_query
     
+    async def _hedged_ddgs_search(
+        self,
+        query: str,
+        max_results: int,
+        time_limit: Optional[str],
+        delay: float
+    ) -> List[Dict[str, Any]]:
+        """Run DDGS after ``delay`` seconds so a fast primary search can cancel it for free."""
+        await asyncio.sleep(delay)
+        return await self._direct_ddgs_search(query, max_results, time_limit)
+    
+    @staticmethod
+    def _search_task_results(task: asyncio.Task, engine: str) -> List[Dict[str, Any]]:
+        """Return a finished search task's results, logging and swallowing its failure."""
+        if task.cancelled():
+            return []
+        error = task.exception()
+        if error is not None:
+            logger.warning(f"{engine} failed: {error}")
+            return []
+        return task.result()
+    
     async def _direct_ddgs_search(self, query: str, max_results: int, time_limit: Optional[str] = None) -> List[Dict[str, Any]]:
         """Direct DDGS search implementation with improved async handling."""
         import random
 
-        def _normalize_url(url: str) -> str:
-            if not url:
-                return ''
-            url = url.strip()
-            if url.startswith('//'):
-                url = 'https:' + url
-            if not url.lower().startswith(('http://', 'https://')):
-                url = 'https://' + url
-            try:
-                parsed = urlparse(url)
-                scheme = parsed.scheme.lower() if parsed.scheme else 'https'
-                if scheme == 'http' and not parsed.netloc.startswith(('localhost', '127.0.0.1')):
-                    scheme = 'https'
-                netloc = parsed.netloc.lower()
-                if netloc.endswith(':80'):
-                    netloc = netloc[:-3]
-                elif netloc.endswith(':443'):
-                    netloc = netloc[:-4]
-                path = re.sub(r'/+', '/', parsed.path or '/')
-                if path != '/' and path.endswith('/'):
-                    path = path[:-1]
-                tracking_keys = {'fbclid','gclid','msclkid','ref','ref_src','referrer','source','code'}
-                query_items = []
-                for k,v in parse_qsl(parsed.query, keep_blank_values=False):
-                    lk = k.lower()
-                    if lk.startswith('utm_') or lk in tracking_keys:
-                        continue
-                    query_items.append((k,v))
-                query_str = urlencode(query_items, doseq=True)
-                return urlunparse((scheme, netloc, path, '', query_str, ''))
-            except Exception:
-                return url
-
         def _search_ddgs():
             """Run DDGS search in thread with better error handling."""
             try:
@@ -1943,7 +2615,7 @@ class PerplexityWebSearchService:
                     results = []
                     for result in search_results:
                         title = result.get('title', '')
-                        url = _normalize_url(result.get('href', ''))
+                        url = _normalize_url_cached(result.get('href', ''))
                         snippet = result.get('body', '')
                         
                         # Filter irrelevant results
@@ -1963,18 +2635,10 @@ class PerplexityWebSearchService:
                 logger.debug(f"DDGS search error: {e}")
                 return []
         
-        # Use asyncio.to_thread for better event loop integration (Python 3.9+)
         try:
+            loop = asyncio.get_running_loop()
             results = await asyncio.wait_for(
-                asyncio.to_thread(_search_ddgs),
-                timeout=10.0
-            )
-            return results
-        except AttributeError:
-            # Fallback for Python < 3.9 using run_in_executor
-            loop = asyncio.get_event_loop()
-            results = await asyncio.wait_for(
-                loop.run_in_executor(None, _search_ddgs),
+                loop.run_in_executor(_get_ddgs_executor(), _search_ddgs),
                 timeout=10.0
             )
             return results
@@ -1987,68 +2651,21 @@ class PerplexityWebSearchService:
     
     def _is_result_relevant(self, query: str, title: str, snippet: str) -> bool:
         """Check if a search result is relevant to the query - made less strict."""
-        query_lower = query.lower()
+        query_words, is_financial_query = _relevance_query_profile(query)
         text_to_check = (title + ' ' + snippet).lower()
         
-        # Extract key terms from query for relevance checking
-        query_words = set(query_lower.split())
-        
         # Check for basic relevance - at least one query word should appear
-        basic_relevance = any(word in text_to_check for word in query_words if len(word) > 2)
-        
-        # If no basic relevance, reject
-        if not basic_relevance:
+        if not any(word in text_to_check for word in query_words):
             return False
         
-        # For financial/stock queries, apply more lenient filtering
-        financial_terms = ['stock', 'share', 'market', 'financial', 'investment', 'analysis', 
-                          'earnings', 'revenue', 'profit', 'nasdaq', 'nyse', 'trading', 'price']
-        stock_symbols = ['msft', 'tsla', 'aapl', 'googl', 'amzn', 'nvda', 'meta']
-        company_names = ['microsoft', 'tesla', 'apple', 'google', 'amazon', 'nvidia', 'meta']
-        
-        is_financial_query = (
-            any(term in query_lower for term in financial_terms) or
-            any(symbol in query_lower for symbol in stock_symbols) or
-            any(company in query_lower for company in company_names)
-        )
-        
         if is_financial_query:
-            # For financial queries, be more lenient - just check for obviously irrelevant content
-            has_financial_content = (
-                any(term in text_to_check for term in financial_terms) or
-                any(symbol in text_to_check for symbol in stock_symbols) or
-                any(company in text_to_check for company in company_names) or
-                'price' in text_to_check or 'chart' in text_to_check or 'quote' in text_to_check or
-                'news' in text_to_check or 'company' in text_to_check or 'business' in text_to_check
-            )
-            
-            # Only filter out obviously irrelevant content
-            clearly_irrelevant_patterns = [
-                'recipe', 'cooking', 'food', 'restaurant menu',
-                'movie plot', 'film review', 'celebrity gossip',
-                'game score', 'sports match', 'weather forecast'
-            ]
-            
-            is_clearly_irrelevant = any(pattern in text_to_check for pattern in clearly_irrelevant_patterns)
-            
-            # Be more permissive - allow if has basic relevance and financial content, or not clearly irrelevant
-            return (has_financial_content or not is_clearly_irrelevant) and basic_relevance
-        
-        # For Japanese financial queries, additional filtering
-        if any(ord(c) > 127 for c in query):  # Japanese query
-            japanese_financial_terms = ['銀行', '金融', '株式', '投資', '経済', '市場', '企業', '会社']
-            
-            is_japanese_financial = any(term in query for term in japanese_financial_terms)
-            if is_japanese_financial:
-                # Allow results with Japanese financial terms or English equivalents
-                has_relevant_content = (
-                    any(term in text_to_check for term in japanese_financial_terms) or
-                    any(term in text_to_check for term in financial_terms) or
-                    basic_relevance
-                )
-                return has_relevant_content
+            # For financial queries, be more lenient - only filter out obviously irrelevant
+            # content, and only scan for it when no financial content vouches for the result
+            if any(marker in text_to_check for marker in _FINANCIAL_CONTENT_MARKERS):
+                return True
+            return not any(pattern in text_to_check for pattern in _CLEARLY_IRRELEVANT_PATTERNS)
         
-        return basic_relevance
+        return True
     
     async def _enhance_search_query(self, query: str, include_recent: bool) -> str:
         """Enhance search query using LLM for intelligent optimization."""
@@ -2150,7 +2767,7 @@ class PerplexityWebSearchService:
             return ""
 
         try:
-            client, model_name, model_config = get_client_for_model(DEFAULT_MODEL)
+            client, model_name, model_config = get_async_client_for_model(DEFAULT_MODEL)
         except Exception as client_error:
             logger.debug(f"Query synthesis client unavailable: {client_error}")
             return ""
@@ -2180,20 +2797,17 @@ class PerplexityWebSearchService:
         max_tokens = max(32, min(96, int(model_config.get("max_completion_tokens", 128) or 128)))
         timeout_seconds = max(8, min(20, int(model_config.get("timeout", 30) or 30)))
 
-        def _call_model():
-            return client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
-
         try:
             response = await asyncio.wait_for(
-                asyncio.to_thread(_call_model),
+                client.chat.completions.create(
+                    model=model_name,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                ),
                 timeout=timeout_seconds
             )
         except Exception as call_error:
@@ -2212,8 +2826,8 @@ class PerplexityWebSearchService:
         if not first_line:
             return ""
 
-        cleaned = re.sub(r"^\d+[\).\-]\s*", "", first_line)
-        cleaned = re.sub(r"^(?:optimized|enhanced|refined|rewritten|revised)\s+query\s*[:：\-]\s*", "", cleaned, flags=re.IGNORECASE)
+        cleaned = _LLM_LIST_NUMBER_RE.sub("", first_line)
+        cleaned = _LLM_QUERY_LABEL_RE.sub("", cleaned)
         cleaned = cleaned.strip("`'\"")
 
         if not cleaned:
@@ -2235,30 +2849,18 @@ class PerplexityWebSearchService:
         simplified = query
         
         # Remove polite request endings that don't help with search
-        japanese_endings = [
-            'してください', 'をお願いします', 'を教えてください', 'について教えて',
-            'を検索してください', 'を調べてください', 'の情報を', 'について',
-            'ください', 'をお願い', 'を教えて', 'を検索', 'を調べ'
-        ]
-        
-        for ending in japanese_endings:
+        for ending in _JA_QUERY_ENDINGS:
             if ending in simplified:
                 simplified = simplified.replace(ending, '')
         
-        # Remove common particles and connecting words that don't help with search
-        # Use word boundaries to avoid removing parts of important words
-        import re
-        
-        # Remove standalone particles
-        particles_to_remove = ['と', 'の', 'を', 'に', 'で', 'から', 'まで', 'が', 'は', 'も', 'へ']
-        
-        for particle in particles_to_remove:
-            # Remove particle when it's connecting words
-            simplified = re.sub(rf'{particle}(?=\S)', ' ', simplified)
+        # Remove particles connecting words, one particle at a time (order matters:
+        # each pass sees the spaces left by the previous ones)
+        for particle_re in _JA_PARTICLE_RES:
+            simplified = particle_re.sub(' ', simplified)
         
         # Remove specific connective phrases
-        simplified = re.sub(r'関連', '', simplified)  # Remove "related to"
-        simplified = re.sub(r'。$', '', simplified)    # Remove final period
+        simplified = simplified.replace('関連', '')  # Remove "related to"
+        simplified = _JA_TRAILING_PERIOD_RE.sub('', simplified)  # Remove final period
         
         # Clean up extra spaces
         simplified = ' '.join(simplified.split())
@@ -2271,42 +2873,20 @@ class PerplexityWebSearchService:
     
     def _get_optimal_ddgs_region(self, query: str) -> str:
         """Determine optimal DDGS region based on query characteristics."""
-        # Check if query contains Japanese characters
-        has_japanese = any('\u3040' <= char <= '\u309F' or  # Hiragana
-                          '\u30A0' <= char <= '\u30FF' or  # Katakana
-                          '\u4E00' <= char <= '\u9FAF'     # Kanji
-                          for char in query)
-        
-        # Check for explicit region indicators
-        query_lower = query.lower()
-        
-        if has_japanese or 'japan' in query_lower or 'japanese' in query_lower or '日本' in query:
-            return 'jp-jp'  # Japan
-        elif 'china' in query_lower or 'chinese' in query_lower or '中国' in query:
-            return 'cn-zh'  # China
-        elif 'korea' in query_lower or 'korean' in query_lower or '韓国' in query:
-            return 'kr-kr'  # Korea
-        elif 'europe' in query_lower or 'european' in query_lower:
-            return 'eu-en'  # Europe
-        elif 'usa' in query_lower or 'america' in query_lower or 'us ' in query_lower:
-            return 'us-en'  # United States
-        
-        # Default to configured region or Japan (your primary market)
-        return DDGS_REGION or 'jp-jp'
+        return _optimal_ddgs_region(query)
     
     def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """Calculate cosine similarity between two vectors."""
-        if SKLEARN_AVAILABLE:
-            import numpy as np
-            from sklearn.metrics.pairwise import cosine_similarity
-            v1 = np.array(vec1).reshape(1, -1)
-            v2 = np.array(vec2).reshape(1, -1)
-            return cosine_similarity(v1, v2)[0][0]
+        if NUMPY_AVAILABLE:
+            v1 = np.asarray(vec1, dtype=np.float32)
+            v2 = np.asarray(vec2, dtype=np.float32)
+            denominator = float(np.linalg.norm(v1) * np.linalg.norm(v2))
+            return float(v1 @ v2) / denominator if denominator else 0.0
         else:
-            # Fallback implementation
-            dot_product = sum(a * b for a, b in zip(vec1, vec2))
-            magnitude1 = math.sqrt(sum(a * a for a in vec1))
-            magnitude2 = math.sqrt(sum(a * a for a in vec2))
+            # Fallback implementation; map(mul) keeps the products in C
+            dot_product = sum(map(mul, vec1, vec2))
+            magnitude1 = math.sqrt(sum(map(mul, vec1, vec1)))
+            magnitude2 = math.sqrt(sum(map(mul, vec2, vec2)))
             
             if magnitude1 == 0 or magnitude2 == 0:
                 return 0.0
@@ -2315,114 +2895,36 @@ class PerplexityWebSearchService:
     
     def _detect_language(self, text: str) -> str:
         """Improved language detection with better thresholds and more language support."""
-        if not text:
-            return 'en'
-        
-        text_len = len(text)
-        if text_len == 0:
-            return 'en'
-        
-        # Count different character sets
-        japanese_chars = sum(1 for char in text if 
-                           '\u3040' <= char <= '\u309F' or  # Hiragana
-                           '\u30A0' <= char <= '\u30FF' or  # Katakana
-                           '\u4E00' <= char <= '\u9FAF')    # Kanji
-        
-        # Chinese specific characters (not in Japanese)
-        chinese_chars = sum(1 for char in text if 
-                          '\u4E00' <= char <= '\u9FAF' and  # CJK Unified Ideographs
-                          char not in '\u4E00\u4E01\u4E03\u4E07\u4E08\u4E09\u4E0A\u4E0B\u4E0D\u4E0E\u4E10')  # Common JP kanji
-        
-        # Korean characters
-        korean_chars = sum(1 for char in text if 
-                         '\uAC00' <= char <= '\uD7AF' or  # Hangul syllables
-                         '\u1100' <= char <= '\u11FF')    # Hangul Jamo
-        
-        # Arabic characters
-        arabic_chars = sum(1 for char in text if '\u0600' <= char <= '\u06FF')
-        
-        # Cyrillic characters
-        cyrillic_chars = sum(1 for char in text if '\u0400' <= char <= '\u04FF')
-        
-        # Thai characters
-        thai_chars = sum(1 for char in text if '\u0E00' <= char <= '\u0E7F')
-        
-        # Calculate ratios with better thresholds
-        japanese_ratio = japanese_chars / text_len
-        chinese_ratio = chinese_chars / text_len
-        korean_ratio = korean_chars / text_len
-        arabic_ratio = arabic_chars / text_len
-        cyrillic_ratio = cyrillic_chars / text_len
-        thai_ratio = thai_chars / text_len
-        
-        # Use higher thresholds to avoid false positives
-        # A text needs at least 5% of characters from a script to be considered that language
-        min_threshold = 0.05
-        
-        # Prioritize detection based on character density
-        if japanese_ratio > min_threshold and japanese_ratio >= chinese_ratio:
-            return 'ja'
-        elif korean_ratio > min_threshold:
-            return 'ko'
-        elif chinese_ratio > min_threshold and chinese_ratio > japanese_ratio:
-            return 'zh'
-        elif arabic_ratio > min_threshold:
-            return 'ar'
-        elif cyrillic_ratio > min_threshold:
-            return 'ru'
-        elif thai_ratio > min_threshold:
-            return 'th'
-        
-        # Fallback: check for common language indicators in Latin script
-        # Use word boundaries to avoid false matches
-        import re
-        text_lower = text.lower()
-        
-        # Helper function to check for whole words only
-        def has_whole_words(text_to_check, words):
-            """Check if text contains any of the words as whole words (with word boundaries)."""
-            for word in words:
-                # Use word boundaries to match whole words only
-                if re.search(r'\b' + re.escape(word) + r'\b', text_to_check):
-                    return True
-            return False
-        
-        # German indicators (whole words only)
-        if has_whole_words(text_lower, ['der', 'die', 'das', 'und', 'ich', 'ist', 'mit', 'nicht', 'sie', 'auch', 'auf']):
-            return 'de'
-        # French indicators (whole words only)
-        elif has_whole_words(text_lower, ['le', 'la', 'les', 'et', 'un', 'une', 'est', 'sont', 'dans', 'pour', 'avec']):
-            # Avoid false positive from English "analysis" containing "al"
-            if not has_whole_words(text_lower, ['stock', 'price', 'company', 'market', 'analysis', 'financial']):
-                return 'fr'
-        # Spanish indicators (whole words only)
-        elif has_whole_words(text_lower, ['el', 'la', 'los', 'las', 'y', 'un', 'una', 'es', 'son', 'está', 'están']):
-            # Avoid false positive from English words containing Spanish words
-            if not has_whole_words(text_lower, ['stock', 'price', 'company', 'market', 'analysis', 'financial']):
-                return 'es'
-        # Italian indicators (whole words only)
-        elif any(word in text_lower for word in ['il', 'la', 'i', 'le', 'di', 'che', 'è', 'sono', 'per', 'con', 'da']):
-            if not has_whole_words(text_lower, ['stock', 'price', 'company', 'market', 'analysis', 'financial']):
-                return 'it'
-        
-        # Default to English
-        return 'en'
+        return BraveSearchClient._detect_language(text)
     
     def _preprocess_text(self, text: str) -> List[str]:
-        """Enhanced text preprocessing for BM25 scoring with Japanese support."""
+        """Enhanced text preprocessing for BM25 scoring with Japanese support.
+        
+        Results are memoized in _preprocess_cache; callers must not mutate them.
+        """
         try:
             if not text:
                 return []
             
+            tokens = _preprocess_cache.get(text)
+            if tokens is not None:
+                return tokens
+            
             # Detect language for appropriate processing
             language = self._detect_language(text)
             
             if language == 'ja':
                 # Japanese text processing
-                return self._preprocess_japanese_text(text)
+                tokens = self._preprocess_japanese_text(text)
             else:
                 # English/Latin text processing
-                return self._preprocess_english_text(text)
+                tokens = self._preprocess_english_text(text)
+            
+            with _preprocess_cache_lock:
+                if len(_preprocess_cache) >= _PREPROCESS_CACHE_SIZE:
+                    _preprocess_cache.pop(next(iter(_preprocess_cache)), None)
+                _preprocess_cache[text] = tokens
+            return tokens
                 
         except Exception:
             # Minimal fallback
@@ -2443,7 +2945,7 @@ class PerplexityWebSearchService:
                 pass
                 # Fallback: Character-based n-grams for Japanese
                 # Remove punctuation but keep Japanese characters
-                clean_text = re.sub(r'[^\w\s]', '', text)
+                clean_text = _NON_WORD_RE.sub('', text)
                 
                 # Generate character bi-grams and tri-grams for better matching
                 tokens = []
@@ -2476,7 +2978,7 @@ class PerplexityWebSearchService:
         """English-specific text preprocessing for BM25."""
         try:
             # Single regex pass for better performance
-            text = re.sub(r'[^\w\s]', ' ', text.lower())
+            text = _NON_WORD_RE.sub(' ', text.lower())
             
             # Optimize: List comprehension with length filter
             tokens = [word for word in text.split() 
@@ -2487,6 +2989,22 @@ class PerplexityWebSearchService:
             # Minimal fallback
             return [word.lower() for word in text.split()[:50] if len(word) > 2]
     
+    def _preprocess_documents(self, texts: List[str]) -> List[List[str]]:
+        """Tokenize a batch of BM25 documents.
+        
+        ASCII text can never be detected as Japanese, so an all-ASCII batch is
+        lowercased and cleaned in one regex pass over the joined texts and split
+        back per document; anything else goes through _preprocess_text.
+        """
+        combined = _DOC_SEPARATOR.join(texts)
+        if combined.isascii() and combined.count(_DOC_SEPARATOR) == len(texts) - 1:
+            cleaned = _NON_WORD_RE.sub(' ', combined.lower()).split(_DOC_SEPARATOR)
+            return [
+                [word for word in doc.split() if 2 < len(word) < 20 and word.isalpha()][:100]
+                for doc in cleaned
+            ]
+        return [self._preprocess_text(text) for text in texts]
+    
     def _calculate_bm25_scores(self, query: str, results: List[SearchResult]) -> List[SearchResult]:
         """Calculate BM25 relevance scores with performance optimizations."""
         if not results:
@@ -2494,7 +3012,7 @@ class PerplexityWebSearchService:
         
         try:
             # Optimize: Prepare documents more efficiently
-            documents = []
+            full_texts = []
             for result in results:
                 # Optimize: Smarter text combination with priorities
                 text_parts = []
@@ -2511,9 +3029,9 @@ class PerplexityWebSearchService:
                 if result.content:
                     text_parts.append(result.content[:500])  # Reduced from 1000
                 
-                full_text = " ".join(text_parts)
-                tokenized = self._preprocess_text(full_text)
-                documents.append(tokenized)
+                full_texts.append(" ".join(text_parts))
+            
+            documents = self._preprocess_documents(full_texts)
             
             if not documents or not any(documents):
                 # Fallback to relevance scores
@@ -2521,38 +3039,22 @@ class PerplexityWebSearchService:
                     result.bm25_score = result.relevance_score
                 return results
             
-            # Create BM25 index with optimizations
-            bm25 = BM25Okapi(documents)
-            
             # Optimize: Process query tokens once
             query_tokens = self._preprocess_text(query)
             if query_tokens:
-                scores = bm25.get_scores(query_tokens)
+                scores = np.asarray(_score_bm25(documents, query_tokens), dtype=np.float64)
                 
-                # Fix: Proper BM25 score normalization
-                # BM25 scores can be negative, so we need min-max normalization
-                if hasattr(scores, 'size') and scores.size > 0:
-                    min_score = scores.min()
-                    max_score = scores.max()
-                    if max_score > min_score:
-                        # Min-max normalization to 0-1 range
-                        scores = (scores - min_score) / (max_score - min_score)
-                    else:
-                        # All scores are the same, set to 0.5
-                        scores = scores * 0 + 0.5
-                elif scores:  # Handle list case
-                    min_score = min(scores)
-                    max_score = max(scores)
-                    if max_score > min_score:
-                        # Min-max normalization to 0-1 range
-                        scores = [(score - min_score) / (max_score - min_score) for score in scores]
-                    else:
-                        # All scores are the same, set to 0.5
-                        scores = [0.5] * len(scores)
+                # BM25 scores can be negative, so min-max normalize to 0-1;
+                # identical scores carry no ranking signal and map to 0.5
+                span = float(np.ptp(scores))
+                if span > 0:
+                    scores = (scores - scores.min()) / span
+                else:
+                    scores = np.full(scores.shape, 0.5)
                 
-                # Update results efficiently
-                for result, score in zip(results, scores):
-                    result.bm25_score = float(score)
+                # tolist() hands back Python floats in one C pass
+                for result, score in zip(results, scores.tolist()):
+                    result.bm25_score = score
             
         except Exception as e:
             logger.debug(f"BM25 scoring failed: {e}")
@@ -2563,26 +3065,38 @@ class PerplexityWebSearchService:
         return results
     
     async def _get_azure_embeddings_client(self):
-        """Get Azure OpenAI embeddings client for semantic similarity."""
+        """Get Azure OpenAI embeddings client for semantic similarity.
+        
+        The process-wide async Azure client is not used: its connection pool is bound
+        to the first event loop, while the sync wrapper runs every search in a fresh
+        one. A dedicated client is built once per running loop and kept until
+        close_embeddings_client() runs on that loop.
+        """
         if not AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT or not AZURE_OPENAI_API_KEY:
             return None
         
+        # Construction never awaits, so callers sharing this loop cannot race here
+        loop = asyncio.get_running_loop()
+        client = _embeddings_clients.get(loop)
+        if client is None:
+            # Forget clients left behind by loops that have since been closed
+            for stale_loop in [l for l in list(_embeddings_clients) if l.is_closed()]:
+                _embeddings_clients.pop(stale_loop, None)
+            client = self._build_embeddings_client()
+            if client is not None:
+                _embeddings_clients[loop] = client
+        return client
+    
+    @staticmethod
+    def _build_embeddings_client():
+        """Build a dedicated async embeddings client, or None if neither variant can be created."""
         try:
-            # Try Azure client first (using AzureOpenAI for proper Azure support)
-            from openai import AzureOpenAI
-            client = AzureOpenAI(
-                api_key=AZURE_OPENAI_API_KEY,
-                api_version=AZURE_OPENAI_API_VERSION or "2024-02-01",
-                azure_endpoint=AZURE_OPENAI_ENDPOINT
-            )
-            # Convert to async client
             from openai import AsyncAzureOpenAI
-            async_client = AsyncAzureOpenAI(
+            return AsyncAzureOpenAI(
                 api_key=AZURE_OPENAI_API_KEY,
                 api_version=AZURE_OPENAI_API_VERSION or "2024-02-01",
                 azure_endpoint=AZURE_OPENAI_ENDPOINT
             )
-            return async_client
         except Exception as e:
             logger.debug(f"Failed to create Azure embeddings client: {e}")
             # Fallback to standard AsyncOpenAI without api_version
@@ -2596,6 +3110,29 @@ class PerplexityWebSearchService:
                 logger.debug(f"Fallback embeddings client also failed: {fallback_e}")
                 return None
     
+    async def _get_query_embedding(self, query: str) -> Optional[Any]:
+        """Embed a query once, sharing the result with semantic scoring via _embeddings_cache."""
+        query_cache_key = _get_cache_key(f"query_embedding:{query}")
+        query_embedding = _embeddings_cache.get(query_cache_key)
+        if query_embedding is not None:
+            return query_embedding
+        
+        embeddings_client = await self._get_azure_embeddings_client()
+        if not embeddings_client:
+            return None
+        try:
+            response = await embeddings_client.embeddings.create(
+                input=[query],
+                model=AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT,
+                timeout=5.0
+            )
+            query_embedding = _unit_embedding(response.data[0].embedding)
+            _embeddings_cache.put(query_cache_key, query_embedding)
+            return query_embedding
+        except Exception as e:
+            logger.debug(f"Query embedding failed: {e}")
+            return None
+    
     async def _calculate_semantic_scores(self, query: str, results: List[SearchResult]) -> List[SearchResult]:
         """Calculate semantic similarity scores using Azure text embeddings with improved rerank window and batching."""
         if not results:
@@ -2621,17 +3158,10 @@ class PerplexityWebSearchService:
                     result.semantic_score = result.relevance_score
                 return results
             
-            # Get query embedding (from cache or fresh)
-            if query_embedding is None:
-                query_task = embeddings_client.embeddings.create(
-                    input=query,
-                    model=AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT,
-                    timeout=20.0
-                )
-            
-            # Prepare batch text with Azure batch size limits (max 16 for text-embedding-ada-002)
-            BATCH_SIZE = 12  # Conservative batch size for Azure limits
-            texts_to_embed = []
+            # Azure caps inputs per embeddings request (16 for text-embedding-ada-002)
+            EMBEDDING_BATCH_LIMIT = 16
+            # Uncached text -> indices of the working results it belongs to
+            texts_to_embed: Dict[str, List[int]] = {}
             cached_embeddings = {}
             
             for i, result in enumerate(working_results):
@@ -2653,95 +3183,90 @@ class PerplexityWebSearchService:
                     cached_embeddings[i] = cached_embedding
                     continue
                 
-                texts_to_embed.append((i, full_text))
-            
-            # Process query and new documents with improved batching
-            tasks = []
-            if query_embedding is None:
-                tasks.append(query_task)
-            
-            # Process documents in batches for better Azure compliance
-            embedding_batches = []
-            if texts_to_embed:
-                # Split into batches respecting Azure limits
-                for i in range(0, len(texts_to_embed), BATCH_SIZE):
-                    batch = texts_to_embed[i:i + BATCH_SIZE]
-                    batch_texts = [text for _, text in batch]
-                    
-                    docs_task = embeddings_client.embeddings.create(
-                        input=batch_texts,
-                        model=AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT,
-                        timeout=30.0
-                    )
-                    embedding_batches.append((docs_task, batch))
+                texts_to_embed.setdefault(full_text, []).append(i)
             
-            # Await query embedding first
-            if query_embedding is None and tasks:
-                query_response = await tasks[0]
-                
-                # Handle failures gracefully
-                if isinstance(query_response, Exception):
-                    logger.debug(f"Query embedding failed: {query_response}")
-                    for result in results:
-                        result.semantic_score = result.relevance_score
-                    return results
-                
-                query_embedding = query_response.data[0].embedding
-                
-                # Cache query embedding using LRU cache
-                _embeddings_cache.put(query_cache_key, query_embedding)
+            # Embed the query (if uncached) and every uncached document together,
+            # so a full rerank window normally costs a single round-trip
+            doc_texts = list(texts_to_embed)
+            inputs = ([query] if query_embedding is None else []) + doc_texts
+            query_offset = 1 if query_embedding is None else 0
             
-            # Process document embeddings in batches
-            if embedding_batches:
-                batch_tasks = [batch_task for batch_task, _ in embedding_batches]
-                batch_responses = await asyncio.gather(*batch_tasks, return_exceptions=True)
+            if inputs:
+                batches = [
+                    inputs[start:start + EMBEDDING_BATCH_LIMIT]
+                    for start in range(0, len(inputs), EMBEDDING_BATCH_LIMIT)
+                ]
+                batch_responses = await asyncio.gather(
+                    *(
+                        embeddings_client.embeddings.create(
+                            input=batch,
+                            model=AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT,
+                            timeout=30.0
+                        )
+                        for batch in batches
+                    ),
+                    return_exceptions=True
+                )
                 
-                for (batch_task, batch_docs), batch_response in zip(embedding_batches, batch_responses):
-                    if not isinstance(batch_response, Exception):
-                        for (doc_idx, doc_text), embedding_data in zip(batch_docs, batch_response.data):
-                            # Cache document embedding using LRU cache
-                            doc_cache_key = _get_cache_key(f"doc_embedding:{doc_text}")
-                            _embeddings_cache.put(doc_cache_key, embedding_data.embedding)
-                            cached_embeddings[doc_idx] = embedding_data.embedding
-                    else:
+                embedded: List[Optional[Any]] = []
+                for batch, batch_response in zip(batches, batch_responses):
+                    if isinstance(batch_response, Exception):
                         logger.debug(f"Embedding batch failed: {batch_response}")
-            
-            # Calculate similarities using cached and fresh embeddings
-            if SKLEARN_AVAILABLE and len(cached_embeddings) == len(working_results):
-                # Use sklearn's optimized cosine similarity for batch processing
-                import numpy as np
+                        embedded.extend([None] * len(batch))
+                    else:
+                        embedded.extend(_unit_embedding(item.embedding) for item in batch_response.data)
                 
-                doc_embeddings = []
-                for i in range(len(working_results)):
-                    doc_embeddings.append(cached_embeddings[i])
+                if query_offset:
+                    query_embedding = embedded[0]
+                    # Handle failures gracefully
+                    if query_embedding is None:
+                        for result in results:
+                            result.semantic_score = result.relevance_score
+                        return results
+                    # Cache query embedding using LRU cache
+                    _embeddings_cache.put(query_cache_key, query_embedding)
                 
-                doc_embeddings_array = np.array(doc_embeddings)
-                query_embedding_array = np.array([query_embedding])
+                for doc_text, doc_embedding in zip(doc_texts, embedded[query_offset:]):
+                    if doc_embedding is None:
+                        continue
+                    if NUMPY_AVAILABLE:
+                        doc_embedding = _quantize_embedding(doc_embedding)
+                    # Cache document embedding using LRU cache
+                    _embeddings_cache.put(_get_cache_key(f"doc_embedding:{doc_text}"), doc_embedding)
+                    for doc_idx in texts_to_embed[doc_text]:
+                        cached_embeddings[doc_idx] = doc_embedding
+            
+            # Calculate similarities using cached and fresh embeddings
+            if NUMPY_AVAILABLE and cached_embeddings:
+                # Document embeddings are unit-normalized int8 codes with a per-vector
+                # scale, so one matrix-vector product (rescaled) yields every cosine similarity
+                embedded_indices = list(cached_embeddings)
+                doc_codes = np.vstack([cached_embeddings[i][0] for i in embedded_indices]).astype(np.float32)
+                doc_scales = np.fromiter(
+                    (cached_embeddings[i][1] for i in embedded_indices), np.float32, len(embedded_indices)
+                )
+                similarities = ((doc_codes @ query_embedding.astype(np.float32)) * doc_scales).tolist()
                 
-                similarities = cosine_similarity(query_embedding_array, doc_embeddings_array)[0]
+                for i, similarity in zip(embedded_indices, similarities):
+                    result = working_results[i]
+                    result.semantic_score = similarity
+                    result.embedding_vector, result.embedding_scale = cached_embeddings[i]
                 
-                for i, (result, similarity) in enumerate(zip(working_results, similarities)):
-                    result.semantic_score = float(similarity)
-                    result.embedding_vector = cached_embeddings[i]
-                    
-                # Set semantic scores to relevance scores for non-processed results
-                for result in results[RERANK_WINDOW_SIZE:]:
-                    result.semantic_score = result.relevance_score
+                for i, result in enumerate(working_results):
+                    if i not in cached_embeddings:
+                        result.semantic_score = result.relevance_score
             else:
-                # Fallback to manual calculation
+                # Without NumPy both vectors are unit-length lists, so the dot product is the cosine
                 for i, result in enumerate(working_results):
                     if i in cached_embeddings:
-                        similarity = self._cosine_similarity(query_embedding, cached_embeddings[i])
-                        result.semantic_score = float(similarity)
+                        result.semantic_score = float(sum(map(mul, query_embedding, cached_embeddings[i])))
                         result.embedding_vector = cached_embeddings[i]
                     else:
                         result.semantic_score = result.relevance_score
-                        
-                # Set semantic scores to relevance scores for non-processed results
-                for result in results[RERANK_WINDOW_SIZE:]:
-                    result.semantic_score = result.relevance_score
             
-            await embeddings_client.close()
+            # Set semantic scores to relevance scores for non-processed results
+            for result in results[RERANK_WINDOW_SIZE:]:
+                result.semantic_score = result.relevance_score
             
         except Exception as e:
             logger.debug(f"Semantic scoring failed: {e}")
@@ -2788,11 +3313,11 @@ class PerplexityWebSearchService:
                 sentence = sentence.strip()
                 if not sentence:
                     continue
-                refs = re.findall(r'\[(\d+)\]', sentence)
+                refs = _CITATION_REF_RE.findall(sentence)
                 if not refs:
                     continue
-                claim_text = re.sub(r'\s*\[(\d+)\]\s*', ' ', sentence).strip()
-                claim_text = re.sub(r'\s+', ' ', claim_text)
+                claim_text = _CITATION_MARKER_RE.sub(' ', sentence).strip()
+                claim_text = _WHITESPACE_RUN_RE.sub(' ', claim_text)
                 if not claim_text:
                     continue
                 for ref in refs:
@@ -2815,28 +3340,57 @@ class PerplexityWebSearchService:
                 "supported": 0,
             }
 
+            # Gather (ref, claim, evidence) jobs first so they go out in a single request
+            jobs: List[Tuple[str, str, str]] = []
+            skipped_refs: List[str] = []
             for ref, claim_text in claim_pairs[:MAX_EVALS]:
                 result = citation_map.get(ref)
                 if not result:
                     continue
 
+                if (result.combined_score >= NLI_TRUSTED_MIN_COMBINED_SCORE
+                        and result.domain_boost >= NLI_TRUSTED_MIN_DOMAIN_BOOST):
+                    if result.nli_status == "unknown":
+                        result.nli_status = "skipped_trusted"
+                        skipped_refs.append(ref)
+                    continue
+
                 evidence_excerpt = self._extract_evidence_excerpt(result, claim_text)
                 if not evidence_excerpt:
                     evidence_excerpt = (result.snippet or "")[:500]
                 if not evidence_excerpt:
                     continue
+                jobs.append((ref, claim_text, evidence_excerpt))
 
+            if skipped_refs:
+                verification_details["skipped_trusted"] = skipped_refs
+            if not jobs:
+                return answer, verification_notes, verification_details
+
+            if len(jobs) == 1:
+                ref, claim_text, evidence_excerpt = jobs[0]
                 try:
-                    evaluation = await self._run_nli_evaluation(
+                    evaluations = [await self._run_nli_evaluation(
                         nli_client,
                         nli_model,
                         claim_text,
                         evidence_excerpt,
                         ref
-                    )
+                    )]
                 except Exception as eval_error:
                     logger.debug(f"NLI evaluation error for citation [{ref}]: {eval_error}")
+                    evaluations = [None]
+            else:
+                try:
+                    evaluations = await self._run_nli_batch_evaluation(nli_client, nli_model, jobs)
+                except Exception as eval_error:
+                    logger.debug(f"Batched NLI evaluation error for {len(jobs)} claims: {eval_error}")
+                    evaluations = [None] * len(jobs)
+
+            for (ref, claim_text, evidence_excerpt), evaluation in zip(jobs, evaluations):
+                if evaluation is None:
                     continue
+                result = citation_map[ref]
 
                 eval_status = evaluation.get("status", "unknown")
                 eval_confidence = evaluation.get("confidence", 0.0)
@@ -2923,7 +3477,7 @@ class PerplexityWebSearchService:
             if not citation_ids:
                 return self._merge_adjacent_citations(answer)
 
-            existing_refs = set(re.findall(r'\[(\d+)\]', answer))
+            existing_refs = set(_CITATION_REF_RE.findall(answer))
             valid_id_set = set(citation_ids)
             valid_refs = {ref for ref in existing_refs if ref in citation_ids}
             if valid_refs:
@@ -2943,7 +3497,7 @@ class PerplexityWebSearchService:
                     updated_paragraphs.append(paragraph)
                     continue
 
-                paragraph_refs = re.findall(r'\[(\d+)\]', paragraph)
+                paragraph_refs = _CITATION_REF_RE.findall(paragraph)
                 if paragraph_refs and any(ref in valid_id_set for ref in paragraph_refs):
                     updated_paragraphs.append(paragraph)
                     continue
@@ -2961,7 +3515,7 @@ class PerplexityWebSearchService:
             updated_answer = '\n\n'.join(updated_paragraphs)
 
             # If paragraphs approach failed to add any valid refs, fallback to line-level injection
-            updated_refs = re.findall(r'\[(\d+)\]', updated_answer)
+            updated_refs = _CITATION_REF_RE.findall(updated_answer)
             if not any(ref in valid_id_set for ref in updated_refs):
                 lines = answer.split('\n')
                 updated_lines: List[str] = []
@@ -2969,7 +3523,7 @@ class PerplexityWebSearchService:
 
                 for line in lines:
                     stripped = line.strip()
-                    line_refs = re.findall(r'\[(\d+)\]', line)
+                    line_refs = _CITATION_REF_RE.findall(line)
                     if not stripped or any(ref in valid_id_set for ref in line_refs):
                         updated_lines.append(line)
                         continue
@@ -3064,6 +3618,72 @@ class PerplexityWebSearchService:
         if not parsed:
             raise ValueError(f"Unable to parse NLI JSON: {content}")
 
+        return self._normalize_nli_verdict(parsed)
+
+    async def _run_nli_batch_evaluation(
+        self,
+        client: AsyncOpenAI,
+        model: str,
+        jobs: List[Tuple[str, str, str]]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Verify several (citation_id, claim, evidence) jobs in one call.
+
+        Returns one evaluation per job, in order; jobs the model skipped map to None.
+        """
+        system_prompt = (
+            "You are a rigorous fact-checking assistant."
+            " For each numbered item, review the claim against its evidence excerpt."
+            " Respond with strict JSON of the form {\"evaluations\": [...]} containing one object per item"
+            " with keys id, verdict, confidence, reason, quote."
+            " id is the item number."
+            " verdict must be one of ['SUPPORTED','CONTRADICTED','INSUFFICIENT']."
+            " confidence is a float between 0 and 1."
+            " reason must be concise (<= 40 words)."
+            " quote should be a short phrase from the evidence that best justifies the verdict."
+        )
+
+        user_prompt = "\n\n".join(
+            f"Item {item_id}\n"
+            f"Citation ID: [{citation_id}]\n"
+            f"Claim: {claim}\n"
+            f"Evidence excerpt:\n{evidence.strip()}"
+            for item_id, (citation_id, claim, evidence) in enumerate(jobs, 1)
+        )
+
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.0,
+            max_tokens=320 * len(jobs)
+        )
+
+        if not response or not getattr(response, "choices", None):
+            raise RuntimeError("Empty NLI response")
+
+        content = response.choices[0].message.content.strip()
+        parsed = self._parse_nli_json(content)
+        items = parsed.get("evaluations") if isinstance(parsed, dict) else None
+        if not isinstance(items, list):
+            raise ValueError(f"Unable to parse batched NLI JSON: {content}")
+
+        evaluations: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                index = int(item.get("id")) - 1
+            except (TypeError, ValueError):
+                continue
+            if 0 <= index < len(jobs):
+                evaluations[index] = self._normalize_nli_verdict(item)
+        return evaluations
+
+    @staticmethod
+    def _normalize_nli_verdict(parsed: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a raw model verdict object to status/confidence/reason/quote."""
         verdict_raw = str(parsed.get("verdict", "")).strip().lower()
         if verdict_raw in {"supported", "support", "entails", "entailed"}:
             status = "supported"
@@ -3096,18 +3716,18 @@ class PerplexityWebSearchService:
 
         # If already JSON
         try:
-            return json.loads(text)
+            return _json_loads(text)
         except json.JSONDecodeError:
             pass
 
         # Attempt to locate JSON-like substring
-        match = re.search(r'\{.*\}', text, re.DOTALL)
+        match = _JSON_OBJECT_RE.search(text)
         if not match:
             return None
 
         candidate = match.group(0)
         try:
-            return json.loads(candidate)
+            return _json_loads(candidate)
         except json.JSONDecodeError:
             return None
     
@@ -3122,100 +3742,23 @@ class PerplexityWebSearchService:
         content_weight = 0.1    # Content quality
         signals_weight = 0.1    # Domain priors + recency + snippet match
         
-        # Calculate score statistics for normalization
-        bm25_scores = [r.bm25_score for r in results if hasattr(r, 'bm25_score')]
-        semantic_scores = [r.semantic_score for r in results if hasattr(r, 'semantic_score')]
-        
         # Robust normalization using min-max scaling
-        bm25_min, bm25_max = (min(bm25_scores), max(bm25_scores)) if bm25_scores else (0, 1)
-        semantic_min, semantic_max = (min(semantic_scores), max(semantic_scores)) if semantic_scores else (0, 1)
-        
-        for result in results:
-            # 1. Normalize BM25 and semantic scores
-            if bm25_max > bm25_min:
-                bm25_norm = (result.bm25_score - bm25_min) / (bm25_max - bm25_min)
-            else:
-                bm25_norm = 0.5
-                
-            if semantic_max > semantic_min:
-                semantic_norm = (result.semantic_score - semantic_min) / (semantic_max - semantic_min)
-            else:
-                semantic_norm = 0.5
-            
-            # 2. Content quality scoring (independent of relevance_score)
-            content_quality = 0.5  # Base quality
-            if result.word_count > 0:
-                # Optimal range 100-400 words for citations
-                if result.word_count < 50:
-                    word_bonus = result.word_count / 100  # Penalty for very short
-                elif result.word_count <= 400:
-                    word_bonus = min(result.word_count / 250, 1.0)  # Optimal range
-                else:
-                    word_bonus = max(0.7, 1.0 - (result.word_count - 400) / 1000)  # Slight penalty for very long
-                content_quality = word_bonus
-            
-            # 3. Domain priors - check all categories for this domain
-            domain_boost = 1.0  # Default no boost
-            if result.url:
-                try:
-                    from urllib.parse import urlparse
-                    domain = urlparse(result.url).netloc.lower()
-                    
-                    # Check all domain categories for matches
-                    for category, domains in DOMAIN_PRIORS.items():
-                        if domain in domains:
-                            domain_boost = max(domain_boost, domains[domain])  # Take highest boost
-                            break
-                        # Also check for subdomain matches (e.g., subdomain.wikipedia.org)
-                        for trusted_domain, boost in domains.items():
-                            if domain.endswith('.' + trusted_domain) or domain == trusted_domain:
-                                domain_boost = max(domain_boost, boost)
-                                break
-                except Exception:
-                    domain_boost = 1.0
-            
-            # 4. Recency scoring (for time-sensitive queries)
-            recency_boost = 1.0
-            if hasattr(result, 'timestamp') and result.timestamp:
-                try:
-                    from datetime import datetime, timedelta
-                    # Simple recency boost - more sophisticated parsing could be added
-                    if '2024' in result.timestamp or '2025' in result.timestamp:
-                        recency_boost = 1.1  # Recent content gets small boost
-                    elif '2023' in result.timestamp:
-                        recency_boost = 1.05  # Slightly older content
-                    elif any(year in result.timestamp for year in ['2022', '2021', '2020']):
-                        recency_boost = 1.0   # Neutral for 2020-2022
-                    else:
-                        recency_boost = 0.95  # Slight penalty for older content
-                except Exception:
-                    recency_boost = 1.0
-            
-            # 5. Snippet-title matching for citation precision  
-            snippet_title_boost = 1.0
-            if result.title and result.snippet:
-                title_words = set(result.title.lower().split())
-                snippet_words = set(result.snippet.lower().split())
-                
-                # Remove common stop words for better matching
-                stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were'}
-                title_words = title_words - stop_words
-                snippet_words = snippet_words - stop_words
-                
-                if title_words and snippet_words:
-                    overlap = len(title_words & snippet_words)
-                    total_unique = len(title_words | snippet_words)
-                    
-                    if total_unique > 0:
-                        match_ratio = overlap / total_unique
-                        # Boost results where title and snippet have good word overlap
-                        snippet_title_boost = 1.0 + (match_ratio * 0.2)  # Up to 20% boost
+        bm25_norms = _min_max_or_half([r.bm25_score for r in results])
+        semantic_norms = _min_max_or_half([r.semantic_score for r in results])
+        
+        for result, bm25_norm, semantic_norm in zip(results, bm25_norms, semantic_norms):
+            content_quality = self._content_quality_score(result.word_count)
+            if not result.signals_ready:
+                _apply_ranking_signals(result)
+            domain_boost = result.domain_boost
+            recency_boost = result.recency_boost
+            snippet_title_boost = result.snippet_title_boost
             
-            # 6. Combine all signals
+            # Combine all signals
             signal_score = (domain_boost * recency_boost * snippet_title_boost - 1.0) / 2.0  # Normalize to 0-1 range
             signal_score = max(0.0, min(1.0, signal_score))  # Clamp to [0,1]
             
-            # 7. Calculate final weighted combination (NO relevance_score)
+            # Calculate final weighted combination (NO relevance_score)
             combined = (
                 bm25_weight * bm25_norm +
                 semantic_weight * semantic_norm +
@@ -3228,14 +3771,20 @@ class PerplexityWebSearchService:
             
             # Ensure final score is bounded
             result.combined_score = max(0.0, min(1.0, combined))
-            
-            # Store individual signal scores for debugging
-            result.domain_boost = domain_boost
-            result.recency_boost = recency_boost  
-            result.snippet_title_boost = snippet_title_boost
         
         return results
     
+    @staticmethod
+    def _content_quality_score(word_count: int) -> float:
+        """Score content length (independent of relevance_score); 100-400 words suits citations."""
+        if word_count <= 0:
+            return 0.5  # Base quality
+        if word_count < 50:
+            return word_count / 100  # Penalty for very short
+        if word_count <= 400:
+            return min(word_count / 250, 1.0)  # Optimal range
+        return max(0.7, 1.0 - (word_count - 400) / 1000)  # Slight penalty for very long
+    
     async def _extract_and_enhance_content(self, results: List[SearchResult]) -> List[SearchResult]:
         """Extract and enhance content from search results with optimized performance."""
         enhanced_results = []
@@ -3260,14 +3809,12 @@ class PerplexityWebSearchService:
             elif isinstance(result, Exception):
                 logger.debug(f"Content extraction failed: {result}")
         
-        # Optimized sorting with better scoring weights
-        valid_results.sort(key=lambda x: (
+        # Top-K selection with better scoring weights; nlargest keeps sort order for ties
+        return heapq.nlargest(self.max_synthesis_sources, valid_results, key=lambda x: (
             x.relevance_score * 0.5 +  # Increased weight for relevance
             min(x.word_count / 150, 1.0) * 0.2 +  # Reduced content length weight
             (0.3 if x.content else 0.1)  # Content bonus but not too high
-        ), reverse=True)
-        
-        return valid_results[:self.max_synthesis_sources]
+        ))
     
     async def _enhance_single_result(self, result: SearchResult) -> SearchResult:
         """Enhance a single search result with optimized content extraction."""
@@ -3294,13 +3841,8 @@ class PerplexityWebSearchService:
             
             async with session.get(result.url, timeout=timeout) as response:
                 if response.status == 200:
-                    # Improved encoding detection and handling
-                    content_size_limit = 1024 * 1024  # 1MB limit
-                    
-                    # Get raw bytes first
-                    raw_content = await response.read()
-                    if len(raw_content) > content_size_limit:
-                        raw_content = raw_content[:content_size_limit]
+                    # Get raw bytes first, stopping once the byte budget is read
+                    raw_content = await self._read_capped_body(response, _CONTENT_FETCH_MAX_BYTES)
                     
                     # Try to detect encoding more intelligently
                     html_content = None
@@ -3353,82 +3895,107 @@ class PerplexityWebSearchService:
         
         return result
     
+    @staticmethod
+    async def _read_capped_body(response: aiohttp.ClientResponse, max_bytes: int) -> bytes:
+        """Stream a response body, reading at most ``max_bytes`` (the rest is never downloaded)."""
+        chunks: List[bytes] = []
+        total = 0
+        async for chunk in response.content.iter_chunked(_CONTENT_FETCH_CHUNK_BYTES):
+            chunks.append(chunk)
+            total += len(chunk)
+            if total >= max_bytes:
+                break
+        return b"".join(chunks)[:max_bytes]
+    
+    @staticmethod
+    def _main_text_selectolax(html: str) -> str:
+        """Locate the main content block with selectolax and return its plain text."""
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(list(_UNWANTED_HTML_TAGS), recursive=True)
+        for selector in _UNWANTED_HTML_CLASSES:
+            for node in tree.css(selector):
+                node.decompose()
+        
+        content_candidates = []
+        for selector, score in _CONTENT_SELECTORS:
+            for node in tree.css(selector):
+                text_length = len(node.text(strip=True))
+                if text_length > 100:  # Minimum content threshold
+                    content_candidates.append((node, score + (text_length / 100)))
+        
+        # If no specific content area found, try to find the largest text block
+        if not content_candidates:
+            for node in tree.css('div, section, p'):
+                text_length = len(node.text(strip=True))
+                if text_length > 200:
+                    content_candidates.append((node, text_length / 100))
+        
+        if content_candidates:
+            main_content = max(content_candidates, key=lambda x: x[1])[0]
+        else:
+            main_content = tree.body or tree.root
+        return main_content.text(separator='\n') if main_content is not None else ""
+    
+    @staticmethod
+    def _main_text_bs4(html: str) -> str:
+        """Locate the main content block with BeautifulSoup and render it with html2text."""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Remove unwanted elements more comprehensively
+        for tag_name in _UNWANTED_HTML_TAGS:
+            for tag in soup(tag_name):
+                tag.decompose()
+        for selector in _UNWANTED_HTML_CLASSES:
+            for tag in soup.select(selector):
+                tag.decompose()
+        
+        # Enhanced main content detection with scoring
+        content_candidates = []
+        for selector, score in _CONTENT_SELECTORS:
+            for element in soup.select(selector):
+                text_length = len(element.get_text(strip=True))
+                if text_length > 100:  # Minimum content threshold
+                    content_candidates.append((element, score + (text_length / 100)))
+        
+        # If no specific content area found, try to find the largest text block
+        if not content_candidates:
+            for div in soup.find_all(['div', 'section', 'p']):
+                text_length = len(div.get_text(strip=True))
+                if text_length > 200:
+                    content_candidates.append((div, text_length / 100))
+        
+        # Select the best content candidate
+        if content_candidates:
+            main_content = max(content_candidates, key=lambda x: x[1])[0]
+        else:
+            # Final fallback to body
+            main_content = soup.find('body') or soup
+        
+        # Enhanced text extraction with better formatting preservation
+        h = html2text.HTML2Text()
+        h.ignore_links = True
+        h.ignore_images = True
+        h.ignore_emphasis = False
+        h.body_width = 0  # No line wrapping
+        h.ignore_tables = False  # Keep tables for financial data
+        h.decode_errors = 'ignore'  # Handle encoding issues gracefully
+        
+        return h.handle(str(main_content))
+    
     async def _extract_clean_content(self, html: str) -> str:
         """Extract clean, readable content from HTML with improved encoding and content detection."""
         try:
-            # Improved HTML parsing with better encoding handling
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Remove unwanted elements more comprehensively
-            unwanted_tags = [
-                'script', 'style', 'nav', 'footer', 'header', 'aside', 'ads',
-                'noscript', 'iframe', 'embed', 'object', 'form', 'input',
-                'button', 'select', 'textarea', 'label', 'fieldset',
-                '.advertisement', '.ad', '.ads', '.sidebar', '.menu',
-                '.navigation', '.navbar', '.breadcrumb', '.pagination',
-                '.social', '.share', '.comment', '.related', '.popular'
-            ]
-            
-            for selector in unwanted_tags:
-                if selector.startswith('.'):
-                    # CSS class selector
-                    for tag in soup.select(selector):
-                        tag.decompose()
+            text_content = None
+            if TRAFILATURA_AVAILABLE:
+                # Tables stay in: they carry most of the figures on financial pages
+                text_content = trafilatura.extract(
+                    html, include_comments=False, include_tables=True, favor_precision=True
+                )
+            if not text_content:
+                if SELECTOLAX_AVAILABLE:
+                    text_content = self._main_text_selectolax(html)
                 else:
-                    # Tag selector
-                    for tag in soup(selector):
-                        tag.decompose()
-            
-            # Enhanced main content detection with scoring
-            content_candidates = []
-            
-            # Try various content selectors with scores
-            content_selectors = [
-                ('main', 10),
-                ('article', 9),
-                ('[role="main"]', 8),
-                ('.main-content', 7),
-                ('.content', 6),
-                ('#content', 6),
-                ('.entry-content', 5),
-                ('.post-content', 5),
-                ('.article-content', 5),
-                ('.text-content', 4),
-                ('.body-content', 4)
-            ]
-            
-            for selector, score in content_selectors:
-                elements = soup.select(selector)
-                for element in elements:
-                    text_length = len(element.get_text(strip=True))
-                    if text_length > 100:  # Minimum content threshold
-                        content_candidates.append((element, score + (text_length / 100)))
-            
-            # If no specific content area found, try to find the largest text block
-            if not content_candidates:
-                all_divs = soup.find_all(['div', 'section', 'p'])
-                for div in all_divs:
-                    text_length = len(div.get_text(strip=True))
-                    if text_length > 200:
-                        content_candidates.append((div, text_length / 100))
-            
-            # Select the best content candidate
-            if content_candidates:
-                main_content = max(content_candidates, key=lambda x: x[1])[0]
-            else:
-                # Final fallback to body
-                main_content = soup.find('body') or soup
-            
-            # Enhanced text extraction with better formatting preservation
-            h = html2text.HTML2Text()
-            h.ignore_links = True
-            h.ignore_images = True
-            h.ignore_emphasis = False
-            h.body_width = 0  # No line wrapping
-            h.ignore_tables = False  # Keep tables for financial data
-            h.decode_errors = 'ignore'  # Handle encoding issues gracefully
-            
-            text_content = h.handle(str(main_content))
+                    text_content = self._main_text_bs4(html)
             
             # Improved text cleaning
             # Fix common encoding issues
@@ -3451,8 +4018,8 @@ class PerplexityWebSearchService:
             
             # Join lines and normalize whitespace within lines
             text_content = '\n'.join(cleaned_lines)
-            text_content = re.sub(r' +', ' ', text_content)  # Multiple spaces to single space
-            text_content = re.sub(r'\n\n\n+', '\n\n', text_content)  # Max 2 consecutive newlines
+            text_content = _SPACE_RUN_RE.sub(' ', text_content)  # Multiple spaces to single space
+            text_content = _EXCESS_NEWLINES_RE.sub('\n\n', text_content)  # Max 2 consecutive newlines
             
             # Quality check: ensure we have substantial and readable content
             word_count = len(text_content.split())
@@ -3544,13 +4111,10 @@ Provide a complete, well-researched answer with proper citations:"""
                 except Exception as openai_error:
                     logger.debug(f"OpenAI synthesis failed: {openai_error}, trying Azure fallback")
                     # Fallback to Azure OSS 120B only if OpenAI fails
-                    if AZURE_OPENAI_DEPLOYMENT_OSS_120B and AZURE_OPENAI_API_KEY:
-                        azure_client = AsyncAzureOpenAI(
-                            api_key=AZURE_OPENAI_API_KEY,
-                            api_version=AZURE_OPENAI_API_VERSION or "2024-02-01",
-                            azure_endpoint=AZURE_OPENAI_ENDPOINT,
-                            timeout=15.0  # Reduced from 60s to 15s for faster failure
-                        )
+                    azure_client = get_async_azure_client() if AZURE_OPENAI_DEPLOYMENT_OSS_120B else None
+                    if azure_client:
+                        # This loop's pooled client; 15s per-call timeout for faster failure
+                        azure_client = azure_client.with_options(timeout=15.0)
                         
                         system_prompt = get_system_prompt_for_model("gpt-oss-120b")
                         azure_messages = [
@@ -3571,7 +4135,6 @@ Provide a complete, well-researched answer with proper citations:"""
                             timeout=15.0  # Hard timeout for Azure synthesis
                         )
                         
-                        await azure_client.close()
                         logger.info("Used Azure GPT OSS 120B for answer synthesis (fallback)")
                     else:
                         raise ValueError("No synthesis model available")
@@ -3630,7 +4193,7 @@ Provide a complete, well-researched answer with proper citations:"""
                 'source': str,  # brave_search | ddgs_search | ddgs_fallback
                                 'display': str, # legacy formatted string
                                 'quality': 'high' | 'normal' | 'fallback'
-                                'nli_status': 'supported' | 'contradicted' | 'unsupported' | 'unknown'
+                                'nli_status': 'supported' | 'contradicted' | 'unsupported' | 'unknown' | 'skipped_trusted'
                                 'nli_confidence': float,
                                 'nli_reason': str,
                                 'nli_last_claim': str
@@ -3645,8 +4208,10 @@ Provide a complete, well-researched answer with proper citations:"""
             if not result.citation_id:
                 continue
             # Normalize URL defensively (in case result created outside parsing helper)
-            normalized_url = self._normalize_result_url(result.url)
-            result.url = normalized_url
+            if not result.url_normalized:
+                result.url = self._normalize_result_url(result.url)
+                result.url_normalized = True
+            normalized_url = result.url
             dedup_key = normalized_url or (result.title.strip().lower() if result.title else "")
             if dedup_key and dedup_key in seen_keys:
                 continue
@@ -3706,7 +4271,7 @@ Provide a complete, well-researched answer with proper citations:"""
             title = (result.title or result.url or "Untitled source").strip()
             snippet = (result.snippet or result.content or "").strip()
             if snippet:
-                snippet = re.sub(r"\s+", " ", snippet)
+                snippet = _WHITESPACE_RUN_RE.sub(" ", snippet)
                 snippet = snippet[:240].rstrip()
             descriptor_parts = [f"[{result.citation_id}] {title}"]
             if result.source:
@@ -3780,6 +4345,23 @@ async def cleanup_perplexity_service():
             logger.debug(f"Error cleaning up OpenAI client: {e}")
         finally:
             _openai_client = None
+    
+    try:
+        await close_embeddings_client()
+    except Exception as e:
+        logger.debug(f"Error cleaning up embeddings client: {e}")
+    
+    try:
+        await close_shared_connector()
+    except Exception as e:
+        logger.debug(f"Error closing shared connector: {e}")
+
+    shutdown_ddgs_executor()
+
+    _normalize_url_cached.cache_clear()
+    _normalize_result_url_cached.cache_clear()
+    _optimal_ddgs_region.cache_clear()
+    _preprocess_cache.clear()
 
 # Synchronous wrapper for tools
 def perplexity_web_search(
@@ -3804,13 +4386,19 @@ def perplexity_web_search(
     """
     async def _async_search():
         service = get_perplexity_service()
-        return await service.perplexity_search(
-            query=query,
-            max_results=max_results,
-            synthesize_answer=synthesize_answer,
-            include_recent=include_recent,
-            time_limit=time_limit
-        )
+        try:
+            return await service.perplexity_search(
+                query=query,
+                max_results=max_results,
+                synthesize_answer=synthesize_answer,
+                include_recent=include_recent,
+                time_limit=time_limit
+            )
+        finally:
+            # This loop is discarded after the call; release its pooled connections
+            await close_embeddings_client()
+            await close_async_clients()
+            await close_shared_connector()
     
     try:
         # Check if we're in an async context more safely
@@ -3,7 +3,7 @@ import asyncio
 import copy
 import logging
 import re
-from typing import Dict, Any, Callable, Iterable, List, Optional, Set
+from typing import Dict, Any, Callable, FrozenSet, Iterable, List, Optional, Set
 
 logger = logging.getLogger(__name__)
 
@@ -418,6 +418,7 @@ tools_spec = [
 _TOOL_SPEC_BY_NAME: Dict[str, Dict[str, Any]] = {
     spec["function"]["name"]: spec for spec in tools_spec
 }
+_TOOL_NAMES: FrozenSet[str] = frozenset(_TOOL_SPEC_BY_NAME)
 
 _DEFAULT_TICKER_TOOLS: Set[str] = {
     "get_stock_quote",
@@ -650,7 +651,7 @@ def build_tools_for_request_ml(
                 logger.info(f"Using ML tool selection for query: {prompt[:100]}...")
                 
                 # Get all available tool names
-                available_tools = list(_TOOL_SPEC_BY_NAME.keys())
+                available_tools = _TOOL_NAMES
                 
                 # Predict tools with ML
                 selected_tools, probabilities = selector.predict_tools(
@@ -9,6 +9,7 @@ A modular FastAPI application for AI-powered stock analysis with:
 - Admin functionality
 """
 
+import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
@@ -24,8 +25,8 @@ from app.routers.enhanced_search import router as enhanced_search_router
 from app.routers.dashboard import router as dashboard_router
 from app.routers.prediction import router as prediction_router
 from app.core.config import FRONTEND_ORIGINS
-from app.services.openai_client import get_provider
-from app.core.config import RAG_ENABLED, KNOWLEDGE_DIR
+from app.services.openai_client import get_provider, prewarm_clients
+from app.core.config import RAG_ENABLED, KNOWLEDGE_DIR, PREWARM_LLM_CLIENTS
 
 # Configure logging
 logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
@@ -36,12 +37,16 @@ async def lifespan(app: FastAPI):
     """Handle startup and shutdown events."""
     # Startup
     logger.info("Starting AI Stocks Assistant API...")
+    if PREWARM_LLM_CLIENTS:
+        await asyncio.to_thread(prewarm_clients)
     yield
     # Shutdown
     logger.info("Shutting down AI Stocks Assistant API...")
     try:
         from app.routers.chat import cleanup_chat_resources
         await cleanup_chat_resources()
+        from app.services.openai_client import close_async_clients
+        await close_async_clients()
     except Exception as e:
         logger.error(f"Error during cleanup: {e}")
 
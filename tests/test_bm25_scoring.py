@@ -0,0 +1,186 @@
+import numpy as np
+
+from app.services.perplexity_web_search import PerplexityWebSearchService, SearchResult, _OkapiBM25Index
+
+
+def _results():
+    return [
+        SearchResult(title="Weather", url="https://example.com/w", snippet="sunny skies and light wind"),
+        SearchResult(title="Toyota earnings", url="https://example.com/t", snippet="toyota quarterly earnings beat estimates"),
+        SearchResult(title="Sony", url="https://example.com/s", snippet="sony earnings outlook"),
+    ]
+
+
+def test_bm25_scores_rank_matching_documents_first():
+    """BM25 scores are min-max normalized and favour documents sharing query terms."""
+    service = PerplexityWebSearchService()
+    scored = service._calculate_bm25_scores("toyota earnings", _results())
+
+    scores = [r.bm25_score for r in scored]
+    assert max(scores) == 1.0
+    assert min(scores) == 0.0
+    assert scores[1] == 1.0
+    assert scores[2] > scores[0]
+
+
+def test_bm25_scores_without_query_terms_keep_defaults():
+    """A query with no usable tokens leaves scores untouched."""
+    service = PerplexityWebSearchService()
+    scored = service._calculate_bm25_scores("", _results())
+    assert all(r.bm25_score == 0.0 for r in scored)
+
+
+def test_repeated_query_terms_weight_scores():
+    """A term repeated in the query counts once per occurrence."""
+    index = _OkapiBM25Index([["toyota", "earnings"], ["sony"], ["weather", "report"], ["toyota"]])
+    single = index.get_scores(["toyota"])
+    assert np.allclose(index.get_scores(["toyota", "toyota"]), 2 * single)
+    assert np.allclose(index.get_scores(["toyota", "unknown"]), single)
+
+
+def test_common_query_terms_keep_a_floored_idf():
+    """Terms in most of the result pool still score, via the epsilon IDF floor."""
+    from app.services.perplexity_web_search import _score_bm25
+
+    documents = [["weather", "report"], ["toyota", "earnings"], ["sony", "earnings"], ["nikkei", "earnings"]]
+    scores = _score_bm25(documents, ["toyota", "earnings"])
+    assert scores[1] > scores[2] > scores[0] == 0
+    assert scores[2] == scores[3]
+
+
+def test_combined_scores_normalize_and_boost_signals():
+    """Combined scores min-max the lexical/semantic columns and apply domain priors."""
+    results = [
+        SearchResult(title="Toyota earnings", url="https://www.reuters.com/t", snippet="toyota earnings beat",
+                     bm25_score=2.0, semantic_score=0.9, word_count=300, timestamp="2024-05-01"),
+        SearchResult(title="Weather", url="https://blog.example.com/w", snippet="sunny skies",
+                     bm25_score=0.0, semantic_score=0.9, word_count=20),
+    ]
+    scored = PerplexityWebSearchService()._calculate_combined_scores(results)
+
+    assert scored[0].domain_boost > 1.0 and scored[1].domain_boost == 1.0
+    assert scored[0].recency_boost == 1.1 and scored[1].recency_boost == 1.0
+    assert scored[0].snippet_title_boost > 1.0
+    assert scored[0].combined_score > scored[1].combined_score
+    # Equal semantic scores fall back to the 0.5 midpoint
+    assert scored[1].combined_score == 0.4 * 0.0 + 0.4 * 0.5 + 0.1 * 0.2 + 0.1 * 0.0
+
+
+def test_ranking_signals_are_precomputed_on_ingestion():
+    """Cached results come back with boosts filled in so ranking skips string parsing."""
+    from app.services.perplexity_web_search import _deserialize_search_results
+
+    restored = _deserialize_search_results(
+        [("Toyota earnings", "https://www.reuters.com/t", "toyota earnings beat", 0.8, "2024-05-01", "brave_search", 1)]
+    )[0]
+    assert restored.signals_ready
+    assert restored.domain_boost > 1.0 and restored.recency_boost == 1.1
+
+    restored.domain_boost = 1.0  # Ranking trusts the stored value instead of recomputing it
+    PerplexityWebSearchService()._calculate_combined_scores([restored])
+    assert restored.domain_boost == 1.0
+
+
+def test_synthesis_sources_are_top_k_in_stable_order():
+    """Content selection keeps the best max_synthesis_sources, ties in input order."""
+    import asyncio
+
+    service = PerplexityWebSearchService()
+    service.max_synthesis_sources = 3
+    results = [
+        SearchResult(title=str(i), url="", snippet="s", content="c" if i % 2 else "", relevance_score=score)
+        for i, score in enumerate([0.2, 0.9, 0.2, 0.5, 0.9, 0.1])
+    ]
+    selected = asyncio.run(service._extract_and_enhance_content(results))
+    assert [r.title for r in selected] == ["1", "3", "4"]  # 3 and 4 tie; 3 came first
+
+
+def test_citation_ids_assigned_once_after_ranking(monkeypatch):
+    """Search results arrive unnumbered and get sequential IDs in final ranked order."""
+    import asyncio
+
+    service = PerplexityWebSearchService()
+
+    async def fake_search(query, max_results, include_recent, time_limit=None):
+        return _results(), query
+
+    async def passthrough(*args):
+        return args[-1]
+
+    async def no_embedding(query):
+        return None
+
+    monkeypatch.setattr(service, "_enhanced_web_search", fake_search)
+    monkeypatch.setattr(service, "_extract_and_enhance_content", passthrough)
+    monkeypatch.setattr(service, "_calculate_semantic_scores", passthrough)
+    monkeypatch.setattr(service, "_get_query_embedding", no_embedding)
+
+    assert all(r.citation_id == 0 for r in _results())
+    response = asyncio.run(service.perplexity_search("toyota earnings"))
+    ranked = [source.title for source in response.sources]
+    assert [source.citation_id for source in response.sources] == [1, 2, 3]
+    assert ranked[0] == "Toyota earnings"
+    assert sorted(response.citations) == [1, 2, 3]
+
+
+def test_preprocessed_tokens_are_memoized_with_fifo_bound(monkeypatch):
+    """Repeated texts reuse their tokens; the cache evicts its oldest entry when full."""
+    from app.services import perplexity_web_search
+
+    monkeypatch.setattr(perplexity_web_search, "_PREPROCESS_CACHE_SIZE", 2)
+    monkeypatch.setattr(perplexity_web_search, "_preprocess_cache", {})
+    service = PerplexityWebSearchService()
+
+    first = service._preprocess_text("toyota quarterly earnings")
+    assert service._preprocess_text("toyota quarterly earnings") is first
+    service._preprocess_text("sony outlook")
+    service._preprocess_text("weather report")
+    assert list(perplexity_web_search._preprocess_cache) == ["sony outlook", "weather report"]
+
+
+def test_ascii_batch_tokenization_matches_per_document_path():
+    """The joined ASCII fast path splits back into the same tokens as per-document preprocessing."""
+    service = PerplexityWebSearchService()
+    texts = ["Toyota's Q3 earnings: beat!", "", "sony outlook, weather\x1ereport"]
+    expected = [service._preprocess_text(text) for text in texts]
+    assert service._preprocess_documents(texts) == expected
+    assert service._preprocess_documents(texts[:2] + ["トヨタ 決算"])[:2] == expected[:2]
+
+
+def test_bm25_runs_off_loop_alongside_semantic_scoring(monkeypatch):
+    """BM25 scoring is handed to a worker thread and overlaps the semantic scoring coroutine."""
+    import asyncio
+    import threading
+
+    service = PerplexityWebSearchService()
+    bm25_threads = []
+    original_bm25 = service._calculate_bm25_scores
+
+    def recording_bm25(query, results):
+        bm25_threads.append(threading.current_thread())
+        return original_bm25(query, results)
+
+    async def fake_search(query, max_results, include_recent, time_limit=None):
+        return _results(), query
+
+    async def passthrough(*args):
+        return args[-1]
+
+    async def fake_semantic(query, results):
+        for result in results:
+            result.semantic_score = 0.5
+        return results
+
+    async def no_embedding(query):
+        return None
+
+    monkeypatch.setattr(service, "_enhanced_web_search", fake_search)
+    monkeypatch.setattr(service, "_extract_and_enhance_content", passthrough)
+    monkeypatch.setattr(service, "_calculate_bm25_scores", recording_bm25)
+    monkeypatch.setattr(service, "_calculate_semantic_scores", fake_semantic)
+    monkeypatch.setattr(service, "_get_query_embedding", no_embedding)
+
+    response = asyncio.run(service.perplexity_search("toyota earnings"))
+    assert bm25_threads and bm25_threads[0] is not threading.main_thread()
+    assert response.sources[0].title == "Toyota earnings" and response.sources[0].bm25_score == 1.0
+    assert all(source.semantic_score == 0.5 for source in response.sources)
@@ -0,0 +1,109 @@
+import pytest
+
+from app.services import perplexity_web_search
+from app.services.perplexity_web_search import BraveSearchClient
+
+
+class _FakeResponse:
+    def __init__(self, status, payload=None):
+        self.status = status
+        self._payload = payload
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self):
+        return perplexity_web_search.json.dumps(self._payload).encode()
+
+    async def text(self):
+        return "error"
+
+
+class _FakeSession:
+    """Replays a fixed sequence of responses and records request params."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, params=None):
+        self.calls.append(params)
+        return self.responses.pop(0)
+
+
+def _payload():
+    return {"web": {"results": [{
+        "title": "Toyota Motor earnings report",
+        "url": "https://www.reuters.com/markets/toyota-earnings",
+        "description": "Toyota Motor reported quarterly earnings and revenue growth in its financial results.",
+    }]}}
+
+
+async def _search(monkeypatch, responses):
+    async def no_sleep(_):
+        return None
+
+    monkeypatch.setattr(perplexity_web_search.asyncio, "sleep", no_sleep)
+    client = BraveSearchClient()
+    client.api_key = "test-key"
+    session = _FakeSession(responses)
+
+    async def fake_get_session():
+        return session
+
+    monkeypatch.setattr(client, "_get_session", fake_get_session)
+    results = await client.search("Toyota earnings report", count=5, country="US")
+    return results, session
+
+
+@pytest.mark.asyncio
+async def test_brave_success_returns_ranked_results(monkeypatch):
+    results, session = await _search(monkeypatch, [_FakeResponse(200, _payload())])
+    assert len(session.calls) == 1
+    assert results and results[0]["url"] == "https://www.reuters.com/markets/toyota-earnings"
+
+
+@pytest.mark.asyncio
+async def test_brave_422_retries_with_minimal_params(monkeypatch):
+    results, session = await _search(monkeypatch, [_FakeResponse(422), _FakeResponse(200, _payload())])
+    assert len(session.calls) == 2
+    assert set(session.calls[1]) == {"q", "count", "safesearch"}
+    assert len(results) == 1
+
+
+@pytest.mark.asyncio
+async def test_brave_5xx_gives_up_after_two_retries(monkeypatch):
+    results, session = await _search(monkeypatch, [_FakeResponse(503)] * 3)
+    assert len(session.calls) == 3
+    assert results == []
+
+
+@pytest.mark.asyncio
+async def test_brave_unauthorized_does_not_retry(monkeypatch):
+    results, session = await _search(monkeypatch, [_FakeResponse(401)])
+    assert len(session.calls) == 1
+    assert results == []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_reserve_consecutive_slots(monkeypatch):
+    sleeps = []
+
+    async def record_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(perplexity_web_search.asyncio, "sleep", record_sleep)
+    client = BraveSearchClient()
+    await perplexity_web_search.asyncio.gather(*(client._wait_for_request_slot() for _ in range(3)))
+    assert [round(s) for s in sorted(sleeps)] == [1, 2]
+
+
+def test_parsed_results_carry_their_domain():
+    client = BraveSearchClient()
+    parsed = client._parse_brave_results(_payload(), "Toyota earnings report")
+    assert parsed[0]["_domain"] == "www.reuters.com"
+    assert perplexity_web_search._fast_netloc("https://Ex.com:8080?q=1") == "ex.com:8080"
+    assert "raw_data" not in parsed[0]
@@ -4,7 +4,14 @@ import pytest
 
 pytest.importorskip("aiohttp")
 
-from app.services.perplexity_web_search import PerplexityWebSearchService, SearchResult
+from app.services.perplexity_web_search import (
+    BraveSearchClient,
+    PerplexityWebSearchService,
+    SearchResult,
+    _fast_split_url,
+    _normalize_result_url_cached,
+    _normalize_url_cached,
+)
 
 
 def test_citation_url_normalization():
@@ -48,6 +55,52 @@ def test_citation_url_normalization():
     assert 'High-Quality Source' in c1['display']
 
 
+def test_fast_url_split_matches_urlparse_shape():
+    assert _fast_split_url("https://Ex.com:8080/a/b?x=1") == ("https", "Ex.com:8080", "/a/b", "x=1")
+    assert _fast_split_url("https://ex.com?x=1") == ("https", "ex.com", "", "x=1")
+    # Fragments and path params need urlparse
+    assert _fast_split_url("https://ex.com/a#frag") is None
+    assert _fast_split_url("https://ex.com/a;p=1") is None
+    assert _fast_split_url("https://ex.com]/a") is None
+
+
+def test_brave_url_normalization_fast_and_fallback_paths():
+    client = BraveSearchClient()
+    urls = [
+        "HTTP://Example.com//a//b/?utm_source=x&id=5&empty=",
+        "https://example.com/a?q=a/b&fbclid=1",
+        "https://example.com/a/#section",
+    ]
+    data = {"web": {"results": [{"title": "t", "url": u, "description": "d"} for u in urls]}}
+    parsed = [r["url"] for r in client._parse_brave_results(data, "q")]
+    assert parsed == [
+        "https://example.com/a/b?id=5",
+        "https://example.com/a?q=a%2Fb",
+        "https://example.com/a",
+    ]
+
+
+def test_repeated_result_urls_hit_normalization_cache():
+    client = BraveSearchClient()
+    _normalize_url_cached.cache_clear()
+    entry = {"title": "t", "url": "https://example.com/x/?utm_source=a", "description": "d"}
+    client._parse_brave_results({"web": {"results": [entry, dict(entry)]}}, "q")
+    info = _normalize_url_cached.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+def test_result_url_normalization_is_cached_and_keeps_scheme():
+    _normalize_result_url_cached.cache_clear()
+    normalize = PerplexityWebSearchService._normalize_result_url
+    assert normalize("http://Example.com:80//a/?utm_source=x#top") == "http://example.com/a"
+    assert normalize("http://Example.com:80//a/?utm_source=x#top") == "http://example.com/a"
+    assert normalize(None) == ""
+    info = _normalize_result_url_cached.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+    assert normalize("https://Ex.com") == "https://ex.com/"
+    assert normalize("https://ex.com/p/?b=2&utm_medium=x#frag") == "https://ex.com/p?b=2"
+
+
 def test_ensure_citations_in_answer_backfills_markers():
     service = PerplexityWebSearchService()
     results = [
@@ -8,7 +8,42 @@ import os
 import sys
 sys.path.append('/home/khaitran/PycharmProjects/Azure-OpenAI_StockTool')
 
-from app.services.perplexity_web_search import PerplexityWebSearchService
+from app.services.perplexity_web_search import PerplexityWebSearchService, SearchResult, _domain_prior_boost
+
+
+def test_domain_prior_boost_lookup():
+    """Domain priors match exact hosts and their subdomains, never below 1.0."""
+    assert _domain_prior_boost("nature.com") == 1.3
+    assert _domain_prior_boost("en.wikipedia.org") == 1.2
+    assert _domain_prior_boost("reuters.com") == 1.2  # highest of financial/news
+    assert _domain_prior_boost("notwikipedia.org") == 1.0
+    assert _domain_prior_boost("quora.com") == 1.0
+    print("✅ Domain prior lookup OK")
+
+
+def test_denylisted_domains_are_dropped():
+    """Results on denylisted domains or their subdomains never survive deduplication."""
+    service = PerplexityWebSearchService()
+    results = service._deduplicate_results([
+        SearchResult(title="bad", url="https://cdn.malware.com/x", snippet=""),
+        SearchResult(title="ok", url="https://notmalware.com/x", snippet=""),
+    ])
+    assert [r.title for r in results] == ["ok"]
+
+
+def test_deduplication_normalizes_once_and_keeps_first():
+    service = PerplexityWebSearchService()
+    first = SearchResult(title="a", url="HTTPS://Ex.com/p/?utm_source=x", snippet="")
+    results = service._deduplicate_results([
+        first,
+        SearchResult(title="b", url="https://ex.com/p", snippet=""),
+        SearchResult(title="", url="", snippet="no key"),
+        SearchResult(title="", url="", snippet="also no key"),
+        SearchResult(title="c", url="kept-as-is", snippet="", url_normalized=True),
+    ])
+    assert [r.title for r in results] == ["a", "", "", "c"]
+    assert first.url == "https://ex.com/p" and first.url_normalized
+    assert results[-1].url == "kept-as-is"
 
 async def test_financial_domain_priors():
     """Test financial queries with enhanced scoring and domain priors."""
@@ -125,4 +160,5 @@ async def test_financial_domain_priors():
     print(f"   - Removed problematic relevance_score inflation")
 
 if __name__ == "__main__":
+    test_domain_prior_boost_lookup()
     asyncio.run(test_financial_domain_priors())
\ No newline at end of file
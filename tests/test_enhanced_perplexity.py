@@ -85,12 +85,6 @@ async def test_configuration():
         print("❌ Azure Embeddings not configured")
     
     # Test dependencies
-    try:
-        from rank_bm25 import BM25Okapi
-        print("✅ rank-bm25 imported successfully")
-    except ImportError as e:
-        print(f"❌ rank-bm25 import failed: {e}")
-    
     try:
         import numpy as np
         from sklearn.metrics.pairwise import cosine_similarity
@@ -258,6 +258,29 @@ def test_statistics():
         return False
 
 
+def test_confidence_distribution_bins():
+    """Test 7: Confidence scores land in the correctly labeled bins"""
+    print("\n" + "="*70)
+    print("TEST 7: Confidence Distribution Bins")
+    print("="*70)
+    
+    selector = get_ml_tool_selector()
+    selector.reset_stats()
+    
+    try:
+        for confidence in (0.1, 0.3, 0.45, 0.5, 0.65, 0.7, 0.95):
+            selector._update_stats([], {}, 1.0, confidence, method='ml')
+        
+        dist = get_ml_stats()['confidence_distribution']
+        print(f"Confidence Distribution: {dist}")
+        
+        assert dist == {'0.0-0.3': 1, '0.3-0.5': 2, '0.5-0.7': 2, '0.7-1.0': 2}
+        print("✅ Confidence bins are labeled correctly")
+        return True
+    finally:
+        selector.reset_stats()
+
+
 def main():
     """Run all tests"""
     print("\n" + "="*70)
@@ -275,6 +298,7 @@ def main():
         results['Confidence Filtering'] = test_confidence_filtering()
         results['Integration'] = test_integration()
         results['Statistics'] = test_statistics()
+        results['Confidence Bins'] = test_confidence_distribution_bins()
     else:
         print("\n⚠️  Skipping remaining tests (model not loaded)")
         results['Query Embedding'] = False
@@ -282,6 +306,7 @@ def main():
         results['Confidence Filtering'] = False
         results['Integration'] = False
         results['Statistics'] = False
+        results['Confidence Bins'] = test_confidence_distribution_bins()
     
     # Summary
     print("\n" + "="*70)
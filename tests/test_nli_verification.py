@@ -91,3 +91,45 @@ async def test_verify_citations_contradicted_adds_note():
     assert "decline" in result.nli_reason.lower()
 
     await service._close_session()
+
+
+def test_parse_nli_json_handles_bare_and_wrapped_objects():
+    service = PerplexityWebSearchService()
+    assert service._parse_nli_json('{"verdict":"SUPPORTED"}') == {"verdict": "SUPPORTED"}
+    assert service._parse_nli_json('Verdict:\n{"verdict": "REFUTED",\n "confidence": 0.4} done') == {
+        "verdict": "REFUTED",
+        "confidence": 0.4,
+    }
+    assert service._parse_nli_json("not json {broken") is None
+    assert service._parse_nli_json("   ") is None
+
+
+@pytest.mark.asyncio
+async def test_verify_citations_batches_claims_and_skips_trusted_sources():
+    service = PerplexityWebSearchService()
+    client = FakeOpenAIClient(
+        '{"evaluations": ['
+        '{"id": 2, "verdict": "CONTRADICTED", "confidence": 0.3, "reason": "Revenue fell"},'
+        '{"id": 1, "verdict": "SUPPORTED", "confidence": 0.9, "reason": "Matches filing"}]}'
+    )
+    client.chat.completions.create = AsyncMock(wraps=client.chat.completions.create)
+    service._get_nli_client = AsyncMock(return_value=(client, "fake-model", "openai"))
+
+    supported = SearchResult(title="A", url="https://example.com/a", snippet="",
+                             content="Net income rose 10% in the quarter.", citation_id=1)
+    contradicted = SearchResult(title="B", url="https://example.com/b", snippet="",
+                                content="Revenue decreased 5% compared to last year.", citation_id=2)
+    trusted = SearchResult(title="C", url="https://www.reuters.com/c", snippet="",
+                           content="Margins expanded.", citation_id=3,
+                           combined_score=0.95, domain_boost=1.3)
+
+    answer = "Net income rose ten percent [1]. Revenue surged [2]. Margins expanded [3]."
+    _, notes, details = await service._verify_citations_nli(answer, [supported, contradicted, trusted])
+
+    assert client.chat.completions.create.await_count == 1
+    assert [e["citation_id"] for e in details["evaluations"]] == ["1", "2"]
+    assert supported.nli_status == "supported"
+    assert contradicted.nli_status == "contradicted"
+    assert trusted.nli_status == "skipped_trusted"
+    assert details["skipped_trusted"] == ["3"]
+    assert any("[2]" in note for note in notes)
@@ -0,0 +1,221 @@
+"""Test OpenAI/Azure client service initialization and model resolution."""
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services import openai_client
+
+
+def _reset_openai(api_key):
+    openai_client.OPENAI_API_KEY = api_key
+    openai_client._openai_client = None
+
+
+def test_concurrent_first_calls_build_one_client():
+    """Concurrent first calls to get_openai_client share a single client."""
+    print("Testing concurrent client initialization...")
+    original_key = openai_client.OPENAI_API_KEY
+    original_client = openai_client._openai_client
+    _reset_openai("sk-test")
+
+    try:
+        barrier = threading.Barrier(8)
+        clients = []
+
+        def worker():
+            barrier.wait()
+            clients.append(openai_client.get_openai_client())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(clients) == 8
+        assert clients[0] is not None
+        assert all(c is clients[0] for c in clients), "All threads should share one client"
+        print("  ✓ Single client shared across threads")
+    finally:
+        openai_client.OPENAI_API_KEY = original_key
+        openai_client._openai_client = original_client
+
+
+def test_clients_share_pooled_http_client():
+    """Built clients reuse the module-level pooled httpx client."""
+    original_key = openai_client.OPENAI_API_KEY
+    original_client = openai_client._openai_client
+    _reset_openai("sk-test")
+
+    try:
+        client = openai_client.get_openai_client()
+        assert client._client is openai_client._shared_http_client
+        transport = client._client._transport
+        assert transport._pool._keepalive_expiry == 60.0
+        assert transport._pool._retries == openai_client._TRANSPORT_RETRIES
+        # The SDK sends its own timeout per request, so the connect budget must live on the client
+        assert client.timeout.connect == 5.0 and client.timeout.read == openai_client._DEFAULT_TIMEOUT
+        print("  ✓ Client uses shared keep-alive pool")
+    finally:
+        openai_client.OPENAI_API_KEY = original_key
+        openai_client._openai_client = original_client
+
+
+def test_get_client_for_model_is_memoized():
+    """Repeated resolutions reuse the cached client but hand out fresh config dicts."""
+    original_key = openai_client.OPENAI_API_KEY
+    _reset_openai("sk-test")
+    openai_client.reset_clients()
+
+    try:
+        model_key = next(
+            k for k, v in openai_client.AVAILABLE_MODELS.items() if v.get("provider") == "openai"
+        )
+        client1, name1, config1 = openai_client.get_client_for_model(model_key)
+        client2, name2, config2 = openai_client.get_client_for_model(model_key)
+
+        assert client1 is client2
+        assert name1 == name2
+        assert config1 == config2 and config1 is not config2
+        config1["temperature"] = 0.0
+        assert openai_client.get_client_for_model(model_key)[2]["temperature"] == config2["temperature"]
+
+        _, _, timed_config = openai_client.get_client_for_model(model_key, timeout=5)
+        assert timed_config["timeout"] == 5
+        print("  ✓ Model resolution memoized, timeout applied per call")
+    finally:
+        openai_client.OPENAI_API_KEY = original_key
+        openai_client.reset_clients()
+
+
+def test_resolve_model_falls_back_when_azure_client_fails_to_build():
+    """A configured-but-unbuildable Azure client falls back to the OpenAI model name."""
+    original = (openai_client.OPENAI_API_KEY, openai_client.AZURE_OPENAI_API_KEY,
+                openai_client.AZURE_OPENAI_ENDPOINT, openai_client.AzureOpenAI)
+    _reset_openai("sk-test")
+    openai_client.AZURE_OPENAI_API_KEY = "azure-key"
+    openai_client.AZURE_OPENAI_ENDPOINT = "https://example.openai.azure.com"
+
+    def broken_azure(**kwargs):
+        raise ValueError("bad Azure configuration")
+
+    openai_client.AzureOpenAI = broken_azure
+    openai_client.reset_clients()
+    azure_key, azure_config = next(
+        (k, v) for k, v in openai_client.AVAILABLE_MODELS.items() if v.get("provider") == "azure"
+    )
+    openai_client.AVAILABLE_MODELS[azure_key] = {**azure_config, "deployment": "azure-deployment"}
+
+    try:
+        assert openai_client.resolve_model(None) == openai_client.DEFAULT_MODEL
+        assert openai_client.resolve_model("gpt-4o-mini") == "gpt-4o-mini"
+        assert openai_client.resolve_model(azure_key) == azure_config.get("model", "gpt-4o-mini")
+        assert openai_client.resolve_model(azure_key) == openai_client.get_client_for_model(azure_key)[1]
+        print("  ✓ resolve_model follows the clients that actually built")
+    finally:
+        (openai_client.OPENAI_API_KEY, openai_client.AZURE_OPENAI_API_KEY,
+         openai_client.AZURE_OPENAI_ENDPOINT, openai_client.AzureOpenAI) = original
+        openai_client.AVAILABLE_MODELS[azure_key] = azure_config
+        openai_client.reset_clients()
+
+
+def test_get_provider_is_cached_until_reset():
+    """get_provider memoizes its answer; reset_clients clears it."""
+    original_key = openai_client.OPENAI_API_KEY
+    original_azure_key = openai_client.AZURE_OPENAI_API_KEY
+    openai_client.AZURE_OPENAI_API_KEY = None
+    _reset_openai("sk-test")
+    openai_client.reset_clients()
+
+    try:
+        assert openai_client.get_provider() == "openai"
+        openai_client.OPENAI_API_KEY = None
+        assert openai_client.get_provider() == "openai"
+        openai_client.reset_clients()
+        assert openai_client.get_provider() is None
+        print("  ✓ Provider cached until reset_clients()")
+    finally:
+        openai_client.OPENAI_API_KEY = original_key
+        openai_client.AZURE_OPENAI_API_KEY = original_azure_key
+        openai_client.reset_clients()
+
+
+def test_async_client_for_model():
+    """Async clients are shared within an event loop and never carried into the next one."""
+    original_key = openai_client.OPENAI_API_KEY
+    _reset_openai("sk-test")
+    openai_client.reset_clients()
+
+    async def resolve_and_close():
+        client, name, config = openai_client.get_async_client_for_model("gpt-4o-mini")
+        assert isinstance(client, openai_client.AsyncOpenAI)
+        assert name == "gpt-4o-mini"
+        assert client is openai_client.get_async_openai_client()
+        http_client = openai_client._async_clients[asyncio.get_running_loop()]["http"]
+        assert client._client is http_client
+        await openai_client.close_async_clients()
+        assert http_client.is_closed
+        return client
+
+    try:
+        # Sync wrappers run each search in a fresh asyncio.run() loop
+        first = asyncio.run(resolve_and_close())
+        second = asyncio.run(resolve_and_close())
+        assert first is not second
+        assert not openai_client._async_clients
+        print("  ✓ Async clients scoped to their event loop and closed with it")
+    finally:
+        openai_client.OPENAI_API_KEY = original_key
+        openai_client.reset_clients()
+
+
+def test_available_models_are_fresh_per_call():
+    """Annotating one get_available_models() result never leaks into the next."""
+    original_key = openai_client.OPENAI_API_KEY
+    _reset_openai("sk-test")
+    openai_client.reset_clients()
+
+    try:
+        first = openai_client.get_available_models()
+        model_key = next(iter(first))
+        first[model_key]["available"] = "annotated"
+        first.pop(model_key)
+        second = openai_client.get_available_models()
+        assert model_key in second
+        assert second[model_key]["available"] != "annotated"
+        print("  ✓ Model listings are independent copies")
+    finally:
+        openai_client.OPENAI_API_KEY = original_key
+        openai_client.reset_clients()
+
+
+def test_unconfigured_client_returns_none():
+    """Without an API key the getter returns None and builds nothing."""
+    original_key = openai_client.OPENAI_API_KEY
+    original_client = openai_client._openai_client
+    _reset_openai(None)
+
+    try:
+        assert openai_client.get_openai_client() is None
+        assert openai_client._openai_client is None
+        print("  ✓ Unconfigured provider returns None")
+    finally:
+        openai_client.OPENAI_API_KEY = original_key
+        openai_client._openai_client = original_client
+
+
+if __name__ == "__main__":
+    test_concurrent_first_calls_build_one_client()
+    test_clients_share_pooled_http_client()
+    test_get_client_for_model_is_memoized()
+    test_resolve_model_falls_back_when_azure_client_fails_to_build()
+    test_get_provider_is_cached_until_reset()
+    test_async_client_for_model()
+    test_available_models_are_fresh_per_call()
+    test_unconfigured_client_returns_none()
+    print("✅ OpenAI client tests passed!")
@@ -2,12 +2,22 @@ import asyncio
 
 import pytest
 
+from app.services import perplexity_web_search
 from app.services.perplexity_web_search import (
+    BraveSearchClient,
+    ClockCacheWithTTL,
+    LRUCacheWithTTL,
+    PerplexityResponse,
     PerplexityWebSearchService,
     SearchResult,
+    SemanticResponseCache,
     _build_search_cache_key,
+    _pack_search_payload,
+    _quantize_embedding,
+    _semantic_cache_bucket,
     _deserialize_search_results,
     _serialize_search_results,
+    _unpack_search_payload,
     _content_cache,
     _search_cache,
 )
@@ -50,6 +60,81 @@ def test_search_cache_serialization_roundtrip():
     assert restored_results[0] is not original_results[0]
 
 
+def test_packed_search_payload_roundtrip(monkeypatch):
+    """Packed payloads carry a format byte and decode with either codec."""
+    serialized = _serialize_search_results([
+        SearchResult(title="Toyota", url="https://example.com/t", snippet="決算", relevance_score=0.5, citation_id=1),
+    ])
+    for msgpack_zstd in {perplexity_web_search.MSGPACK_ZSTD_AVAILABLE, False}:
+        monkeypatch.setattr(perplexity_web_search, "MSGPACK_ZSTD_AVAILABLE", msgpack_zstd)
+        packed = _pack_search_payload(serialized, "toyota earnings")
+        assert isinstance(packed, bytes)
+        results, enhanced_query = _unpack_search_payload(packed)
+        assert enhanced_query == "toyota earnings"
+        assert _deserialize_search_results(results)[0].snippet == "決算"
+    assert _unpack_search_payload(b"\xff" + packed[1:]) == ([], None)
+
+
+def test_search_cache_key_distinguishes_parameters():
+    """Every search parameter feeds the key, and a pipe in the query cannot alias another field."""
+    base = _build_search_cache_key("q", 5, False, None)
+    assert base == _build_search_cache_key("q", 5, False, "")
+    assert base != _build_search_cache_key("q", 6, False, None)
+    assert base != _build_search_cache_key("q", 5, True, None)
+    assert base != _build_search_cache_key("q", 5, False, "d")
+    assert _build_search_cache_key("a|b", 5, False, None) != _build_search_cache_key("b", 5, False, "a")
+
+
+def test_lru_cache_ttl_uses_monotonic_clock(monkeypatch):
+    """Entries expire once the monotonic clock passes the TTL."""
+    now = [10_000_000_000]
+    monkeypatch.setattr(perplexity_web_search.time, "monotonic_ns", lambda: now[0])
+
+    cache = LRUCacheWithTTL(max_size=2, ttl_seconds=5)
+    cache.put("a", 1)
+    now[0] += 4_000_000_000
+    assert cache.get("a") == 1
+
+    now[0] += 2_000_000_000
+    assert cache.get("a") is None
+    assert cache.size() == 0
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """A full cache drops the entry that was touched longest ago."""
+    cache = LRUCacheWithTTL(max_size=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_clock_cache_gives_referenced_entries_a_second_chance(monkeypatch):
+    """CLOCK eviction skips recently read entries and honours the TTL."""
+    now = [10_000_000_000]
+    monkeypatch.setattr(perplexity_web_search.time, "monotonic_ns", lambda: now[0])
+
+    cache = ClockCacheWithTTL(max_size=2, ttl_seconds=5)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.size() == 2
+
+    now[0] += 6_000_000_000
+    assert cache.get("a") is None
+    assert cache.clear_expired() == 1
+    assert cache.size() == 0
+
+
 @pytest.mark.asyncio
 async def test_content_cache_short_circuits_enhancement():
     """Content cache should prevent redundant network fetches."""
@@ -71,4 +156,415 @@ async def test_content_cache_short_circuits_enhancement():
     await service.close()
 
     assert enhanced.content == "Cached body"
-    assert enhanced.word_count == 2
\ No newline at end of file
+    assert enhanced.word_count == 2
+
+class _FakeEmbeddingsClient:
+    """Minimal async embeddings client returning fixed vectors per input text."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.embeddings = self
+        self.calls = 0
+
+    async def create(self, input, model, timeout=None):
+        self.calls += 1
+        texts = [input] if isinstance(input, str) else input
+        data = [type("Embedding", (), {"embedding": self.vectors[text]})() for text in texts]
+        return type("Response", (), {"data": data})()
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_semantic_scores_use_cosine_similarity(monkeypatch):
+    """Semantic scores are cosine similarities against the query embedding."""
+    perplexity_web_search._embeddings_cache.clear()
+    service = PerplexityWebSearchService()
+    client = _FakeEmbeddingsClient({
+        "stock query": [1.0, 0.0],
+        "Same snippet": [2.0, 0.0],
+        "Orthogonal snippet": [0.0, 3.0],
+    })
+
+    async def fake_client():
+        return client
+
+    monkeypatch.setattr(service, "_get_azure_embeddings_client", fake_client)
+    results = [
+        SearchResult(title="Same", url="https://example.com/a", snippet="snippet"),
+        SearchResult(title="Orthogonal", url="https://example.com/b", snippet="snippet"),
+    ]
+
+    scored = await service._calculate_semantic_scores("stock query", results)
+
+    assert scored[0].semantic_score == pytest.approx(1.0)
+    assert scored[1].semantic_score == pytest.approx(0.0)
+    assert client.calls == 1, "query and documents should share one embeddings request"
+
+    await service._calculate_semantic_scores("stock query", results)
+    await service.close()
+    assert client.calls == 1, "cached embeddings should not be requested again"
+    assert scored[0].embedding_vector.dtype.name == "int8"
+    assert scored[0].embedding_scale > 0
+
+
+@pytest.mark.asyncio
+async def test_semantic_scores_without_numpy_use_unit_vectors(monkeypatch):
+    """The pure-Python path normalizes embeddings once and scores with a dot product."""
+    perplexity_web_search._embeddings_cache.clear()
+    monkeypatch.setattr(perplexity_web_search, "NUMPY_AVAILABLE", False)
+    service = PerplexityWebSearchService()
+    client = _FakeEmbeddingsClient({
+        "stock query": [3.0, 4.0],
+        "Same snippet": [6.0, 8.0],
+        "Other snippet": [4.0, -3.0],
+    })
+
+    async def fake_client():
+        return client
+
+    monkeypatch.setattr(service, "_get_azure_embeddings_client", fake_client)
+    results = [
+        SearchResult(title="Same", url="https://example.com/a", snippet="snippet"),
+        SearchResult(title="Other", url="https://example.com/b", snippet="snippet"),
+    ]
+
+    scored = await service._calculate_semantic_scores("stock query", results)
+    perplexity_web_search._embeddings_cache.clear()
+
+    assert scored[0].semantic_score == pytest.approx(1.0)
+    assert scored[1].semantic_score == pytest.approx(0.0)
+    assert scored[0].embedding_vector == pytest.approx([0.6, 0.8])
+    assert service._cosine_similarity([3.0, 4.0], [6.0, 8.0]) == pytest.approx(1.0)
+
+
+class _LoopBoundEmbeddingsClient(_FakeEmbeddingsClient):
+    """Fails like a pooled httpx client when used from a loop other than the one that built it."""
+
+    def __init__(self, vectors):
+        super().__init__(vectors)
+        self.loop = asyncio.get_running_loop()
+        self.closed = False
+
+    async def create(self, input, model, timeout=None):
+        if asyncio.get_running_loop() is not self.loop or self.closed:
+            raise RuntimeError("client used outside its event loop")
+        return await super().create(input, model, timeout)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_sync_searches_in_fresh_loops_get_fresh_embeddings_clients(monkeypatch):
+    """Each asyncio.run() search embeds with a client built on, and closed with, its own loop."""
+    clients, embeddings = [], []
+
+    def build():
+        clients.append(_LoopBoundEmbeddingsClient({"stock query": [1.0, 0.0]}))
+        return clients[-1]
+
+    service = PerplexityWebSearchService()
+
+    async def fake_search(query, **kwargs):
+        perplexity_web_search._embeddings_cache.clear()
+        embeddings.append(await service._get_query_embedding(query))
+        return PerplexityResponse(query=query, synthesized_query=query, answer="", sources=[], citations={})
+
+    monkeypatch.setattr(perplexity_web_search, "AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT", "embed")
+    monkeypatch.setattr(perplexity_web_search, "AZURE_OPENAI_API_KEY", "key")
+    monkeypatch.setattr(PerplexityWebSearchService, "_build_embeddings_client", staticmethod(build))
+    monkeypatch.setattr(service, "perplexity_search", fake_search)
+    monkeypatch.setattr(perplexity_web_search, "get_perplexity_service", lambda: service)
+
+    for _ in range(2):
+        assert "error" not in perplexity_web_search.perplexity_web_search("stock query")
+
+    assert len(clients) == 2 and all(client.closed for client in clients)
+    assert all(embedding is not None for embedding in embeddings)
+    perplexity_web_search._embeddings_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_dedicated_embeddings_client_is_built_once(monkeypatch):
+    """One dedicated client serves every call until closed."""
+    client = _FakeEmbeddingsClient({})
+    closed, built = [], []
+
+    async def record_close():
+        closed.append(True)
+
+    def build():
+        built.append(True)
+        return client
+
+    client.close = record_close
+    monkeypatch.setattr(perplexity_web_search, "AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT", "embed")
+    monkeypatch.setattr(perplexity_web_search, "AZURE_OPENAI_API_KEY", "key")
+    monkeypatch.setattr(PerplexityWebSearchService, "_build_embeddings_client", staticmethod(build))
+    service = PerplexityWebSearchService()
+
+    assert await service._get_azure_embeddings_client() is client
+    assert await service._get_azure_embeddings_client() is client
+    assert len(built) == 1 and closed == []
+    await perplexity_web_search.close_embeddings_client()
+    assert closed == [True] and not perplexity_web_search._embeddings_clients
+
+
+def test_embeddings_clients_are_scoped_to_their_event_loop(monkeypatch):
+    """Loops running side by side in different threads never share an embeddings client."""
+    import threading
+
+    monkeypatch.setattr(perplexity_web_search, "AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT", "embed")
+    monkeypatch.setattr(perplexity_web_search, "AZURE_OPENAI_API_KEY", "key")
+    monkeypatch.setattr(
+        PerplexityWebSearchService, "_build_embeddings_client",
+        staticmethod(lambda: _LoopBoundEmbeddingsClient({"stock query": [1.0, 0.0]}))
+    )
+    service = PerplexityWebSearchService()
+    barrier = threading.Barrier(2)
+    clients = []
+
+    async def embed():
+        client = await service._get_azure_embeddings_client()
+        await asyncio.get_running_loop().run_in_executor(None, barrier.wait)
+        clients.append(client)
+        assert await service._get_azure_embeddings_client() is client
+        await client.embeddings.create(input=["stock query"], model="embed")
+        await perplexity_web_search.close_embeddings_client()
+
+    threads = [threading.Thread(target=asyncio.run, args=(embed(),)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(clients) == 2 and clients[0] is not clients[1]
+    assert all(client.closed for client in clients)
+    assert not perplexity_web_search._embeddings_clients
+
+
+def test_quantized_embeddings_preserve_cosine_similarity():
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(0)
+    docs = rng.normal(size=(20, 256))
+    docs /= np.linalg.norm(docs, axis=1, keepdims=True)
+    query = docs[0] + 0.5 * rng.normal(size=256)
+    query /= np.linalg.norm(query)
+
+    for doc in docs:
+        codes, scale = _quantize_embedding(doc)
+        assert codes.dtype == np.int8 and np.abs(codes).max() == 127
+        assert float(codes.astype(np.float32) @ query * scale) == pytest.approx(float(doc @ query), abs=2e-3)
+    codes, scale = _quantize_embedding(np.zeros(4))
+    assert scale == 0.0 and not codes.any()
+
+
+def test_semantic_response_cache_matches_nearby_queries_in_bucket(monkeypatch):
+    """Lookups return the most similar live entry within the same bucket."""
+    np = pytest.importorskip("numpy")
+    now = [10_000_000_000]
+    monkeypatch.setattr(perplexity_web_search.time, "monotonic_ns", lambda: now[0])
+
+    cache = SemanticResponseCache(max_size=2, ttl_seconds=5, threshold=0.9)
+    cache.put("b", np.array([1.0, 0.0], dtype=np.float16), "earnings")
+    cache.put("b", np.array([0.0, 1.0], dtype=np.float16), "weather")
+
+    assert cache.get("b", np.array([0.98, 0.2])) == "earnings"
+    assert cache.get("b", np.array([0.7, 0.7])) is None
+    assert cache.get("other", np.array([1.0, 0.0])) is None
+
+    cache.put("b", np.array([0.6, 0.8]), "third")
+    assert cache.size() == 2
+    assert cache.get("b", np.array([1.0, 0.0])) is None
+
+    now[0] += 6_000_000_000
+    assert cache.get("b", np.array([0.0, 1.0])) is None
+    assert cache.clear_expired() == 2
+
+
+def test_semantic_cache_bucket_separates_tickers_and_numbers():
+    assert _semantic_cache_bucket("AAPL earnings today", 8, True) == _semantic_cache_bucket("latest AAPL earnings", 8, True)
+    assert _semantic_cache_bucket("AAPL earnings", 8, True) != _semantic_cache_bucket("MSFT earnings", 8, True)
+    assert _semantic_cache_bucket("Q3 2024 results", 8, True) != _semantic_cache_bucket("Q3 2023 results", 8, True)
+    assert _semantic_cache_bucket("AAPL earnings", 8, True) != _semantic_cache_bucket("AAPL earnings", 5, True)
+    # Lowercase tickers and company names are guarded too; generic wording is not
+    assert _semantic_cache_bucket("tsla earnings", 8, True) != _semantic_cache_bucket("nvda earnings", 8, True)
+    assert _semantic_cache_bucket("Tesla stock news", 8, True) != _semantic_cache_bucket("Ford stock news", 8, True)
+    assert _semantic_cache_bucket("aapl earnings", 8, True) == _semantic_cache_bucket("What are the latest AAPL earnings?", 8, True)
+
+
+@pytest.mark.asyncio
+async def test_perplexity_search_reuses_response_for_paraphrase(monkeypatch):
+    """A paraphrase embedding close to a stored query skips the search pipeline."""
+    pytest.importorskip("numpy")
+    perplexity_web_search._embeddings_cache.clear()
+    perplexity_web_search._semantic_response_cache.clear()
+    service = PerplexityWebSearchService()
+    client = _FakeEmbeddingsClient({
+        "AAPL latest earnings": [1.0, 0.0],
+        "AAPL earnings results": [0.99, 0.05],
+    })
+
+    async def fake_client():
+        return client
+
+    searches = []
+
+    async def fake_search(query, max_results, include_recent, time_limit=None):
+        searches.append(query)
+        return [SearchResult(title="Apple earnings", url="https://example.com/a", snippet="AAPL beat")], query
+
+    async def passthrough(results):
+        return results
+
+    async def no_semantic(query, results):
+        return results
+
+    monkeypatch.setattr(service, "_get_azure_embeddings_client", fake_client)
+    monkeypatch.setattr(service, "_enhanced_web_search", fake_search)
+    monkeypatch.setattr(service, "_extract_and_enhance_content", passthrough)
+    monkeypatch.setattr(service, "_calculate_semantic_scores", no_semantic)
+
+    first = await service.perplexity_search("AAPL latest earnings")
+    second = await service.perplexity_search("AAPL earnings results")
+    await service.perplexity_search("AAPL earnings results", time_limit="d")
+
+    assert isinstance(second, PerplexityResponse)
+    assert not hasattr(second, "__dict__") and not hasattr(second.sources[0], "__dict__")
+    assert second.query == "AAPL earnings results"
+    assert second.answer == first.answer
+    assert searches == ["AAPL latest earnings", "AAPL earnings results"]
+
+    # Hits hand out copies, so annotating one never leaks into the cache
+    second.sources[0].title = "annotated"
+    first.sources[0].title = "annotated"
+    third = await service.perplexity_search("AAPL earnings results")
+    assert third.sources[0].title == "Apple earnings"
+    assert len(searches) == 2
+    perplexity_web_search._semantic_response_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_sessions_share_keepalive_connector():
+    """Brave and content-fetch sessions pool connections on one shared connector."""
+    service = PerplexityWebSearchService()
+    brave = BraveSearchClient()
+    brave.api_key = "test-key"
+
+    service_session = await service._get_session()
+    brave_session = await brave._get_session()
+    connector = service_session.connector
+
+    assert brave_session.connector is connector
+    assert not connector.force_close
+    assert connector.limit == 100 and connector.limit_per_host == 10
+
+    await service.close()
+    await brave.close()
+    assert not connector.closed
+
+    await perplexity_web_search.close_shared_connector()
+    assert connector.closed
+
+
+def test_stage_timer_logs_duration_even_on_error(monkeypatch):
+    service = PerplexityWebSearchService()
+    logged = []
+    monkeypatch.setattr(service, "_log_stage_timing", lambda stage, duration, query: logged.append((stage, duration)))
+
+    with service._stage("search", "q") as stage:
+        pass
+    with pytest.raises(ValueError):
+        with service._stage("broken", "q"):
+            raise ValueError("boom")
+
+    assert logged[0] == ("search", stage.seconds) and stage.seconds >= 0.0
+    assert logged[1][0] == "broken"
+
+
+@pytest.mark.asyncio
+async def test_capped_body_read_stops_streaming_at_limit():
+    """Only the byte budget is pulled from the response stream."""
+    pulled = []
+
+    class _Stream:
+        async def iter_chunked(self, size):
+            for i in range(100):
+                pulled.append(i)
+                yield b"x" * size
+
+    response = type("Response", (), {"content": _Stream()})()
+    limit = 3 * perplexity_web_search._CONTENT_FETCH_CHUNK_BYTES - 10
+    body = await PerplexityWebSearchService._read_capped_body(response, limit)
+
+    assert len(body) == limit
+    assert len(pulled) == 3
+
+
+@pytest.mark.asyncio
+async def test_extract_clean_content_prefers_main_block():
+    """Content extraction keeps the main article text and drops page chrome."""
+    service = PerplexityWebSearchService()
+    body = " ".join(["Toyota reported record quarterly operating profit on strong hybrid sales."] * 5)
+    html = (
+        "<html><body><nav>Home Markets Login</nav>"
+        f"<article><p>{body}</p></article>"
+        "<div class='ad'>Buy now</div><script>var x = 1;</script>"
+        "</body></html>"
+    )
+
+    text = await service._extract_clean_content(html)
+    await service.close()
+
+    assert "record quarterly operating profit" in text
+    assert "Buy now" not in text
+    assert "var x" not in text
+    assert "Login" not in text
+
+
+@pytest.mark.asyncio
+async def test_extract_clean_content_falls_back_when_trafilatura_finds_nothing(monkeypatch):
+    """trafilatura output is used when present; an empty extraction falls back to the HTML parser."""
+    extracted = []
+
+    class _FakeTrafilatura:
+        @staticmethod
+        def extract(html, **kwargs):
+            return extracted.pop(0)
+
+    monkeypatch.setattr(perplexity_web_search, "TRAFILATURA_AVAILABLE", True)
+    monkeypatch.setattr(perplexity_web_search, "trafilatura", _FakeTrafilatura, raising=False)
+    service = PerplexityWebSearchService()
+    body = " ".join(["Sony raised its full-year forecast on image sensor demand."] * 5)
+    html = f"<html><body><article><p>{body}</p></article></body></html>"
+
+    extracted.append("Extracted by trafilatura. " * 10)
+    assert (await service._extract_clean_content(html)).startswith("Extracted by trafilatura.")
+
+    extracted.append(None)
+    assert "image sensor demand" in await service._extract_clean_content(html)
+    await service.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("persistent", [True, False])
+async def test_persistent_service_keeps_session_between_queries(monkeypatch, persistent):
+    """Only short-lived services drop their session at the end of perplexity_search."""
+    service = PerplexityWebSearchService(persistent=persistent)
+
+    async def no_results(query, max_results, include_recent, time_limit=None):
+        return [], query
+
+    async def no_embedding(query):
+        return None
+
+    monkeypatch.setattr(service, "_enhanced_web_search", no_results)
+    monkeypatch.setattr(service, "_get_query_embedding", no_embedding)
+    session = await service._get_session()
+    await service.perplexity_search("toyota earnings")
+
+    assert (service._session is session) is persistent
+    assert session.closed is not persistent
+    await service.close()
+    assert session.closed
@@ -0,0 +1,96 @@
+from app.services.perplexity_web_search import BraveSearchClient, PerplexityWebSearchService, _QueryCtx
+
+
+def test_query_classifiers_match_substrings_case_insensitively():
+    client = BraveSearchClient()
+    assert client._is_financial_query("Toyota SHAREHOLDER meeting")
+    assert not client._is_financial_query("weather in Osaka")
+    assert client._is_time_sensitive_query("Sony Q3 outlook")
+    assert not client._is_time_sensitive_query("history of Kyoto")
+
+
+def test_detect_language_latin_hints_use_whole_words():
+    service = PerplexityWebSearchService()
+    for detect in (BraveSearchClient._detect_language, service._detect_language):
+        assert detect("die Aktie und der Markt") == "de"
+        assert detect("le marché et la bourse") == "fr"
+        assert detect("la analysis of the market") == "en"
+        # "i" inside ordinary words is not an Italian hint
+        assert detect("apple earnings outlook") == "en"
+        assert detect("トヨタの決算") == "ja"
+
+
+def test_script_counts_in_one_pass():
+    from app.services.perplexity_web_search import _count_script_chars
+
+    # Common Japanese kanji (一) count only as Japanese; other kanji count for both
+    assert _count_script_chars("トヨタ一経済") == (6, 2, 0, 0, 0, 0)
+    assert _count_script_chars("한국 Россия ไทย عربي") == (0, 0, 2, 4, 6, 3)
+    assert _count_script_chars("plain ascii") == (0, 0, 0, 0, 0, 0)
+
+
+def test_vectorized_script_counts_match_loop():
+    from app.services import perplexity_web_search as pws
+
+    chunk = "トヨタ一経済 한국 Россия ไทย عربي earnings "
+    text = chunk * 10
+    assert len(text) > pws._SCRIPT_VECTORIZE_MIN_CHARS
+    assert pws._count_script_chars(text) == tuple(10 * n for n in pws._count_script_chars(chunk))
+
+
+def test_detect_language_caches_short_texts_only():
+    from app.services import perplexity_web_search as pws
+
+    pws._detect_language_cached.cache_clear()
+    BraveSearchClient._detect_language("トヨタの決算")
+    BraveSearchClient._detect_language("トヨタの決算")
+    BraveSearchClient._detect_language("x" * (pws._LANGUAGE_CACHE_MAX_CHARS + 1))
+    info = pws._detect_language_cached.cache_info()
+    assert (info.hits, info.currsize) == (1, 1)
+    assert BraveSearchClient._detect_language(None) == "en"
+
+
+def test_spam_and_quality_indicators():
+    client = BraveSearchClient()
+    assert client._has_spam_indicators("Miracle Cure revealed", "")
+    assert not client._has_spam_indicators("Toyota results", "Quarterly report")
+    plain = client._calculate_brave_quality_score({}, _QueryCtx.from_query("toyota"), "Toyota", "news", "example.com")
+    rich = client._calculate_brave_quality_score({}, _QueryCtx.from_query("toyota"), "Toyota", "news 決算 analysis", "example.com")
+    spammy = client._calculate_brave_quality_score({}, _QueryCtx.from_query("toyota"), "Toyota", "news, click here", "example.com")
+    assert spammy < plain < rich
+
+
+def test_content_relevance_tokens_are_reused_across_results():
+    tokens = BraveSearchClient._content_relevance_tokens("the Toyota earnings of Q3")
+    assert tokens == ["toyota", "earnings"]
+    assert BraveSearchClient._is_content_relevant_fast(tokens, False, "Toyota beats", "")
+    assert not BraveSearchClient._is_content_relevant_fast(tokens, False, "Weather", "sunny")
+
+
+def test_optimal_locale_prefers_higher_priority_signals():
+    locale = BraveSearchClient._get_optimal_locale.__wrapped__
+    assert locale("Toyota 決算", "US") == ("JP", "ja")
+    assert locale("deutsch stocks in Japan", "US") == ("JP", "ja")
+    assert locale("European banks", "US") == ("GB", "en")
+    assert locale("NASDAQ movers", "JP") == ("US", "en")
+    assert locale("gold price", "ALL") == ("US", "en")
+    assert locale("gold price", "AU") == ("AU", "en")
+
+
+def test_query_simplification_and_relevance_filter():
+    service = PerplexityWebSearchService()
+    assert service._simplify_japanese_query("トヨタの決算について教えてください。") == "トヨタ 決算"
+    assert service._simplify_japanese_query("株価") == "株価"  # Too short to simplify
+    assert service._is_result_relevant("apple stock", "Apple shares", "stock price chart")
+    assert not service._is_result_relevant("apple stock", "Weather", "sunny skies")
+    assert service._is_result_relevant("mizuho 銀行", "Mizuho 銀行の決算", "")
+    # Financial content vouches for a result even when an irrelevant pattern also appears
+    assert service._is_result_relevant("apple stock", "Apple stock", "food stocks and recipe ideas")
+    assert not service._is_result_relevant("pie stock", "Pie recipe", "")
+
+
+def test_ddgs_region_detects_japanese_script():
+    service = PerplexityWebSearchService()
+    assert service._get_optimal_ddgs_region("トヨタ earnings") == "jp-jp"
+    assert service._get_optimal_ddgs_region("China EV sales") == "cn-zh"
+    assert service._get_optimal_ddgs_region("한국 korea stocks") == "kr-kr"
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.services import perplexity_web_search
+from app.services.perplexity_web_search import BraveSearchClient, PerplexityWebSearchService, _search_cache
+
+
+def _raw(prefix, count):
+    return [
+        {"title": f"{prefix} {i}", "url": f"https://{prefix}.example.com/{i}", "snippet": "toyota earnings"}
+        for i in range(count)
+    ]
+
+
+def _fake_brave(delay, results):
+    class FakeBrave(BraveSearchClient):
+        is_available = True
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def search(self, **kwargs):
+            await asyncio.sleep(delay)
+            return results
+
+        def log_quality_metrics(self, results, query):
+            pass
+
+    return FakeBrave
+
+
+async def _run(monkeypatch, brave_delay, brave_results, ddgs_delay, ddgs_results):
+    _search_cache.clear()
+    monkeypatch.setattr(perplexity_web_search, "DDGS_HEDGE_DELAY_SECONDS", 0.05)
+    monkeypatch.setattr(perplexity_web_search, "BraveSearchClient", _fake_brave(brave_delay, brave_results))
+    service = PerplexityWebSearchService()
+    ddgs_calls = []
+
+    async def fake_ddgs(query, max_results, time_limit=None):
+        ddgs_calls.append(query)
+        await asyncio.sleep(ddgs_delay)
+        return ddgs_results
+
+    monkeypatch.setattr(service, "_direct_ddgs_search", fake_ddgs)
+    results, _ = await service._enhanced_web_search("toyota earnings", 3, False)
+    _search_cache.clear()
+    return results, ddgs_calls
+
+
+@pytest.mark.asyncio
+async def test_fast_brave_cancels_ddgs_before_it_starts(monkeypatch):
+    results, ddgs_calls = await _run(monkeypatch, 0.0, _raw("brave", 3), 0.0, _raw("ddgs", 3))
+    assert ddgs_calls == []
+    assert {r.source for r in results} == {"brave_search"}
+
+
+@pytest.mark.asyncio
+async def test_slow_brave_loses_to_ddgs(monkeypatch):
+    results, ddgs_calls = await _run(monkeypatch, 5.0, _raw("brave", 3), 0.0, _raw("ddgs", 3))
+    assert len(ddgs_calls) == 1
+    assert [r.source for r in results] == ["ddgs_search"] * 3
+
+
+@pytest.mark.asyncio
+async def test_thin_ddgs_result_still_waits_for_brave(monkeypatch):
+    results, ddgs_calls = await _run(monkeypatch, 0.2, _raw("brave", 3), 0.0, _raw("ddgs", 1))
+    assert len(ddgs_calls) == 1
+    assert [r.source for r in results] == ["brave_search"] * 3
+
+
+@pytest.mark.asyncio
+async def test_ddgs_runs_on_dedicated_executor(monkeypatch):
+    import threading
+
+    thread_names = []
+
+    class FakeDDGS:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def text(self, **kwargs):
+            thread_names.append(threading.current_thread().name)
+            return []
+
+    monkeypatch.setattr(perplexity_web_search, "DDGS", FakeDDGS)
+    monkeypatch.setattr(perplexity_web_search.time, "sleep", lambda _: None)
+    await PerplexityWebSearchService()._direct_ddgs_search("toyota earnings", 3)
+    perplexity_web_search.shutdown_ddgs_executor()
+    assert thread_names and thread_names[0].startswith("ddgs")